@@ -0,0 +1,415 @@
+import asyncio
+import logging
+import math
+import threading
+import time
+from collections import Counter, OrderedDict, deque
+from typing import Any, Protocol
+
+from jose import JWTError, jwt
+
+from .config import settings
+from .metrics import Histogram
+
+log = logging.getLogger(__name__)
+
+
+class Rejected(Exception):
+    """Turn the request away with ``status`` and a ``Retry-After`` of ``retry_after`` s."""
+
+    def __init__(self, status: int, reason: str, retry_after: float):
+        super().__init__(reason)
+        self.status = status
+        self.reason = reason
+        self.retry_after = max(1, math.ceil(retry_after))
+
+
+class GroupLimiter:
+    """At most ``limit`` requests of one route group run at once; ``max_queue`` may wait.
+
+    Shedding is adaptive: an arrival is refused (503) when the queue is full, or when its
+    expected wait (queue position x mean time a request holds a slot / ``limit``, the
+    mean an EWMA of recent requests) exceeds ``target_wait_s``; a queued request still
+    waiting after ``queue_timeout_s`` is shed as well. The queue therefore stays short
+    enough for admitted requests to finish in time, instead of all of them timing out
+    together. Runs on the event loop thread only, so it needs no lock.
+    """
+
+    ALPHA = 0.2  # EWMA weight of the newest service time
+
+    def __init__(
+        self,
+        name: str,
+        limit: int,
+        max_queue: int = 64,
+        queue_timeout_s: float = 2.0,
+        target_wait_s: float = 1.0,
+    ):
+        self.name = name
+        self.limit = max(1, limit)
+        self.max_queue = max(0, max_queue)
+        self.queue_timeout_s = queue_timeout_s
+        self.target_wait_s = target_wait_s
+        self.service_s = 0.0
+        self._active = 0
+        self._waiters: deque[asyncio.Future] = deque()
+        self._admitted = 0
+        self._queued = 0
+        self._rejected: Counter[str] = Counter()
+        self.queue_wait = Histogram(
+            "admission_queue_wait_seconds",
+            "Time admitted requests waited for a slot in their route group",
+            labels={"group": name},
+        )
+
+    def expected_wait(self, position: int) -> float:
+        return position * self.service_s / self.limit
+
+    def _reject(self, reason: str, wait: float) -> Rejected:
+        self._rejected[reason] += 1
+        return Rejected(503, reason, wait or self.service_s)
+
+    async def acquire(self) -> None:
+        if self._active < self.limit and not self._waiters:
+            self._active += 1
+            self._admitted += 1
+            return
+        position = len(self._waiters) + 1
+        wait = self.expected_wait(position)
+        if position > self.max_queue:
+            raise self._reject("queue_full", wait)
+        if wait > self.target_wait_s:
+            raise self._reject("expected_wait", wait)
+        fut = asyncio.get_running_loop().create_future()
+        self._waiters.append(fut)
+        self._queued += 1
+        start = time.perf_counter()
+        try:
+            # asyncio.wait leaves ``fut`` alone on timeout, so a slot handed over at the
+            # last moment is never lost
+            await asyncio.wait((fut,), timeout=self.queue_timeout_s)
+        except asyncio.CancelledError:
+            self._abandon(fut)
+            raise
+        if not fut.done():
+            self._abandon(fut)
+            raise self._reject("queue_timeout", self.expected_wait(len(self._waiters) + 1))
+        self.queue_wait.observe(time.perf_counter() - start)
+
+    def _abandon(self, fut: asyncio.Future) -> None:
+        if fut.done():
+            self.release(0.0, measured=False)  # we were given the slot after all
+        else:
+            fut.cancel()
+            self._waiters.remove(fut)
+
+    def release(self, elapsed: float, measured: bool = True) -> None:
+        if measured:
+            a = self.ALPHA if self.service_s else 1.0
+            self.service_s += a * (elapsed - self.service_s)
+        while self._waiters:
+            fut = self._waiters.popleft()
+            if not fut.done():
+                fut.set_result(None)  # the slot passes straight to the next waiter
+                self._admitted += 1
+                return
+        self._active -= 1
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "limit": self.limit,
+            "active": self._active,
+            "queued": len(self._waiters),
+            "admitted": self._admitted,
+            "queued_total": self._queued,
+            "rejected": dict(self._rejected),
+            "service_seconds": self.service_s,
+            "queue_wait_seconds": self.queue_wait.snapshot(),
+        }
+
+
+# ---------- token buckets ----------
+class Buckets(Protocol):
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        """Take one token from ``key``'s bucket: 0.0 if granted, else seconds until one is."""
+        ...
+
+
+def _refill(tokens: float, stamp: float, now: float, rate: float, burst: int) -> float:
+    return min(float(burst), tokens + (now - stamp) * rate)
+
+
+class MemoryBuckets:
+    """Token buckets in this process: with N workers a user gets up to N x the rate."""
+
+    def __init__(self, max_keys: int = 100_000):
+        self.max_keys = max_keys
+        self._buckets: OrderedDict[str, tuple[float, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        now = time.monotonic()
+        with self._lock:
+            tokens, stamp = self._buckets.pop(key, (float(burst), now))
+            tokens = _refill(tokens, stamp, now, rate, burst)
+            granted = tokens >= 1.0
+            self._buckets[key] = (tokens - 1.0 if granted else tokens, now)
+            if len(self._buckets) > self.max_keys:
+                self._buckets.popitem(last=False)  # least recently seen; it was near full
+        return 0.0 if granted else (1.0 - tokens) / rate
+
+
+class Store(Protocol):
+    """The two operations SharedBuckets needs from a store every worker can reach."""
+
+    async def get(self, key: str) -> str | None: ...
+
+    async def compare_and_set(
+        self, key: str, expected: str | None, value: str, ttl_s: float
+    ) -> bool: ...
+
+
+class SharedBuckets:
+    """Token buckets kept in a shared ``Store``, so the rate holds across workers/hosts.
+
+    Each take is a read plus an optimistic compare-and-set of ``"tokens:timestamp"``
+    (wall clock, since workers do not share a monotonic one), retried on contention.
+    If the store keeps losing the race or fails, the request is let through: rate
+    limiting should never take the API down with it.
+    """
+
+    RETRIES = 5
+
+    def __init__(self, store: "Store", prefix: str = "ratelimit:"):
+        self.store = store
+        self.prefix = prefix
+        self.errors = 0
+
+    async def take(self, key: str, rate: float, burst: int) -> float:
+        key = self.prefix + key
+        ttl = burst / rate + 1.0  # a bucket left alone this long is full again
+        try:
+            for _ in range(self.RETRIES):
+                now = time.time()
+                raw = await self.store.get(key)
+                tokens, stamp = (float(x) for x in raw.split(":")) if raw else (burst, now)
+                tokens = _refill(tokens, stamp, now, rate, burst)
+                granted = tokens >= 1.0
+                value = f"{tokens - 1.0 if granted else tokens}:{now}"
+                if await self.store.compare_and_set(key, raw, value, ttl):
+                    return 0.0 if granted else (1.0 - tokens) / rate
+        except Exception:
+            log.exception("rate limit store failed; admitting")
+        self.errors += 1
+        return 0.0
+
+
+class LocalStore:
+    """In-process ``Store``: a stand-in for the shared one in tests and local runs."""
+
+    def __init__(self):
+        self._data: dict[str, tuple[str, float]] = {}
+        self._lock = threading.Lock()
+
+    async def get(self, key: str) -> str | None:
+        with self._lock:
+            value, expires = self._data.get(key, (None, 0.0))
+            return value if expires > time.monotonic() else None
+
+    async def compare_and_set(
+        self, key: str, expected: str | None, value: str, ttl_s: float
+    ) -> bool:
+        with self._lock:
+            current, expires = self._data.get(key, (None, 0.0))
+            if expires <= time.monotonic():
+                current = None
+            if current != expected:
+                return False
+            self._data[key] = (value, time.monotonic() + ttl_s)
+            return True
+
+
+class RedisStore:
+    """``Store`` on Redis (needs the ``redis`` package); CAS via WATCH / MULTI."""
+
+    def __init__(self, url: str):
+        try:
+            from redis import asyncio as aioredis
+            from redis.exceptions import WatchError
+        except ImportError as err:
+            raise RuntimeError("RATE_LIMIT_BACKEND=redis needs redis (pip install redis)") from err
+        self._redis = aioredis.from_url(url, decode_responses=True)
+        self._watch_error = WatchError
+
+    async def get(self, key: str) -> str | None:
+        return await self._redis.get(key)
+
+    async def compare_and_set(
+        self, key: str, expected: str | None, value: str, ttl_s: float
+    ) -> bool:
+        async with self._redis.pipeline(transaction=True) as pipe:
+            await pipe.watch(key)
+            if await pipe.get(key) != expected:
+                await pipe.unwatch()
+                return False
+            pipe.multi()
+            pipe.set(key, value, px=int(ttl_s * 1000))
+            try:
+                await pipe.execute()
+            except self._watch_error:
+                return False
+            return True
+
+
+# ---------- controller + middleware ----------
+class AdmissionController:
+    """Maps a request to its route group limiter and rate-limit key."""
+
+    def __init__(
+        self,
+        limits: dict[str, int] | None = None,
+        routes: dict[str, str] | None = None,
+        exempt: list[str] | tuple[str, ...] = (),
+        max_queue: int = 64,
+        queue_timeout_s: float = 2.0,
+        target_wait_s: float = 1.0,
+        rate_per_s: float = 0.0,
+        burst: int = 20,
+        buckets: Buckets | None = None,
+    ):
+        self.groups = {
+            name: GroupLimiter(name, n, max_queue, queue_timeout_s, target_wait_s)
+            for name, n in (limits or {}).items()
+        }
+        # longest prefix first, so "/ml/predict/batch" can differ from "/ml/predict"
+        self.routes = sorted((routes or {}).items(), key=lambda kv: -len(kv[0]))
+        self.exempt = tuple(exempt)
+        self.rate_per_s = rate_per_s
+        self.burst = burst
+        self.buckets = buckets or MemoryBuckets()
+        self._limited = 0
+
+    def group(self, path: str) -> GroupLimiter | None:
+        for prefix, name in self.routes:
+            if under(path, prefix):
+                return self.groups.get(name)
+        return self.groups.get("default")
+
+    def is_exempt(self, path: str) -> bool:
+        return any(under(path, prefix) for prefix in self.exempt)
+
+    @staticmethod
+    def subject(scope) -> str:
+        """JWT subject of the bearer token, else the client address."""
+        for name, value in scope.get("headers", ()):
+            if name == b"authorization" and value[:7].lower() == b"bearer ":
+                try:
+                    claims = jwt.decode(
+                        value[7:].decode("latin-1"),
+                        settings.secret_key,
+                        algorithms=[settings.algorithm],
+                    )
+                except JWTError:
+                    break
+                if claims.get("sub"):
+                    return f"sub:{claims['sub']}"
+                break
+        client = scope.get("client")
+        return f"addr:{client[0] if client else 'unknown'}"
+
+    async def check_rate(self, scope) -> None:
+        if self.rate_per_s <= 0:
+            return
+        wait = await self.buckets.take(self.subject(scope), self.rate_per_s, self.burst)
+        if wait > 0:
+            self._limited += 1
+            raise Rejected(429, "rate_limited", wait)
+
+    def stats(self) -> dict[str, Any]:
+        return {
+            "groups": {name: g.stats() for name, g in self.groups.items()},
+            "rate_limit": {
+                "rate_per_s": self.rate_per_s,
+                "burst": self.burst,
+                "backend": type(self.buckets).__name__,
+                "limited": self._limited,
+                "store_errors": getattr(self.buckets, "errors", 0),
+            },
+        }
+
+
+def under(path: str, prefix: str) -> bool:
+    """Whether ``path`` is ``prefix`` or below it, on whole path segments
+    ("/ml/predict/batch" is under "/ml/predict", "/ml/predictions" is not)."""
+    return path == prefix or path.startswith(prefix.rstrip("/") + "/")
+
+
+def _reject_headers(rej: Rejected) -> list[tuple[bytes, bytes]]:
+    return [
+        (b"content-type", b"application/json"),
+        (b"retry-after", str(rej.retry_after).encode()),
+    ]
+
+
+class AdmissionMiddleware:
+    """Rate-limits, then admits or sheds each HTTP request before the app sees it.
+
+    Plain ASGI like TimingMiddleware; a slot is held until the response (streaming
+    bodies included) has been sent.
+    """
+
+    def __init__(self, app, controller: AdmissionController):
+        self.app = app
+        self.controller = controller
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or self.controller.is_exempt(scope["path"]):
+            await self.app(scope, receive, send)
+            return
+        limiter = self.controller.group(scope["path"])
+        try:
+            await self.controller.check_rate(scope)
+            if limiter is not None:
+                await limiter.acquire()
+        except Rejected as rej:
+            detail = "Rate limit exceeded" if rej.status == 429 else "Server busy, retry later"
+            body = f'{{"detail":"{detail}","reason":"{rej.reason}"}}'.encode()
+            await send(
+                {
+                    "type": "http.response.start",
+                    "status": rej.status,
+                    "headers": _reject_headers(rej),
+                }
+            )
+            await send({"type": "http.response.body", "body": body})
+            return
+        if limiter is None:
+            await self.app(scope, receive, send)
+            return
+        start = time.perf_counter()
+        try:
+            await self.app(scope, receive, send)
+        finally:
+            limiter.release(time.perf_counter() - start)
+
+
+def build_controller() -> AdmissionController:
+    """An AdmissionController configured from Settings."""
+    buckets: Buckets
+    if settings.rate_limit_backend == "redis":
+        buckets = SharedBuckets(RedisStore(settings.rate_limit_redis_url))
+    elif settings.rate_limit_backend == "local":
+        buckets = SharedBuckets(LocalStore())
+    else:
+        buckets = MemoryBuckets()
+    return AdmissionController(
+        limits=settings.admission_limits if settings.admission_enabled else {},
+        routes=settings.admission_routes,
+        exempt=settings.admission_exempt,
+        max_queue=settings.admission_max_queue,
+        queue_timeout_s=settings.admission_queue_timeout_s,
+        target_wait_s=settings.admission_target_wait_s,
+        rate_per_s=settings.rate_limit_per_s,
+        burst=settings.rate_limit_burst,
+        buckets=buckets,
+    )
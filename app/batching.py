@@ -0,0 +1,138 @@
+import queue
+import threading
+import time
+from collections import Counter
+from collections.abc import Callable, Sequence
+from concurrent.futures import Future
+from contextlib import suppress
+from typing import Any
+
+_STOP = object()
+
+
+class BatchScheduler:
+    """Coalesces concurrent single-row calls into one vectorized call.
+
+    Callers submit one row each and block on a future; a worker thread drains the
+    queue into batches of up to ``max_batch_size`` rows, waiting at most
+    ``max_wait_us`` for stragglers once the first row of a batch has arrived.
+    ``fn`` receives the list of rows and must return one result per row. If a batch
+    fails, its rows are retried one by one so a single bad row only fails its own
+    caller.
+    """
+
+    def __init__(
+        self,
+        fn: Callable[[list[Any]], Sequence[Any]],
+        max_batch_size: int = 64,
+        max_wait_us: int = 500,
+    ):
+        self._fn = fn
+        self.max_batch_size = max(1, max_batch_size)
+        self.max_wait = max(0, max_wait_us) / 1_000_000
+        self._queue: queue.SimpleQueue = queue.SimpleQueue()
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._batch_sizes: Counter[int] = Counter()
+        self._rows = 0
+
+    def submit(self, row: Any) -> Future:
+        fut: Future = Future()
+        with self._lock:
+            if self._closed:
+                raise RuntimeError("batch scheduler is stopped")
+            if self._thread is None or not self._thread.is_alive():
+                self._thread = threading.Thread(
+                    target=self._run, name="batch-scheduler", daemon=True
+                )
+                self._thread.start()
+            self._queue.put((row, fut))
+        return fut
+
+    def __call__(self, row: Any, timeout: float | None = None) -> Any:
+        return self.submit(row).result(timeout)
+
+    def stop(self, timeout: float | None = 5.0) -> None:
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+            if thread is not None:
+                # queued rows ahead of the sentinel are still served
+                self._queue.put(_STOP)
+        if thread is not None:
+            thread.join(timeout)
+
+    def _run(self) -> None:
+        while True:
+            item = self._queue.get()
+            if item is _STOP:
+                return
+            batch = [item]
+            deadline = time.monotonic() + self.max_wait
+            stop = False
+            while len(batch) < self.max_batch_size:
+                remaining = deadline - time.monotonic()
+                try:
+                    # past the deadline we still take whatever is already queued
+                    if remaining > 0:
+                        item = self._queue.get(timeout=remaining)
+                    else:
+                        item = self._queue.get_nowait()
+                except queue.Empty:
+                    break
+                if item is _STOP:
+                    stop = True
+                    break
+                batch.append(item)
+            self._dispatch(batch)
+            if stop:
+                return
+
+    def _dispatch(self, batch: list[tuple[Any, Future]]) -> None:
+        live = [(row, fut) for row, fut in batch if fut.set_running_or_notify_cancel()]
+        if not live:
+            return
+        with self._lock:
+            self._batch_sizes[len(live)] += 1
+            self._rows += len(live)
+        try:
+            self._resolve(live)
+        except Exception:
+            if len(live) > 1:
+                for entry in live:
+                    with suppress(Exception):
+                        self._resolve([entry])
+        finally:
+            # never leave a caller waiting, whatever went wrong above
+            for _, fut in live:
+                if not fut.done():
+                    fut.set_exception(RuntimeError("batch scheduler failed to resolve row"))
+
+    def _resolve(self, live: list[tuple[Any, Future]]) -> None:
+        # fails every future in ``live`` and re-raises if the call or its result is bad
+        try:
+            results = list(self._fn([row for row, _ in live]))
+            if len(results) != len(live):
+                raise RuntimeError(f"batch fn returned {len(results)} results for {len(live)} rows")
+        except Exception as err:
+            if len(live) == 1:
+                live[0][1].set_exception(err)
+            raise
+        for (_, fut), res in zip(live, results, strict=True):
+            fut.set_result(res)
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            hist = dict(sorted(self._batch_sizes.items()))
+            rows = self._rows
+        batches = sum(hist.values())
+        return {
+            "queue_depth": self._queue.qsize(),
+            "batches": batches,
+            "rows": rows,
+            "mean_batch_size": rows / batches if batches else 0.0,
+            "batch_size_histogram": hist,
+            "max_batch_size": self.max_batch_size,
+            "max_wait_us": int(self.max_wait * 1_000_000),
+        }
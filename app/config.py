@@ -1,5 +1,9 @@
+from typing import Literal
+
 from pydantic_settings import BaseSettings
 
+RouterGroup = Literal["auth", "items", "ml", "export"]
+
 
 class Settings(BaseSettings):
     # loaded from .env automatically
@@ -7,6 +11,171 @@ class Settings(BaseSettings):
     secret_key: str = "change-me"
     algorithm: str = "HS256"
     access_token_expire_minutes: int = 60
+    # connection pool, shared by the sync and async engines
+    db_pool_size: int = 5
+    db_max_overflow: int = 10
+    db_pool_timeout_s: float = 30.0
+    db_pool_recycle_s: int = -1  # seconds; -1 keeps connections forever
+    db_pool_pre_ping: bool = False
+    db_statement_timeout_ms: int = 0  # 0 leaves the server default
+    # PgBouncer transaction pooling: no prepared-statement cache, per-transaction timeout
+    db_pgbouncer: bool = False
+    # read replicas for read-only handlers (app.replicas): round-robin over the healthy
+    # ones, checked every db_replica_check_interval_s (down when unreachable or more than
+    # db_replica_max_lag_s behind); a client reads from the primary for
+    # db_replica_sticky_s after its own writes. Same pool settings as the primary
+    db_replica_urls: list[str] = []
+    db_replica_check_interval_s: float = 5.0
+    db_replica_max_lag_s: float = 5.0
+    db_replica_sticky_s: float = 5.0
+    db_replica_connect_timeout_s: int = 2
+    # request timing middleware + hot-path spans (exported on /metrics); Server-Timing
+    # response headers additionally expose the per-request breakdown to clients
+    tracing_enabled: bool = True
+    server_timing: bool = False
+    # serve the async routers (asyncpg engine, async def handlers) instead of the sync ones
+    async_mode: bool = False
+    # `python -m app.serve` prefork launcher: server_workers 0 = one per available CPU,
+    # capped so workers x (db_pool_size + db_max_overflow) <= server_db_connections
+    # (0 = no cap). Workers are recycled after server_max_requests (0 = never)
+    server_host: str = "127.0.0.1"
+    server_port: int = 8000
+    server_workers: int = 0
+    server_db_connections: int = 0
+    server_backlog: int = 2048
+    server_graceful_timeout_s: float = 30.0
+    server_max_requests: int = 0
+    # router groups to serve; the rest are never imported (without "ml", a worker loads
+    # no NumPy / scikit-learn and no model)
+    enabled_routers: list[RouterGroup] = ["auth", "items", "ml", "export"]
+    # encode ItemOut / UserOut / IrisOut responses straight from DB rows with orjson
+    # (if installed), skipping response-model validation of data we produced ourselves
+    fast_responses: bool = False
+    # cache token subject -> principal so authenticated requests skip the users lookup
+    auth_cache_enabled: bool = True
+    auth_cache_size: int = 10_000
+    auth_cache_ttl_s: float = 60.0
+    # put the user id in issued tokens and trust it, so auth needs no DB at all
+    jwt_user_id_claim: bool = False
+    # password hashing: first scheme hashes, the others are verified and upgraded on
+    # login; rounds per scheme (raising them rehashes weaker hashes on next login)
+    password_schemes: list[str] = ["pbkdf2_sha256"]
+    password_rounds: dict[str, int] = {"pbkdf2_sha256": 29_000}
+    # dedicated pool for hashing: workers + max_pending jobs, then 503 with Retry-After;
+    # keep the sum below the request threadpool size (40) so reads never starve
+    password_hash_workers: int = 2
+    password_hash_max_pending: int = 16
+    password_hash_timeout_s: float = 5.0
+
+    # GET /items page size cap
+    items_max_limit: int = 100
+    # rows accepted by one /items/bulk request
+    items_bulk_max_rows: int = 10_000
+    # read-through cache for GET /items and /items/{id} (ETags are always sent). Per
+    # process: a write invalidates only its own worker's copy, so other workers may
+    # serve the old response for up to items_cache_ttl_s. `python -m app.serve` turns
+    # it off when it starts more than one worker; under `uvicorn --workers` keep it off
+    items_cache_enabled: bool = False
+    items_cache_maxsize: int = 4096
+    items_cache_ttl_s: float = 300.0
+    # /export and `python -m app.export`: rows fetched per server-side cursor batch
+    export_batch_rows: int = 5000
+
+    # model registry: the default model is <model_path>; every *.joblib beside it is a
+    # version. Loaded and warmed up at startup (plus model_preload), and hot-swapped
+    # when its file changes if model_watch_interval_s > 0
+    model_path: str = "artifacts/iris_clf.joblib"
+    model_warmup: bool = True
+    # memory-map numeric arrays from uncompressed artifacts so workers share their pages
+    model_mmap: bool = True
+    # score StandardScaler -> LogisticRegression pipelines with folded weights and plain
+    # NumPy instead of sklearn (verified against predict_proba at load; else fallback)
+    model_compiled: bool = False
+    model_preload: list[str] = []
+    model_watch_interval_s: float = 0.0
+
+    # /ml/predict result cache: features rounded to predict_cache_decimals + model
+    # version -> result; cleared when the active model changes. With
+    # predict_cache_log_hits off, cache hits skip the predictions insert as well
+    predict_cache_enabled: bool = False
+    predict_cache_size: int = 10_000
+    predict_cache_decimals: int = 6
+    predict_cache_log_hits: bool = True
+
+    # GET /ml/predictions page size cap
+    predictions_max_limit: int = 100
+    # predictions is partitioned by month; `python -m app.maintenance` keeps
+    # predictions_partitions_ahead months ready and drops partitions older than
+    # predictions_retention_days (0 keeps everything), archiving them to
+    # predictions_archive_dir as CSV first when it is set
+    predictions_partitions_ahead: int = 3
+    predictions_retention_days: int = 0
+    predictions_archive_dir: str = ""
+    # answer /ml/predictions/{labels,confidence,daily} from the daily rollups for the
+    # days maintenance has rolled up; only the rest is read from raw rows
+    predictions_rollups: bool = False
+
+    # /ml/predict micro-batching: concurrent requests share one predict_proba call
+    predict_batching: bool = False
+    predict_batch_max_size: int = 64
+    predict_batch_max_wait_us: int = 500
+    predict_batch_timeout_s: float = 5.0
+
+    # /ml/predict/batch: rows scored (and logged) per vectorized call, the cap on
+    # JSON/columnar bodies (parsed whole) and the in-memory limit before NDJSON
+    # input is spooled to disk
+    bulk_predict_chunk_size: int = 2048
+    bulk_predict_max_json_bytes: int = 16 * 1024 * 1024
+    bulk_predict_spool_bytes: int = 8 * 1024 * 1024
+
+    # /ml/predict logging: off the request path through a buffered bulk writer
+    prediction_log_async: bool = False
+    prediction_log_max_pending: int = 10_000
+    prediction_log_flush_size: int = 500
+    prediction_log_flush_interval_ms: int = 200
+    prediction_log_policy: Literal["block", "drop"] = "block"
+    prediction_log_block_timeout_ms: int = 100
+
+    # admission control: at most admission_limits[group] requests of a route group run
+    # at once (groups by path prefix on whole segments via admission_routes; "default"
+    # for the rest), up to admission_max_queue wait, and arrivals are shed with 503 +
+    # Retry-After when the queue is full or their expected wait exceeds
+    # admission_target_wait_s
+    admission_enabled: bool = False
+    admission_limits: dict[str, int] = {"default": 64, "predict": 16, "auth": 8, "export": 2}
+    admission_routes: dict[str, str] = {
+        "/ml/predict": "predict",
+        "/auth/login": "auth",
+        "/auth/register": "auth",
+        "/export": "export",
+    }
+    admission_exempt: list[str] = ["/health", "/metrics"]
+    admission_max_queue: int = 64
+    admission_queue_timeout_s: float = 2.0
+    admission_target_wait_s: float = 1.0
+    # per-user token bucket (JWT sub, else client address): 429 + Retry-After when
+    # empty; 0 disables. "memory" is per process, "redis" is shared by all workers,
+    # "local" is the shared code path on an in-process store (tests, development)
+    rate_limit_per_s: float = 0.0
+    rate_limit_burst: int = 20
+    rate_limit_backend: Literal["memory", "redis", "local"] = "memory"
+    rate_limit_redis_url: str = "redis://localhost:6379/0"
+    # Idempotency-Key on POSTs to idempotency_routes: duplicates of a running request
+    # wait for it (up to idempotency_wait_s, then 409), completed responses are replayed
+    # for idempotency_ttl_s. "memory" keeps idempotency_max_keys per worker, "db" shares
+    # keys through the idempotency_keys table (claims expire after
+    # idempotency_lock_timeout_s if their worker dies). Keyed request bodies are read
+    # up front, and those over idempotency_max_request_bytes get 413; responses over
+    # idempotency_max_body_bytes are not kept
+    idempotency_enabled: bool = False
+    idempotency_backend: Literal["memory", "db"] = "memory"
+    idempotency_routes: list[str] = ["/items", "/items/bulk", "/ml/predict"]
+    idempotency_ttl_s: float = 86_400.0
+    idempotency_wait_s: float = 10.0
+    idempotency_max_keys: int = 10_000
+    idempotency_lock_timeout_s: float = 60.0
+    idempotency_max_body_bytes: int = 1 << 20
+    idempotency_max_request_bytes: int = 16 * 1024 * 1024
 
     class Config:
         env_file = ".env"
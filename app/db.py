@@ -1,16 +1,181 @@
-from sqlalchemy import create_engine
-from sqlalchemy.orm import declarative_base, sessionmaker
+import time
+import uuid
+from functools import cache
+from typing import Any
+
+from sqlalchemy import create_engine, event
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.ext.asyncio import (
+    AsyncEngine,
+    AsyncSession,
+    async_sessionmaker,
+    create_async_engine,
+)
+from sqlalchemy.orm import Session, declarative_base, sessionmaker
+from sqlalchemy.pool import AsyncAdaptedQueuePool, QueuePool
 
 from .config import settings
+from .metrics import Histogram
+from .tracing import instrument_engine, instrument_sessions, note
+
+checkout_wait = Histogram(
+    "db_pool_checkout_wait_seconds",
+    "Time to obtain a pooled connection, including waits and new connects",
+)
+
+
+class _TimedPoolMixin:
+    # _do_get is where QueuePool blocks when every connection is checked out
+    def _do_get(self):
+        start = time.perf_counter()
+        try:
+            return super()._do_get()
+        finally:
+            elapsed = time.perf_counter() - start
+            checkout_wait.observe(elapsed)
+            note("db_checkout", elapsed)
+
+
+class TimedQueuePool(_TimedPoolMixin, QueuePool):
+    pass
+
+
+class TimedAsyncQueuePool(_TimedPoolMixin, AsyncAdaptedQueuePool):
+    pass
+
+
+def engine_options(async_: bool = False, connect_timeout_s: int = 0) -> dict[str, Any]:
+    """create_engine/create_async_engine keyword arguments built from Settings."""
+    opts: dict[str, Any] = {
+        "poolclass": TimedAsyncQueuePool if async_ else TimedQueuePool,
+        "pool_size": settings.db_pool_size,
+        "max_overflow": settings.db_max_overflow,
+        "pool_timeout": settings.db_pool_timeout_s,
+        "pool_recycle": settings.db_pool_recycle_s,
+        "pool_pre_ping": settings.db_pool_pre_ping,
+    }
+    connect_args: dict[str, Any] = {}
+    timeout = settings.db_statement_timeout_ms
+    if settings.db_pgbouncer:
+        # transaction pooling: no server-side prepared statements, and startup
+        # parameters are not forwarded (timeout is set per transaction instead)
+        if async_:
+            connect_args["statement_cache_size"] = 0
+            connect_args["prepared_statement_name_func"] = lambda: f"__qa_{uuid.uuid4()}__"
+    elif timeout:
+        if async_:
+            connect_args["server_settings"] = {"statement_timeout": str(timeout)}
+        else:
+            connect_args["options"] = f"-c statement_timeout={timeout}"
+    if connect_timeout_s:
+        connect_args["timeout" if async_ else "connect_timeout"] = connect_timeout_s
+    if connect_args:
+        opts["connect_args"] = connect_args
+    return opts
+
+
+def _set_local_timeout(conn) -> None:
+    conn.exec_driver_sql(f"SET LOCAL statement_timeout = {int(settings.db_statement_timeout_ms)}")
+
+
+def build_engine(url: str, connect_timeout_s: int = 0) -> Engine:
+    eng = create_engine(url, future=True, **engine_options(connect_timeout_s=connect_timeout_s))
+    if settings.db_pgbouncer and settings.db_statement_timeout_ms:
+        event.listen(eng, "begin", _set_local_timeout)
+    if settings.tracing_enabled:
+        instrument_engine(eng)
+    return eng
+
+
+if settings.tracing_enabled:
+    instrument_sessions()
 
-engine = create_engine(settings.database_url, future=True)
-SessionLocal = sessionmaker(bind=engine, autoflush=False, autocommit=False, future=True)
 Base = declarative_base()
 
 
+@cache
+def get_engine() -> Engine:
+    # built on first use (like the async one) so importing the app costs no dialect
+    # import or pool setup; ``engine`` below still reads as a module attribute
+    return build_engine(settings.database_url)
+
+
+@cache
+def get_sessionmaker() -> sessionmaker[Session]:
+    return sessionmaker(bind=get_engine(), autoflush=False, autocommit=False, future=True)
+
+
+def SessionLocal() -> Session:
+    """A new Session; the name and call signature of the sessionmaker it used to be."""
+    return get_sessionmaker()()
+
+
+def __getattr__(name: str) -> Any:
+    if name == "engine":
+        return get_engine()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
 def get_db():
     db = SessionLocal()
     try:
         yield db
     finally:
         db.close()
+
+
+def async_database_url(url: str) -> str:
+    """Same database, asyncpg driver: postgresql[+psycopg2]:// -> postgresql+asyncpg://."""
+    u = make_url(url)
+    if u.get_backend_name() == "postgresql":
+        u = u.set(drivername="postgresql+asyncpg")
+        if settings.db_pgbouncer:
+            u = u.update_query_dict({"prepared_statement_cache_size": "0"})
+    return u.render_as_string(hide_password=False)
+
+
+def build_async_engine(url: str, connect_timeout_s: int = 0) -> AsyncEngine:
+    eng = create_async_engine(async_database_url(url), **engine_options(True, connect_timeout_s))
+    if settings.db_pgbouncer and settings.db_statement_timeout_ms:
+        event.listen(eng.sync_engine, "begin", _set_local_timeout)
+    if settings.tracing_enabled:
+        instrument_engine(eng.sync_engine)
+    return eng
+
+
+@cache
+def get_async_engine() -> AsyncEngine:
+    # built on first use so sync-only deployments never need asyncpg installed
+    return build_async_engine(settings.database_url)
+
+
+@cache
+def get_async_sessionmaker() -> async_sessionmaker[AsyncSession]:
+    return async_sessionmaker(get_async_engine(), autoflush=False, expire_on_commit=False)
+
+
+async def get_async_db():
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+async def dispose_async_engine() -> None:
+    if get_async_engine.cache_info().currsize:
+        await get_async_engine().dispose()
+
+
+def _pool_status(pool) -> dict[str, Any]:
+    return {
+        "size": pool.size(),
+        "checked_out": pool.checkedout(),
+        "checked_in": pool.checkedin(),
+        "overflow": max(pool.overflow(), 0),
+    }
+
+
+def pool_stats() -> dict[str, Any]:
+    stats: dict[str, Any] = {"sync": _pool_status(get_engine().pool)}
+    if get_async_engine.cache_info().currsize:
+        stats["async"] = _pool_status(get_async_engine().pool)
+    stats["checkout_wait_seconds"] = checkout_wait.snapshot()
+    return stats
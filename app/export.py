@@ -0,0 +1,254 @@
+"""Streaming exports of ``items`` and ``predictions`` (also served under /export):
+
+    python -m app.export items --format csv --compress gzip -o items.csv.gz
+    python -m app.export predictions --since 2026-10-01 --after-id 120000 -o preds.ndjson
+
+Rows come from a server-side cursor ``export_batch_rows`` at a time and are encoded and
+compressed batch by batch, so memory stays flat whatever the table size. Output is
+ordered by id: to resume an interrupted export, pass the last id written as
+``--after-id``. Parquet needs ``pyarrow`` and zstd needs ``zstandard`` (both optional).
+"""
+
+import argparse
+import csv
+import io
+import json
+import sys
+import zlib
+from collections.abc import Iterator, Sequence
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Any, Literal
+
+from sqlalchemy import REAL, Select, cast, func, select
+
+from . import models
+from .config import settings
+from .db import get_engine
+
+Kind = Literal["items", "predictions"]
+Format = Literal["ndjson", "csv", "parquet"]
+Compression = Literal["none", "gzip", "zstd"]
+
+MEDIA_TYPES = {
+    "ndjson": "application/x-ndjson",
+    "csv": "text/csv",
+    "parquet": "application/vnd.apache.parquet",
+}
+COMPRESSED_TYPES = {"gzip": "application/gzip", "zstd": "application/zstd"}
+SUFFIXES = {"none": "", "gzip": ".gz", "zstd": ".zst"}
+
+
+class ExportUnavailable(RuntimeError):
+    """The requested format or compression needs a package that is not installed."""
+
+
+@dataclass(frozen=True, slots=True)
+class ExportRange:
+    """Rows with after_id < id < before_id and since <= created_at < until (all optional)."""
+
+    after_id: int | None = None
+    before_id: int | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+    user_id: int | None = None  # predictions only
+
+
+def _predictions_columns() -> list:
+    p = models.Prediction
+    # features flattened to one column each; rows from before the float4[] backfill
+    # still carry them in the JSONB
+    features = [
+        func.coalesce(p.feature_values[i], cast(p.features[name].astext, REAL)).label(name)
+        for i, name in enumerate(models.FEATURES, 1)
+    ]
+    return [p.id, p.user_id, *features, p.pred_label, p.pred_confidence, p.created_at]
+
+
+def export_query(kind: Kind, rng: ExportRange) -> Select:
+    table = models.Item if kind == "items" else models.Prediction
+    columns = list(models.Item.__table__.c) if kind == "items" else _predictions_columns()
+    query = select(*columns)
+    if rng.after_id is not None:
+        query = query.where(table.id > rng.after_id)
+    if rng.before_id is not None:
+        query = query.where(table.id < rng.before_id)
+    if rng.since is not None:
+        query = query.where(table.created_at >= rng.since)
+    if rng.until is not None:
+        query = query.where(table.created_at < rng.until)
+    if kind == "predictions" and rng.user_id is not None:
+        query = query.where(models.Prediction.user_id == rng.user_id)
+    return query.order_by(table.id)
+
+
+def _plain(v: Any) -> Any:
+    return v.isoformat() if isinstance(v, datetime | date) else v
+
+
+class NdjsonEncoder:
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+
+    def encode(self, rows: Sequence[Sequence]) -> bytes:
+        lines = [json.dumps(dict(zip(self.columns, map(_plain, row), strict=True))) for row in rows]
+        return ("\n".join(lines) + "\n").encode() if lines else b""
+
+    def finish(self) -> bytes:
+        return b""
+
+
+class CsvEncoder:
+    def __init__(self, columns: Sequence[str]):
+        self.columns = columns
+        self._header = True
+
+    def encode(self, rows: Sequence[Sequence]) -> bytes:
+        buf = io.StringIO()
+        writer = csv.writer(buf, lineterminator="\n")
+        if self._header:
+            writer.writerow(self.columns)
+            self._header = False
+        writer.writerows([_plain(v) for v in row] for row in rows)
+        return buf.getvalue().encode()
+
+    def finish(self) -> bytes:
+        return self.encode([]) if self._header else b""
+
+
+class ParquetEncoder:
+    """One row group per batch; the schema is taken from the first batch."""
+
+    def __init__(self, columns: Sequence[str]):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ImportError as err:
+            raise ExportUnavailable("parquet export needs pyarrow (pip install pyarrow)") from err
+        self.columns = columns
+        self._pa, self._pq = pa, pq
+        self._buf = io.BytesIO()
+        self._writer = None
+
+    def _drain(self) -> bytes:
+        out = self._buf.getvalue()
+        self._buf.seek(0)
+        self._buf.truncate()
+        return out
+
+    def encode(self, rows: Sequence[Sequence]) -> bytes:
+        if not rows:
+            return b""
+        cols = {name: [row[i] for row in rows] for i, name in enumerate(self.columns)}
+        if self._writer is None:
+            table = self._pa.table(cols)
+            self._writer = self._pq.ParquetWriter(self._buf, table.schema)
+        else:
+            table = self._pa.table(cols, schema=self._writer.schema)
+        self._writer.write_table(table)
+        return self._drain()
+
+    def finish(self) -> bytes:
+        if self._writer is None:
+            # an empty export is still a valid file, with an untyped schema
+            schema = self._pa.schema([(name, self._pa.null()) for name in self.columns])
+            self._writer = self._pq.ParquetWriter(self._buf, schema)
+        self._writer.close()
+        return self._drain()
+
+
+ENCODERS = {"ndjson": NdjsonEncoder, "csv": CsvEncoder, "parquet": ParquetEncoder}
+
+
+class _Identity:
+    def compress(self, data: bytes) -> bytes:
+        return data
+
+    def flush(self) -> bytes:
+        return b""
+
+
+def compressor(kind: Compression):
+    """An object with ``compress(bytes)`` / ``flush()`` producing one continuous stream."""
+    if kind == "gzip":
+        return zlib.compressobj(6, zlib.DEFLATED, 31)  # wbits 31: gzip container
+    if kind == "zstd":
+        try:
+            import zstandard
+        except ImportError as err:
+            raise ExportUnavailable("zstd export needs zstandard (pip install zstandard)") from err
+        return zstandard.ZstdCompressor().compressobj()
+    return _Identity()
+
+
+def filename(kind: Kind, fmt: Format, compress: Compression) -> str:
+    return f"{kind}.{fmt}{SUFFIXES[compress]}"
+
+
+def media_type(fmt: Format, compress: Compression) -> str:
+    return COMPRESSED_TYPES.get(compress, MEDIA_TYPES[fmt])
+
+
+def stream_export(
+    kind: Kind,
+    fmt: Format,
+    compress: Compression,
+    rng: ExportRange,
+    batch_rows: int | None = None,
+) -> Iterator[bytes]:
+    """Encoded, compressed chunks of the export.
+
+    Raises ExportUnavailable right away; the returned generator checks out its own
+    connection and holds it (and the server-side cursor) until it is exhausted or closed.
+    """
+    query = export_query(kind, rng)
+    encoder = ENCODERS[fmt]([c.name for c in query.selected_columns])
+    comp = compressor(compress)
+    return _stream(query, encoder, comp, batch_rows or settings.export_batch_rows)
+
+
+def _stream(query: Select, encoder, comp, batch_rows: int) -> Iterator[bytes]:
+    with get_engine().connect() as conn:
+        # yield_per implies stream_results: a named (server-side) cursor on psycopg2
+        result = conn.execute(query.execution_options(yield_per=batch_rows))
+        for rows in result.partitions():
+            out = comp.compress(encoder.encode(rows))
+            if out:
+                yield out
+    yield comp.compress(encoder.finish()) + comp.flush()
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.export",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("kind", choices=["items", "predictions"])
+    parser.add_argument("--format", default="ndjson", choices=list(ENCODERS))
+    parser.add_argument("--compress", default="none", choices=list(SUFFIXES))
+    parser.add_argument("--after-id", type=int)
+    parser.add_argument("--before-id", type=int)
+    parser.add_argument("--since", type=datetime.fromisoformat)
+    parser.add_argument("--until", type=datetime.fromisoformat)
+    parser.add_argument("--user-id", type=int, help="predictions of one user only")
+    parser.add_argument("--batch-rows", type=int, default=settings.export_batch_rows)
+    parser.add_argument("-o", "--output", help="file to write (default: stdout)")
+    args = parser.parse_args(argv)
+
+    rng = ExportRange(args.after_id, args.before_id, args.since, args.until, args.user_id)
+    try:
+        chunks = stream_export(args.kind, args.format, args.compress, rng, args.batch_rows)
+    except ExportUnavailable as err:
+        parser.error(str(err))
+    out = open(args.output, "wb") if args.output else sys.stdout.buffer
+    try:
+        for chunk in chunks:
+            out.write(chunk)
+    finally:
+        if out is not sys.stdout.buffer:
+            out.close()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+import logging
+import threading
+from typing import Any, Literal
+
+import numpy as np
+
+log = logging.getLogger(__name__)
+
+Link = Literal["softmax", "ovr", "binary"]
+
+
+class LinearPredictor:
+    """``predict_proba`` for a (StandardScaler ->) LogisticRegression, without sklearn.
+
+    The scaler is folded into the weights, so scoring is one matrix product plus the
+    link function. Logits go to a per-thread scratch buffer for single rows; the
+    returned probabilities are always a fresh array (callers may keep them).
+    """
+
+    def __init__(self, weights: np.ndarray, bias: np.ndarray, link: Link):
+        self.weights_t = np.ascontiguousarray(weights.T, dtype=np.float64)  # (features, k)
+        self.bias = np.ascontiguousarray(bias, dtype=np.float64)
+        self.link = link
+        self.n_features_in_ = self.weights_t.shape[0]
+        self._local = threading.local()
+
+    def _scratch(self) -> np.ndarray:
+        buf = getattr(self._local, "logits", None)
+        if buf is None:
+            buf = self._local.logits = np.empty((1, self.bias.shape[0]))
+        return buf
+
+    def predict_proba(self, X: Any) -> np.ndarray:
+        X = np.asarray(X, dtype=np.float64)
+        if X.ndim == 1:
+            X = X.reshape(1, -1)
+        logits = self._scratch() if X.shape[0] == 1 else None
+        logits = np.dot(X, self.weights_t, out=logits)
+        logits += self.bias
+        if self.link == "binary":
+            p1 = 1.0 / (1.0 + np.exp(-logits[:, 0]))
+            return np.column_stack((1.0 - p1, p1))
+        if self.link == "ovr":
+            proba = 1.0 / (1.0 + np.exp(-logits))
+            proba /= proba.sum(axis=1, keepdims=True)
+            return proba
+        proba = np.exp(logits - logits.max(axis=1, keepdims=True))
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+
+def _link(clf: Any) -> Link:
+    # older sklearn honours multi_class="ovr" (normalized sigmoids) in predict_proba;
+    # a wrong guess here is caught by the load-time equivalence check
+    if len(clf.classes_) <= 2:
+        return "binary"
+    if getattr(clf, "multi_class", None) == "ovr":
+        return "ovr"
+    return "softmax"
+
+
+def compile_linear(model: Any) -> LinearPredictor | None:
+    """Fold ``model`` into a LinearPredictor, or None if its shape is not supported."""
+    # imported here: scikit-learn is only needed once a model is loaded (unpickling
+    # imports it anyway), not to import the app
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    steps = [s for _, s in model.steps] if isinstance(model, Pipeline) else [model]
+    steps = [s for s in steps if s not in (None, "passthrough")]
+    if not steps or type(steps[-1]) is not LogisticRegression:
+        return None
+    clf = steps[-1]
+    scalers = steps[:-1]
+    if any(type(s) is not StandardScaler for s in scalers) or len(scalers) > 1:
+        return None
+    weights = np.asarray(clf.coef_, dtype=np.float64)
+    bias = np.asarray(clf.intercept_, dtype=np.float64).copy()
+    if scalers:
+        scaler = scalers[0]
+        n = weights.shape[1]
+        mean = scaler.mean_ if scaler.with_mean else np.zeros(n)
+        scale = scaler.scale_ if scaler.with_std else np.ones(n)
+        # W((x - mean) / scale) + b == (W / scale) x + (b - W (mean / scale))
+        weights = weights / scale
+        bias -= weights @ mean
+    return LinearPredictor(weights, bias, _link(clf))
+
+
+def _probe_rows(model: Any, n_features: int, rows: int = 64) -> np.ndarray:
+    from sklearn.pipeline import Pipeline
+    from sklearn.preprocessing import StandardScaler
+
+    rng = np.random.default_rng(0)
+    center, spread = np.zeros(n_features), np.ones(n_features)
+    if isinstance(model, Pipeline) and isinstance(model.steps[0][1], StandardScaler):
+        scaler = model.steps[0][1]
+        if scaler.with_mean:
+            center = scaler.mean_
+        if scaler.with_std:
+            spread = scaler.scale_
+    probe = center + spread * rng.standard_normal((rows, n_features)) * 3
+    return np.vstack([np.zeros((1, n_features)), center, probe])
+
+
+def compiled_or_original(model: Any, rtol: float = 1e-9, atol: float = 1e-12) -> Any:
+    """A LinearPredictor for ``model`` if supported and numerically equivalent, else ``model``."""
+    fast = compile_linear(model)
+    if fast is None:
+        log.info("no compiled fast path for %s; using its predict_proba", type(model).__name__)
+        return model
+    probe = _probe_rows(model, fast.n_features_in_)
+    expected = model.predict_proba(probe)
+    got = fast.predict_proba(probe)
+    if got.shape != expected.shape or not np.allclose(got, expected, rtol=rtol, atol=atol):
+        log.warning("compiled predictor disagrees with predict_proba; using the pipeline")
+        return model
+    return fast
@@ -0,0 +1,110 @@
+import asyncio
+import threading
+import time
+from collections.abc import Callable
+from concurrent.futures import Future, ThreadPoolExecutor
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from typing import Any, TypeVar
+
+from .metrics import Histogram
+
+T = TypeVar("T")
+
+hash_seconds = Histogram("password_hash_seconds", "Time spent hashing or verifying a password")
+hash_queue_wait = Histogram(
+    "password_hash_queue_wait_seconds", "Time a hashing job waited for a pool worker"
+)
+
+
+class PoolSaturated(RuntimeError):
+    """The pool had no free slot, or the job was not picked up within the timeout."""
+
+
+class HashPool:
+    """Bounded thread pool for password hashing and verification.
+
+    At most ``workers`` jobs run at once and ``max_pending`` more may wait; beyond
+    that ``submit`` raises ``PoolSaturated`` immediately instead of queueing, so a
+    login burst cannot tie up the request threadpool. pbkdf2 (hashlib) releases the
+    GIL, so threads scale across cores without the cost of a process pool.
+    """
+
+    def __init__(self, workers: int = 2, max_pending: int = 16, timeout_s: float = 5.0):
+        self.workers = max(1, workers)
+        self.max_pending = max(0, max_pending)
+        self.timeout = timeout_s
+        self._slots = threading.BoundedSemaphore(self.workers + self.max_pending)
+        self._lock = threading.Lock()
+        self._executor: ThreadPoolExecutor | None = None
+        self._in_flight = 0
+        self._rejected = 0
+        self._timeouts = 0
+
+    def submit(self, fn: Callable[..., T], *args: Any) -> Future:
+        if not self._slots.acquire(blocking=False):
+            with self._lock:
+                self._rejected += 1
+            raise PoolSaturated("password hashing pool is saturated")
+        enqueued = time.perf_counter()
+
+        def job() -> T:
+            start = time.perf_counter()
+            hash_queue_wait.observe(start - enqueued)
+            try:
+                return fn(*args)
+            finally:
+                hash_seconds.observe(time.perf_counter() - start)
+
+        with self._lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(self.workers, thread_name_prefix="pwd-hash")
+            self._in_flight += 1
+            fut = self._executor.submit(job)
+        fut.add_done_callback(self._release)
+        return fut
+
+    def run(self, fn: Callable[..., T], *args: Any) -> T:
+        """Run ``fn`` on the pool and wait for it (from a worker thread)."""
+        fut = self.submit(fn, *args)
+        try:
+            return fut.result(self.timeout)
+        except FutureTimeoutError as err:
+            self._timed_out(fut)
+            raise PoolSaturated("password hashing timed out") from err
+
+    async def run_async(self, fn: Callable[..., T], *args: Any) -> T:
+        """Like ``run`` but awaits the job without holding a threadpool thread."""
+        fut = self.submit(fn, *args)
+        try:
+            return await asyncio.wait_for(asyncio.wrap_future(fut), self.timeout)
+        except TimeoutError as err:
+            self._timed_out(fut)
+            raise PoolSaturated("password hashing timed out") from err
+
+    def stop(self) -> None:
+        with self._lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            executor.shutdown(wait=True, cancel_futures=True)
+
+    def _timed_out(self, fut: Future) -> None:
+        fut.cancel()  # frees the slot if the job never started
+        with self._lock:
+            self._timeouts += 1
+
+    def _release(self, fut: Future) -> None:
+        with self._lock:
+            self._in_flight -= 1
+        self._slots.release()
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "workers": self.workers,
+                "max_pending": self.max_pending,
+                "in_flight": self._in_flight,
+                "rejected": self._rejected,
+                "timeouts": self._timeouts,
+                "hash_seconds": hash_seconds.snapshot(),
+                "queue_wait_seconds": hash_queue_wait.snapshot(),
+            }
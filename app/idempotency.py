@@ -0,0 +1,399 @@
+"""``Idempotency-Key`` support for retried writes (``IDEMPOTENCY_ROUTES``, POST only).
+
+A client that retries after a timeout sends the same key again:
+
+* while the first request still runs, the retry waits for it (single-flight) for up to
+  ``IDEMPOTENCY_WAIT_S``, then gets ``409`` with ``Retry-After``
+* once it has completed, its response is replayed (``Idempotent-Replayed: true``)
+  for ``IDEMPOTENCY_TTL_S`` without running the handler again
+* the same key with a different method, path or body is a client error (``422``)
+
+Keys are scoped to the bearer token's subject; requests without a valid token pass
+through (the handlers answer 401). Only responses below 400 are kept: after an error
+the key is released and the retry runs normally. The ``memory`` store is per worker and
+bounded by ``IDEMPOTENCY_MAX_KEYS``; the ``db`` store (``idempotency_keys``) is shared
+by all workers, and ``python -m app.maintenance idempotency`` purges its expired keys.
+"""
+
+import asyncio
+import hashlib
+import math
+import time
+from collections import Counter
+from dataclasses import dataclass, field
+from datetime import UTC, datetime, timedelta
+from enum import Enum
+from typing import Any, Protocol
+
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy import Connection, delete, select, update
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+from .admission import AdmissionController
+from .cache import LRUCache
+from .config import settings
+from .db import get_engine
+
+HEADER = b"idempotency-key"
+MAX_KEY_LENGTH = 255
+# per-connection or per-response headers that must not be replayed
+_NOT_STORED = frozenset({b"set-cookie", b"date", b"server", b"server-timing"})
+_K = models.IdempotencyKey
+
+
+class Outcome(Enum):
+    RUN = "run"  # the caller holds the key and executes the request
+    REPLAY = "replay"  # completed before: send the stored response
+    BUSY = "busy"  # another request with this key is running
+    MISMATCH = "mismatch"  # the key was used for a different request
+
+
+@dataclass(frozen=True, slots=True)
+class StoredResponse:
+    status: int
+    headers: list[tuple[bytes, bytes]]
+    body: bytes
+
+
+class Store(Protocol):
+    """Where keys are claimed and completed responses kept (all calls on the event loop)."""
+
+    async def acquire(self, key: str, fingerprint: str) -> tuple[Outcome, StoredResponse | None]:
+        """Claim ``key`` for this request, or report what holds it."""
+        ...
+
+    async def wait(self, key: str, timeout: float) -> None:
+        """Return when ``key`` may have been completed or released, or after ``timeout``."""
+        ...
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None: ...
+
+    async def release(self, key: str, fingerprint: str) -> None: ...
+
+    def stats(self) -> dict[str, Any]: ...
+
+
+class MemoryStore:
+    """Claims and responses in this worker only: an LRU of completed responses with TTL,
+    plus the requests in flight. Both are bounded by ``max_keys``."""
+
+    def __init__(self, max_keys: int = 10_000, ttl_s: float = 86_400.0):
+        self.max_keys = max(1, max_keys)
+        self._done = LRUCache(self.max_keys, ttl=ttl_s)
+        self._running: dict[str, tuple[str, asyncio.Event]] = {}
+
+    async def acquire(self, key: str, fingerprint: str) -> tuple[Outcome, StoredResponse | None]:
+        done = self._done.get(key)
+        if done is not None:
+            stored_fp, response = done
+            return (
+                (Outcome.REPLAY, response) if stored_fp == fingerprint else (Outcome.MISMATCH, None)
+            )
+        running = self._running.get(key)
+        if running is not None:
+            return (Outcome.BUSY if running[0] == fingerprint else Outcome.MISMATCH), None
+        if len(self._running) >= self.max_keys:
+            # never run a keyed request unguarded; tell the client to retry instead
+            return Outcome.BUSY, None
+        self._running[key] = (fingerprint, asyncio.Event())
+        return Outcome.RUN, None
+
+    async def wait(self, key: str, timeout: float) -> None:
+        running = self._running.get(key)
+        if running is None:
+            await asyncio.sleep(min(timeout, 0.05))  # full: poll for a free slot
+            return
+        try:
+            await asyncio.wait_for(running[1].wait(), timeout)
+        except TimeoutError:
+            pass
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        self._done.set(key, (fingerprint, response))
+        await self.release(key, fingerprint)
+
+    async def release(self, key: str, fingerprint: str) -> None:
+        running = self._running.pop(key, None)
+        if running is not None:
+            running[1].set()
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "memory", "running": len(self._running), **self._done.stats()}
+
+
+class DBStore:
+    """Claims and responses in ``idempotency_keys``, shared by every worker.
+
+    A claim is a row with a NULL status that expires after ``lock_timeout_s``, so a
+    worker that dies mid-request does not hold the key forever. Waiters poll the row.
+    """
+
+    POLL_S = 0.05
+
+    def __init__(self, ttl_s: float = 86_400.0, lock_timeout_s: float = 60.0):
+        self.ttl_s = ttl_s
+        self.lock_timeout_s = lock_timeout_s
+
+    @staticmethod
+    def _now() -> datetime:
+        return datetime.now(UTC)
+
+    def _acquire(self, key: str, fingerprint: str) -> tuple[Outcome, StoredResponse | None]:
+        now = self._now()
+        claim = {
+            "fingerprint": fingerprint,
+            "status": None,
+            "headers": None,
+            "body": None,
+            "created_at": now,
+            "expires_at": now + timedelta(seconds=self.lock_timeout_s),
+        }
+        stmt = pg_insert(_K).values(key=key, **claim)
+        # an expired row (stale claim or old response) is taken over in the same statement
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[_K.key], set_=claim, where=_K.expires_at < now
+        ).returning(_K.key)
+        with get_engine().begin() as conn:
+            if conn.scalar(stmt) is not None:
+                return Outcome.RUN, None
+            row = conn.execute(
+                select(_K.fingerprint, _K.status, _K.headers, _K.body).where(_K.key == key)
+            ).first()
+        if row is None:  # purged in between
+            return self._acquire(key, fingerprint)
+        if row.fingerprint != fingerprint:
+            return Outcome.MISMATCH, None
+        if row.status is None:
+            return Outcome.BUSY, None
+        headers = [(k.encode("latin-1"), v.encode("latin-1")) for k, v in row.headers]
+        return Outcome.REPLAY, StoredResponse(row.status, headers, row.body)
+
+    async def acquire(self, key: str, fingerprint: str) -> tuple[Outcome, StoredResponse | None]:
+        return await run_in_threadpool(self._acquire, key, fingerprint)
+
+    async def wait(self, key: str, timeout: float) -> None:
+        await asyncio.sleep(min(timeout, self.POLL_S))
+
+    def _complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        with get_engine().begin() as conn:
+            conn.execute(
+                update(_K)
+                .where(_K.key == key, _K.fingerprint == fingerprint, _K.status.is_(None))
+                .values(
+                    status=response.status,
+                    headers=[
+                        [k.decode("latin-1"), v.decode("latin-1")] for k, v in response.headers
+                    ],
+                    body=response.body,
+                    expires_at=self._now() + timedelta(seconds=self.ttl_s),
+                )
+            )
+
+    async def complete(self, key: str, fingerprint: str, response: StoredResponse) -> None:
+        await run_in_threadpool(self._complete, key, fingerprint, response)
+
+    def _release(self, key: str, fingerprint: str) -> None:
+        with get_engine().begin() as conn:
+            conn.execute(
+                delete(_K).where(_K.key == key, _K.fingerprint == fingerprint, _K.status.is_(None))
+            )
+
+    async def release(self, key: str, fingerprint: str) -> None:
+        await run_in_threadpool(self._release, key, fingerprint)
+
+    def stats(self) -> dict[str, Any]:
+        return {"backend": "db"}
+
+
+def purge_expired(conn: Connection) -> int:
+    """Delete expired keys (completed and abandoned claims); returns how many."""
+    return conn.execute(delete(_K).where(_K.expires_at < datetime.now(UTC))).rowcount
+
+
+@dataclass(slots=True)
+class IdempotencyGuard:
+    """Configuration and counters shared by the middleware and ``/health/idempotency``."""
+
+    store: Store
+    routes: frozenset[str]
+    wait_s: float = 10.0
+    max_body_bytes: int = 1 << 20  # larger responses are not kept
+    max_request_bytes: int = 16 * 1024 * 1024  # larger requests get 413
+    counts: Counter[str] = field(default_factory=Counter)
+
+    def stats(self) -> dict[str, Any]:
+        return {**self.store.stats(), **self.counts}
+
+
+def build_guard() -> IdempotencyGuard:
+    """An IdempotencyGuard configured from Settings."""
+    store: Store
+    if settings.idempotency_backend == "db":
+        store = DBStore(settings.idempotency_ttl_s, settings.idempotency_lock_timeout_s)
+    else:
+        store = MemoryStore(settings.idempotency_max_keys, settings.idempotency_ttl_s)
+    return IdempotencyGuard(
+        store,
+        frozenset(settings.idempotency_routes),
+        settings.idempotency_wait_s,
+        settings.idempotency_max_body_bytes,
+        settings.idempotency_max_request_bytes,
+    )
+
+
+def _json(
+    status: int, detail: str, extra: list[tuple[bytes, bytes]] | None = None
+) -> tuple[int, list[tuple[bytes, bytes]], bytes]:
+    body = f'{{"detail":"{detail}"}}'.encode()
+    return status, [(b"content-type", b"application/json"), *(extra or [])], body
+
+
+class IdempotencyMiddleware:
+    """Deduplicates keyed POSTs to ``guard.routes``.
+
+    Plain ASGI like AdmissionMiddleware and outside it, so replays and waiting
+    duplicates take no admission slot. The request body is read up front (it is part
+    of the fingerprint), up to ``guard.max_request_bytes``, and handed to the app
+    unchanged.
+    """
+
+    def __init__(self, app, guard: IdempotencyGuard):
+        self.app = app
+        self.guard = guard
+
+    async def __call__(self, scope, receive, send):
+        if (
+            scope["type"] != "http"
+            or scope["method"] != "POST"
+            or scope["path"] not in self.guard.routes
+        ):
+            await self.app(scope, receive, send)
+            return
+        raw_key = next((v for k, v in scope["headers"] if k == HEADER), None)
+        subject = AdmissionController.subject(scope)
+        if raw_key is None or not subject.startswith("sub:"):
+            await self.app(scope, receive, send)
+            return
+        if not raw_key or len(raw_key) > MAX_KEY_LENGTH:
+            await self._send(
+                send, *_json(400, f"Idempotency-Key must be 1-{MAX_KEY_LENGTH} characters")
+            )
+            return
+
+        limit = self.guard.max_request_bytes
+        try:
+            body = await _read_body(scope, receive, limit)
+        except BodyTooLarge:
+            self.guard.counts["too_large"] += 1
+            await self._send(send, *_json(413, f"Request body over {limit} bytes"))
+            return
+        if body is None:  # the client went away
+            return
+        fingerprint = hashlib.sha256(
+            b"\0".join(
+                (scope["method"].encode(), scope["path"].encode(), scope["query_string"], body)
+            )
+        ).hexdigest()
+        # fixed length however long the subject (an email) and the key are
+        key = hashlib.sha256(subject.encode() + b"\0" + raw_key).hexdigest()
+
+        guard, store = self.guard, self.guard.store
+        deadline = time.monotonic() + guard.wait_s
+        waited = False
+        while True:
+            outcome, stored = await store.acquire(key, fingerprint)
+            if outcome is Outcome.RUN:
+                break
+            if outcome is Outcome.REPLAY:
+                guard.counts["replayed_after_wait" if waited else "replayed"] += 1
+                headers = [*stored.headers, (b"idempotent-replayed", b"true")]
+                await self._send(send, stored.status, headers, stored.body)
+                return
+            if outcome is Outcome.MISMATCH:
+                guard.counts["mismatched"] += 1
+                detail = "Idempotency-Key was already used for a different request"
+                await self._send(send, *_json(422, detail))
+                return
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                guard.counts["conflicts"] += 1
+                retry = str(max(1, math.ceil(guard.wait_s))).encode()
+                detail = "A request with this Idempotency-Key is still in progress"
+                await self._send(send, *_json(409, detail, [(b"retry-after", retry)]))
+                return
+            waited = True
+            await store.wait(key, remaining)
+
+        guard.counts["executed"] += 1
+        await self._run(scope, body, receive, send, key, fingerprint)
+
+    async def _run(self, scope, body: bytes, receive, send, key: str, fingerprint: str) -> None:
+        start: dict | None = None
+        chunks: list[bytes] = []
+        size = 0
+
+        replayed = False
+
+        async def receive_body():
+            # the buffered body once, then the real channel (http.disconnect)
+            nonlocal replayed
+            if replayed:
+                return await receive()
+            replayed = True
+            return {"type": "http.request", "body": body, "more_body": False}
+
+        async def send_and_keep(message):
+            nonlocal start, size
+            if message["type"] == "http.response.start":
+                start = message
+            elif message["type"] == "http.response.body" and size <= self.guard.max_body_bytes:
+                chunk = message.get("body", b"")
+                size += len(chunk)
+                chunks.append(chunk)
+            await send(message)
+
+        completed = False
+        try:
+            await self.app(scope, receive_body, send_and_keep)
+            if start is not None and start["status"] < 400 and size <= self.guard.max_body_bytes:
+                headers = [
+                    (k, v) for k, v in start.get("headers", []) if k.lower() not in _NOT_STORED
+                ]
+                response = StoredResponse(start["status"], headers, b"".join(chunks))
+                await self.guard.store.complete(key, fingerprint, response)
+                completed = True
+        finally:
+            if not completed:
+                # errors (and responses too large to keep) are not replayed: the next
+                # request with this key runs again
+                await self.guard.store.release(key, fingerprint)
+
+    @staticmethod
+    async def _send(send, status: int, headers: list[tuple[bytes, bytes]], body: bytes) -> None:
+        await send({"type": "http.response.start", "status": status, "headers": headers})
+        await send({"type": "http.response.body", "body": body})
+
+
+class BodyTooLarge(Exception):
+    pass
+
+
+async def _read_body(scope, receive, limit: int) -> bytes | None:
+    """The whole request body, or None if the client disconnected first."""
+    length = next((v for k, v in scope["headers"] if k == b"content-length"), b"")
+    if length.isdigit() and int(length) > limit:
+        raise BodyTooLarge  # before reading any of it
+    chunks = []
+    size = 0
+    while True:
+        message = await receive()
+        if message["type"] != "http.request":
+            return None
+        chunk = message.get("body", b"")
+        size += len(chunk)
+        if size > limit:
+            raise BodyTooLarge
+        chunks.append(chunk)
+        if not message.get("more_body", False):
+            return b"".join(chunks)
@@ -1,17 +1,89 @@
-from fastapi import FastAPI
+import math
+from contextlib import asynccontextmanager
+
+from fastapi import Depends, FastAPI, Request
+from fastapi.concurrency import run_in_threadpool
+from fastapi.encoders import jsonable_encoder
+from fastapi.exception_handlers import request_validation_exception_handler
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.responses import PlainTextResponse
+
+from .admission import AdmissionMiddleware, build_controller
+from .config import settings
+from .db import dispose_async_engine, pool_stats
+from .idempotency import IdempotencyMiddleware, build_guard
+from .metrics import render_prometheus
+from .replicas import ReadYourWritesMiddleware, replicas
+from .security import get_current_user, hash_pool
+from .tracing import TimingMiddleware
+
+# routers (and what they import: the ML stack for "ml") load only when enabled
+ROUTERS_PACKAGE = f"{__package__}.routers" + (".aio" if settings.async_mode else "")
+ML_ENABLED = "ml" in settings.enabled_routers
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if ML_ENABLED:
+        from .model import registry as model_registry
+        from .routers import ml
 
-from .routers import auth, items, ml
+        # load and warm up models before the first request instead of on it
+        await run_in_threadpool(model_registry.preload, settings.model_preload)
+        model_registry.watch(settings.model_watch_interval_s)
+    replicas.watch()
+    yield
+    replicas.stop()
+    if ML_ENABLED:
+        model_registry.stop()
+        ml.batcher.stop()
+        ml.prediction_log.stop()
+    hash_pool.stop()
+    await replicas.dispose()
+    await dispose_async_engine()
 
-app = FastAPI(title="Quick API (Prod-Ready Starter)")
 
+app = FastAPI(title="Quick API (Prod-Ready Starter)", lifespan=lifespan)
+
+admission = build_controller()
+if settings.admission_enabled or settings.rate_limit_per_s > 0:
+    # innermost: requests are shed before any handler (or threadpool slot) is spent
+    app.add_middleware(AdmissionMiddleware, controller=admission)
+idempotency = build_guard()
+if settings.idempotency_enabled:
+    # outside admission: replays and waiting duplicates hold no slot
+    app.add_middleware(IdempotencyMiddleware, guard=idempotency)
+if replicas:
+    app.add_middleware(ReadYourWritesMiddleware, sticky_s=settings.db_replica_sticky_s)
 app.add_middleware(
     CORSMiddleware,
     allow_origins=["http://localhost:3000", "http://localhost:8501"],
     allow_credentials=True,
     allow_methods=["*"],
     allow_headers=["*"],
+    expose_headers=["X-Next-Cursor"],
 )
+if settings.tracing_enabled:
+    # added last so it wraps CORS too and sees the whole request
+    app.add_middleware(TimingMiddleware, server_timing=settings.server_timing)
+
+
+def _finite(v):
+    if isinstance(v, float) and not math.isfinite(v):
+        return str(v)
+    if isinstance(v, dict):
+        return {k: _finite(x) for k, x in v.items()}
+    if isinstance(v, list | tuple):
+        return [_finite(x) for x in v]
+    return v
+
+
+@app.exception_handler(RequestValidationError)
+async def validation_error(request: Request, exc: RequestValidationError):
+    # NaN/Infinity inputs would otherwise break JSON rendering of the 422 itself
+    errors = _finite(jsonable_encoder(exc.errors()))
+    return await request_validation_exception_handler(request, RequestValidationError(errors))
 
 
 @app.get("/health")
@@ -19,7 +91,31 @@ def health():
     return {"status": "ok"}
 
 
-app.include_router(auth.router)
-app.include_router(auth.router)
-app.include_router(items.router)
-app.include_router(ml.router)
+@app.get("/metrics", include_in_schema=False)
+def metrics():
+    return PlainTextResponse(render_prometheus(), media_type="text/plain; version=0.0.4")
+
+
+@app.get("/health/db")
+def health_db(current_user=Depends(get_current_user)):
+    stats = pool_stats()
+    if replicas:
+        stats["replicas"] = replicas.stats()
+    return stats
+
+
+@app.get("/health/admission")
+def health_admission(current_user=Depends(get_current_user)):
+    return admission.stats()
+
+
+@app.get("/health/idempotency")
+def health_idempotency(current_user=Depends(get_current_user)):
+    return idempotency.stats()
+
+
+for name in dict.fromkeys(settings.enabled_routers):
+    # __import__ rather than importlib.import_module: only the former shows up in
+    # `python -X importtime` (and so in `python -m app.startup`)
+    module = __import__(f"{ROUTERS_PACKAGE}.{name}", fromlist=["router"])
+    app.include_router(module.router)
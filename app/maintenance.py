@@ -0,0 +1,237 @@
+"""Maintenance for the partitioned ``predictions`` table; run it daily (cron, k8s CronJob):
+
+    python -m app.maintenance            # partitions, rollup, expire, idempotency
+    python -m app.maintenance rollup --since 2026-01-01
+
+``partitions`` creates the monthly partitions up to PREDICTIONS_PARTITIONS_AHEAD months
+ahead (moving any matching rows out of ``predictions_default``). ``rollup`` aggregates
+every finished UTC day not yet rolled up into ``prediction_daily_rollups``. ``expire``
+drops partitions older than PREDICTIONS_RETENTION_DAYS, after copying them to
+PREDICTIONS_ARCHIVE_DIR as gzipped CSV if that is set; partitions whose days are not
+rolled up yet are kept. ``idempotency`` deletes expired rows of ``idempotency_keys``
+(IDEMPOTENCY_BACKEND=db).
+"""
+
+import argparse
+import gzip
+import logging
+import re
+from datetime import UTC, date, datetime, timedelta
+from pathlib import Path
+
+from sqlalchemy import Connection, delete, func, insert, literal, select, text
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+
+from . import models
+from .config import settings
+from .db import get_engine
+from .idempotency import purge_expired
+from .utils import utc_midnight
+
+log = logging.getLogger(__name__)
+
+PARENT = "predictions"
+DEFAULT = "predictions_default"
+_PARTITION = re.compile(r"^predictions_p(\d{4})(\d{2})$")
+_P = models.Prediction
+_R = models.PredictionDailyRollup
+_S = models.RollupState
+ROLLUP = _R.__tablename__
+
+
+def month_start(d: date) -> date:
+    return d.replace(day=1)
+
+
+def next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def partition_name(month: date) -> str:
+    return f"predictions_p{month:%Y%m}"
+
+
+def partitions(conn: Connection) -> dict[str, date]:
+    """Monthly partitions of ``predictions``: name -> first day of the month."""
+    names = conn.scalars(
+        text(
+            "SELECT c.relname FROM pg_inherits i JOIN pg_class c ON c.oid = i.inhrelid "
+            "WHERE i.inhparent = CAST(:parent AS regclass)"
+        ),
+        {"parent": PARENT},
+    )
+    found = {}
+    for name in names:
+        m = _PARTITION.match(name)
+        if m:
+            found[name] = date(int(m[1]), int(m[2]), 1)
+    return found
+
+
+def create_partition(conn: Connection, month: date) -> bool:
+    """Attach the partition for ``month``; False if it already exists."""
+    name = partition_name(month)
+    if name in partitions(conn):
+        return False
+    lo, hi = utc_midnight(month), utc_midnight(next_month(month))
+    # a PARTITION OF would fail if predictions_default already holds rows of this month:
+    # create the table standalone, move those rows into it, then attach it
+    conn.execute(text(f"CREATE TABLE {name} (LIKE {PARENT} INCLUDING DEFAULTS)"))
+    moved = conn.execute(
+        text(
+            f"WITH moved AS (DELETE FROM {DEFAULT} WHERE created_at >= :lo AND created_at < :hi "
+            f"RETURNING *) INSERT INTO {name} SELECT * FROM moved"
+        ),
+        {"lo": lo, "hi": hi},
+    ).rowcount
+    conn.execute(
+        text(
+            f"ALTER TABLE {PARENT} ATTACH PARTITION {name} "
+            f"FOR VALUES FROM ('{lo.isoformat()}') TO ('{hi.isoformat()}')"
+        )
+    )
+    log.info("created partition %s (%d rows moved from %s)", name, moved, DEFAULT)
+    return True
+
+
+def ensure_partitions(conn: Connection, today: date, ahead: int) -> list[str]:
+    """Create the partitions for ``today``'s month and ``ahead`` months after it."""
+    created, month = [], month_start(today)
+    for _ in range(ahead + 1):
+        if create_partition(conn, month):
+            created.append(partition_name(month))
+        month = next_month(month)
+    return created
+
+
+def rolled_up_to(conn: Connection) -> date | None:
+    return conn.scalar(select(_S.rolled_up_to).where(_S.name == ROLLUP))
+
+
+def refresh_rollups(conn: Connection, today: date, since: date | None = None) -> tuple[date, date]:
+    """Recompute the rollups for the days [since, today) and advance the watermark.
+
+    ``since`` defaults to the current watermark (or the oldest prediction), so a daily run
+    only aggregates yesterday; pass it to rebuild older days.
+    """
+    if since is None:
+        since = rolled_up_to(conn)
+    if since is None:
+        oldest = conn.scalar(select(func.min(_P.created_at)))
+        since = oldest.astimezone(UTC).date() if oldest else today
+    if since < today:
+        bucket = func.least(
+            func.width_bucket(_P.pred_confidence, 0.0, 1.0, models.ROLLUP_BUCKETS),
+            models.ROLLUP_BUCKETS,
+        )
+        day = func.date(func.timezone("UTC", _P.created_at))
+        aggregate = (
+            select(
+                _P.user_id,
+                day,
+                _P.pred_label,
+                bucket,
+                func.count(),
+                func.sum(_P.pred_confidence),
+            )
+            .where(_P.created_at >= utc_midnight(since), _P.created_at < utc_midnight(today))
+            .group_by(_P.user_id, day, _P.pred_label, bucket)
+        )
+        conn.execute(delete(_R).where(_R.day >= since, _R.day < today))
+        conn.execute(
+            insert(_R).from_select(
+                ["user_id", "day", "pred_label", "bucket", "count", "confidence_sum"], aggregate
+            )
+        )
+        log.info("rolled up predictions for %s .. %s", since, today - timedelta(days=1))
+    watermark = max(today, rolled_up_to(conn) or today)
+    upsert = pg_insert(_S).values(name=literal(ROLLUP), rolled_up_to=watermark)
+    conn.execute(
+        upsert.on_conflict_do_update(index_elements=[_S.name], set_={"rolled_up_to": watermark})
+    )
+    return since, today
+
+
+def _archive(conn: Connection, query: str, path: Path) -> None:
+    cursor = conn.connection.driver_connection.cursor()
+    try:
+        with gzip.open(path, "wb") as f:
+            cursor.copy_expert(f"COPY ({query}) TO STDOUT WITH (FORMAT csv, HEADER)", f)
+    finally:
+        cursor.close()
+
+
+def expire_partitions(
+    conn: Connection, today: date, retention_days: int, archive_dir: str | None = None
+) -> list[str]:
+    """Drop (after archiving, with ``archive_dir``) partitions older than the retention.
+
+    A partition goes once its whole month is older than ``retention_days``; expired rows
+    left in ``predictions_default`` are deleted the same way.
+    """
+    if retention_days <= 0:
+        return []
+    cutoff = today - timedelta(days=retention_days)
+    watermark = rolled_up_to(conn)
+    if watermark is not None:
+        # never drop raw rows the rollups have not seen
+        cutoff = min(cutoff, watermark)
+    if archive_dir:
+        Path(archive_dir).mkdir(parents=True, exist_ok=True)
+    dropped = []
+    for name, month in sorted(partitions(conn).items(), key=lambda kv: kv[1]):
+        if next_month(month) > cutoff:
+            continue
+        if archive_dir:
+            _archive(conn, f"SELECT * FROM {name}", Path(archive_dir) / f"{name}.csv.gz")
+        conn.execute(text(f"ALTER TABLE {PARENT} DETACH PARTITION {name}"))
+        conn.execute(text(f"DROP TABLE {name}"))
+        dropped.append(name)
+        log.info("dropped expired partition %s", name)
+
+    stale = f"FROM {DEFAULT} WHERE created_at < '{utc_midnight(cutoff).isoformat()}'"
+    if archive_dir and conn.scalar(text(f"SELECT EXISTS (SELECT 1 {stale})")):
+        _archive(conn, f"SELECT * {stale}", Path(archive_dir) / f"{DEFAULT}-{cutoff}.csv.gz")
+    conn.execute(text(f"DELETE {stale}"))
+    return dropped
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.maintenance",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="all",
+        choices=["all", "partitions", "rollup", "expire", "idempotency"],
+    )
+    parser.add_argument("--since", type=date.fromisoformat, help="rollup: rebuild from this day")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s %(message)s")
+
+    today = datetime.now(UTC).date()
+    # one transaction per step: a failed expire does not undo the new partitions
+    if args.command in ("all", "partitions"):
+        with get_engine().begin() as conn:
+            ensure_partitions(conn, today, settings.predictions_partitions_ahead)
+    if args.command in ("all", "rollup"):
+        with get_engine().begin() as conn:
+            refresh_rollups(conn, today, args.since)
+    if args.command in ("all", "expire"):
+        with get_engine().begin() as conn:
+            expire_partitions(
+                conn,
+                today,
+                settings.predictions_retention_days,
+                settings.predictions_archive_dir or None,
+            )
+    if args.command in ("all", "idempotency"):
+        with get_engine().begin() as conn:
+            log.info("purged %d expired idempotency keys", purge_expired(conn))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,93 @@
+import bisect
+import threading
+from collections.abc import Sequence
+from typing import Any
+
+# seconds; suits DB waits, hashing and inference alike
+DEFAULT_BUCKETS = (
+    0.0005,
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+)
+
+
+# every Histogram, in creation order; rendered by /metrics
+REGISTRY: list["Histogram"] = []
+
+
+class Histogram:
+    """Thread-safe fixed-bucket histogram (Prometheus semantics: ``le`` upper bounds).
+
+    Histograms sharing a ``name`` but differing in ``labels`` render as one metric family.
+    """
+
+    def __init__(
+        self,
+        name: str,
+        help: str = "",
+        buckets: Sequence[float] = DEFAULT_BUCKETS,
+        labels: dict[str, str] | None = None,
+    ):
+        self.name = name
+        self.help = help
+        self.labels = dict(labels or {})
+        self.buckets = tuple(sorted(buckets))
+        self._counts = [0] * (len(self.buckets) + 1)  # last slot is +Inf
+        self._sum = 0.0
+        self._lock = threading.Lock()
+        REGISTRY.append(self)
+
+    def observe(self, value: float) -> None:
+        i = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            self._counts[i] += 1
+            self._sum += value
+
+    def snapshot(self) -> dict[str, Any]:
+        with self._lock:
+            counts = list(self._counts)
+            total = self._sum
+        cumulative, running = {}, 0
+        for bound, n in zip((*self.buckets, float("inf")), counts, strict=True):
+            running += n
+            cumulative["+Inf" if bound == float("inf") else repr(bound)] = running
+        return {"count": running, "sum": total, "buckets": cumulative}
+
+
+def _label_str(labels: dict[str, str]) -> str:
+    def esc(v: str) -> str:
+        return v.replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+    return ",".join(f'{k}="{esc(v)}"' for k, v in labels.items())
+
+
+def render_prometheus(histograms: Sequence[Histogram] | None = None) -> str:
+    """Prometheus text exposition (format 0.0.4) of ``histograms`` (default: all)."""
+    families: dict[str, list[Histogram]] = {}
+    for h in REGISTRY if histograms is None else histograms:
+        families.setdefault(h.name, []).append(h)
+    lines = []
+    for name, members in families.items():
+        lines.append(f"# HELP {name} {members[0].help}")
+        lines.append(f"# TYPE {name} histogram")
+        for h in members:
+            snap = h.snapshot()
+            base = _label_str(h.labels)
+            sep = "," if base else ""
+            for le, n in snap["buckets"].items():
+                lines.append(f'{name}_bucket{{{base}{sep}le="{le}"}} {n}')
+            suffix = f"{{{base}}}" if base else ""
+            lines.append(f"{name}_sum{suffix} {snap['sum']!r}")
+            lines.append(f"{name}_count{suffix} {snap['count']}")
+    return "\n".join(lines) + "\n"
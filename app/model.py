@@ -1,17 +1,306 @@
+import logging
+import mmap
 import os
+import sys
+import threading
+import time
+from collections.abc import Callable
+from dataclasses import dataclass, field
+from datetime import UTC, datetime
+from pathlib import Path
 from typing import Any
 
-import joblib
+import numpy as np
 
-_MODEL_PATH = os.getenv("MODEL_PATH", "artifacts/iris_clf.joblib")
-_model = None
-_target_names: list[str] | None = None
+from .config import settings
+from .fastpath import compiled_or_original
+from .tracing import span
+
+log = logging.getLogger(__name__)
+
+
+@dataclass(frozen=True, slots=True)
+class ModelBundle:
+    """One loaded artifact; immutable, so a request keeps a consistent view across swaps."""
+
+    version: str
+    path: str
+    model: Any
+    predictor: Any  # what to call predict_proba on: ``model`` or its compiled fast path
+    target_names: list[str]
+    mtime: float
+    size_bytes: int
+    load_seconds: float
+    warmup_seconds: float
+    memory_bytes: int  # approximate heap held by the model's object graph
+    mapped_bytes: int  # arrays memory-mapped from the artifact (shared across workers)
+    loaded_at: datetime = field(default_factory=lambda: datetime.now(UTC))
+
+    def report(self) -> dict[str, Any]:
+        return {
+            "version": self.version,
+            "path": self.path,
+            "compiled": self.predictor is not self.model,
+            "size_bytes": self.size_bytes,
+            "memory_bytes": self.memory_bytes,
+            "mapped_bytes": self.mapped_bytes,
+            "load_seconds": self.load_seconds,
+            "warmup_seconds": self.warmup_seconds,
+            "loaded_at": self.loaded_at.isoformat(),
+        }
+
+
+def memory_footprint(obj: Any) -> tuple[int, int]:
+    """Approximate (heap bytes, memory-mapped bytes) reachable from ``obj``.
+
+    Memory-mapped arrays are backed by the page cache and shared by every process that
+    maps the same file; only their headers count towards the heap figure.
+    """
+    seen: set[int] = set()
+    heap = mapped = 0
+    stack = [obj]
+    while stack:
+        o = stack.pop()
+        if id(o) in seen or isinstance(o, type):
+            continue
+        seen.add(id(o))
+        if isinstance(o, np.ndarray):
+            if isinstance(o, np.memmap) or isinstance(o.base, mmap.mmap):
+                mapped += o.nbytes
+                heap += sys.getsizeof(o)
+                continue
+            heap += sys.getsizeof(o)  # includes the buffer when the array owns it
+            if o.base is not None:
+                stack.append(o.base)
+            if o.dtype == object:
+                stack.extend(o.ravel())
+            continue
+        heap += sys.getsizeof(o)
+        if isinstance(o, dict):
+            stack.extend(o.keys())
+            stack.extend(o.values())
+        elif isinstance(o, list | tuple | set | frozenset):
+            stack.extend(o)
+        elif hasattr(o, "__dict__"):
+            stack.append(vars(o))
+    return heap, mapped
+
+
+def process_memory() -> dict[str, int]:
+    """This process's RSS split into shared and private pages, plus PSS (Linux)."""
+    try:
+        with open("/proc/self/smaps_rollup") as f:
+            fields = {
+                k: int(v.split()[0]) * 1024
+                for k, v in (line.split(":", 1) for line in f if ":" in line)
+                if v.strip().endswith("kB")
+            }
+    except OSError:
+        return {"pid": os.getpid()}
+    return {
+        "pid": os.getpid(),
+        "rss_bytes": fields.get("Rss", 0),
+        "pss_bytes": fields.get("Pss", 0),
+        "shared_bytes": fields.get("Shared_Clean", 0) + fields.get("Shared_Dirty", 0),
+        "private_bytes": fields.get("Private_Clean", 0) + fields.get("Private_Dirty", 0),
+    }
+
+
+def _load_bundle(
+    version: str, path: Path, warmup: bool, mmap_arrays: bool, compiled: bool
+) -> ModelBundle:
+    import joblib  # with scikit-learn, only imported once a model is actually loaded
+
+    stat = path.stat()
+    start = time.perf_counter()
+    with span("model_load"):
+        # read-only maps: workers loading the same file share its pages via the page cache
+        raw = joblib.load(path, mmap_mode="r" if mmap_arrays else None)
+        # checked against predict_proba here; falls back to the model itself
+        predictor = compiled_or_original(raw["model"]) if compiled else raw["model"]
+    loaded = time.perf_counter() - start
+
+    warmup_seconds = 0.0
+    if warmup:
+        # first predict_proba pays for lazy imports and allocations; do it before traffic
+        start = time.perf_counter()
+        n_features = getattr(raw["model"], "n_features_in_", 4)
+        predictor.predict_proba(np.zeros((1, n_features)))
+        warmup_seconds = time.perf_counter() - start
+    heap, mapped = memory_footprint(raw["model"])
+    return ModelBundle(
+        version=version,
+        path=str(path),
+        model=raw["model"],
+        predictor=predictor,
+        target_names=list(raw["target_names"]),
+        mtime=stat.st_mtime,
+        size_bytes=stat.st_size,
+        load_seconds=loaded,
+        warmup_seconds=warmup_seconds,
+        memory_bytes=heap,
+        mapped_bytes=mapped,
+    )
+
+
+class ModelRegistry:
+    """Versioned model bundles from ``directory`` (version = ``<version>.joblib``).
+
+    ``get()`` returns the active bundle; ``load``/``activate`` replace entries by
+    swapping one reference, so in-flight requests finish on the bundle they started
+    with. Loads are serialized by a lock, so concurrent first calls load once.
+    """
+
+    def __init__(
+        self,
+        directory: str | os.PathLike,
+        default: str,
+        warmup: bool = True,
+        mmap_arrays: bool = False,
+        compiled: bool = False,
+    ):
+        self.directory = Path(directory)
+        self.default = default
+        self.warmup = warmup
+        self.mmap_arrays = mmap_arrays
+        self.compiled = compiled
+        self._bundles: dict[str, ModelBundle] = {}
+        self._active: ModelBundle | None = None
+        self._listeners: list[Callable[[ModelBundle], None]] = []
+        self._lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def available(self) -> list[str]:
+        return sorted(p.stem for p in self.directory.glob("*.joblib"))
+
+    def _path(self, version: str) -> Path:
+        if version not in self.available():
+            raise KeyError(version)
+        return self.directory / f"{version}.joblib"
+
+    def get(self, version: str | None = None) -> ModelBundle:
+        if version is None:
+            active = self._active
+            if active is not None:
+                return active
+            with self._lock:
+                if self._active is None:
+                    self._set_active(self._load_locked(self.default))
+                return self._active
+        bundle = self._bundles.get(version)
+        return bundle if bundle is not None else self.load(version)
+
+    def load(self, version: str, activate: bool = False) -> ModelBundle:
+        """(Re)load ``version`` from disk, replacing any loaded copy."""
+        with self._lock:
+            bundle = self._load_locked(version)
+            if activate or (self._active is not None and self._active.version == version):
+                self._set_active(bundle)
+            return bundle
+
+    def activate(self, version: str) -> ModelBundle:
+        with self._lock:
+            bundle = self._bundles.get(version) or self._load_locked(version)
+            self._set_active(bundle)
+            return bundle
+
+    def add_listener(self, fn: Callable[[ModelBundle], None]) -> None:
+        """Call ``fn(bundle)`` whenever the active bundle changes (e.g. to drop caches)."""
+        self._listeners.append(fn)
+
+    def _set_active(self, bundle: ModelBundle) -> None:
+        # caller holds self._lock
+        if bundle is self._active:
+            return
+        self._active = bundle
+        for fn in self._listeners:
+            fn(bundle)
+
+    def unload(self, version: str) -> None:
+        with self._lock:
+            if self._active is not None and self._active.version == version:
+                raise ValueError("cannot unload the active model")
+            self._bundles.pop(version, None)
+
+    def _load_locked(self, version: str) -> ModelBundle:
+        bundle = _load_bundle(
+            version, self._path(version), self.warmup, self.mmap_arrays, self.compiled
+        )
+        self._bundles[version] = bundle
+        log.info(
+            "loaded model %s in %.3fs (+%.3fs warmup, ~%d KiB)",
+            version,
+            bundle.load_seconds,
+            bundle.warmup_seconds,
+            bundle.memory_bytes // 1024,
+        )
+        return bundle
+
+    def preload(self, versions: list[str] | None = None) -> None:
+        """Load (and warm up) the default model plus ``versions``; for app startup."""
+        self.get()
+        for version in versions or []:
+            if version not in self._bundles:
+                self.load(version)
+
+    def check_for_updates(self) -> list[str]:
+        """Reload every loaded bundle whose artifact file changed on disk."""
+        changed = []
+        for version, bundle in list(self._bundles.items()):
+            try:
+                mtime = os.stat(bundle.path).st_mtime
+            except FileNotFoundError:
+                continue
+            if mtime != bundle.mtime:
+                try:
+                    self.load(version)
+                except Exception:
+                    log.exception("reloading model %s failed; keeping the loaded copy", version)
+                    continue
+                changed.append(version)
+        return changed
+
+    def watch(self, interval_s: float) -> None:
+        """Poll artifacts every ``interval_s`` and hot-swap changed ones (all workers do)."""
+        if interval_s <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(
+            target=self._watch, args=(interval_s,), name="model-watch", daemon=True
+        )
+        self._watcher.start()
+
+    def _watch(self, interval_s: float) -> None:
+        while not self._stop.wait(interval_s):
+            self.check_for_updates()
+
+    def stop(self) -> None:
+        self._stop.set()
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.join()
+
+    def report(self) -> dict[str, Any]:
+        active = self._active
+        return {
+            "active": active.version if active else None,
+            "available": self.available(),
+            "loaded": [b.report() for b in self._bundles.values()],
+            "process": process_memory(),
+        }
+
+
+_default = Path(settings.model_path)
+registry = ModelRegistry(
+    _default.parent,
+    _default.stem,
+    warmup=settings.model_warmup,
+    mmap_arrays=settings.model_mmap,
+    compiled=settings.model_compiled,
+)
 
 
 def load_model() -> tuple[Any, list[str]]:
-    global _model, _target_names
-    if _model is None or _target_names is None:
-        bundle = joblib.load(_MODEL_PATH)
-        _model = bundle["model"]
-        _target_names = bundle["target_names"]
-    return _model, _target_names
+    bundle = registry.get()
+    return bundle.model, bundle.target_names
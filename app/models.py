@@ -2,29 +2,49 @@
 from __future__ import annotations
 
 from sqlalchemy import (
+    REAL,
     Column,
+    Date,
     DateTime,
     Float,
     ForeignKey,
+    Index,
     Integer,
+    LargeBinary,
+    SmallInteger,
     String,
     Text,
     UniqueConstraint,
     func,
 )
-from sqlalchemy.dialects.postgresql import JSONB
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
 from sqlalchemy.orm import relationship
 
 from .db import Base
+from .schemas import IrisIn
+
+# order of Prediction.feature_values: the model's input schema
+FEATURES = tuple(IrisIn.model_fields)
 
 
 class Item(Base):
     __tablename__ = "items"
+    __table_args__ = (
+        # substring search (ILIKE '%q%'); needs the pg_trgm extension
+        Index(
+            "ix_items_name_trgm",
+            "name",
+            postgresql_using="gin",
+            postgresql_ops={"name": "gin_trgm_ops"},
+        ),
+    )
 
     id = Column(Integer, primary_key=True, index=True)
     name = Column(String(100), nullable=False, index=True)
     description = Column(Text, nullable=True)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    # incremented by every write; strong ETags are derived from (id, version)
+    version = Column(Integer, server_default="1", nullable=False)
 
 
 class User(Base):
@@ -38,16 +58,89 @@ class User(Base):
 
 
 class Prediction(Base):
+    # range-partitioned by month on created_at (see app.maintenance); the table's
+    # primary key is (id, created_at), id alone stays unique through its sequence
     __tablename__ = "predictions"
+    __table_args__ = (
+        # per-user history, newest first, keyset-paginated on (created_at, id); also
+        # serves the per-day volume aggregate over a time range
+        Index("ix_predictions_user_created", "user_id", "created_at", "id"),
+        # label-filtered history and the label / confidence aggregates, index-only
+        Index(
+            "ix_predictions_user_label_created",
+            "user_id",
+            "pred_label",
+            "created_at",
+            "id",
+            postgresql_include=["pred_confidence"],
+        ),
+    )
 
     id = Column(Integer, primary_key=True)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    features = Column(JSONB, nullable=False)
+    # one float4 per FEATURES entry (16 bytes + array header); ``features`` is the JSONB
+    # it replaced, still read for rows logged by older app versions
+    feature_values = Column(ARRAY(REAL), nullable=True)
+    features = Column(JSONB, nullable=True)
     pred_label = Column(String(100), nullable=False)
     pred_confidence = Column(Float, nullable=False)
     created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
 
     user = relationship("User", back_populates="predictions")
 
+    @property
+    def feature_map(self) -> dict[str, float]:
+        if self.feature_values is None:
+            return self.features
+        import numpy as np  # only here, so importing the models never loads NumPy
+
+        # shortest float4 repr, so 5.1 reads back as 5.1 whichever driver widened it
+        return {
+            k: float(str(np.float32(v))) for k, v in zip(FEATURES, self.feature_values, strict=True)
+        }
+
 
 User.predictions = relationship("Prediction", back_populates="user")
+
+# confidence histogram resolution of the rollups: they can serve any bucket count that
+# divides it
+ROLLUP_BUCKETS = 20
+
+
+class PredictionDailyRollup(Base):
+    """Per user, UTC day, label and confidence bucket: prediction count and confidence sum."""
+
+    __tablename__ = "prediction_daily_rollups"
+
+    user_id = Column(Integer, ForeignKey("users.id"), primary_key=True)
+    day = Column(Date, primary_key=True)
+    pred_label = Column(String(100), primary_key=True)
+    bucket = Column(SmallInteger, primary_key=True)  # 1..ROLLUP_BUCKETS
+    count = Column(Integer, nullable=False)
+    confidence_sum = Column(Float, nullable=False)
+
+
+class RollupState(Base):
+    __tablename__ = "prediction_rollup_state"
+
+    name = Column(String(64), primary_key=True)
+    # every UTC day before this one is in the rollups
+    rolled_up_to = Column(Date, nullable=False)
+
+
+class IdempotencyKey(Base):
+    """A request seen with an ``Idempotency-Key`` header (app.idempotency, ``db`` backend).
+
+    ``status`` is NULL while the first request is still running; ``expires_at`` is then
+    its lock deadline (after it the key may be taken over), afterwards the replay TTL.
+    """
+
+    __tablename__ = "idempotency_keys"
+
+    key = Column(String(64), primary_key=True)  # sha256 of subject and Idempotency-Key
+    fingerprint = Column(String(64), nullable=False)  # sha256 of method, path and body
+    status = Column(SmallInteger, nullable=True)
+    headers = Column(JSONB, nullable=True)
+    body = Column(LargeBinary, nullable=True)
+    created_at = Column(DateTime(timezone=True), server_default=func.now(), nullable=False)
+    expires_at = Column(DateTime(timezone=True), nullable=False, index=True)
@@ -0,0 +1,145 @@
+import logging
+import queue
+import threading
+import time
+from collections.abc import Callable
+from typing import Any, Literal
+
+from sqlalchemy import insert
+from sqlalchemy.orm import Session
+
+from . import models
+
+log = logging.getLogger(__name__)
+
+_STOP = object()
+
+
+class _Flush:
+    def __init__(self):
+        self.done = threading.Event()
+
+
+class PredictionLogWriter:
+    """Writes prediction rows to ``predictions`` in bulk from a background thread.
+
+    Requests hand over plain dicts via ``submit``; the worker writes them with one
+    multi-row INSERT whenever ``flush_size`` rows are waiting or ``flush_interval_ms``
+    has passed since the first one arrived. When the buffer is full the ``block``
+    policy waits up to ``block_timeout_ms`` for room (backpressure) before dropping;
+    ``drop`` discards immediately.
+    """
+
+    def __init__(
+        self,
+        session_factory: Callable[[], Session],
+        max_pending: int = 10_000,
+        flush_size: int = 500,
+        flush_interval_ms: int = 200,
+        policy: Literal["block", "drop"] = "block",
+        block_timeout_ms: int = 100,
+    ):
+        self._session_factory = session_factory
+        self._queue: queue.Queue = queue.Queue(maxsize=max(1, max_pending))
+        self.flush_size = max(1, flush_size)
+        self.flush_interval = flush_interval_ms / 1000
+        self.policy = policy
+        self.block_timeout = block_timeout_ms / 1000
+        self._lock = threading.Lock()
+        self._thread: threading.Thread | None = None
+        self._closed = False
+        self._written = 0
+        self._dropped = 0
+        self._failed = 0
+        self._flushes = 0
+
+    def submit(self, record: dict[str, Any]) -> bool:
+        """Queue one row; returns False if it was dropped."""
+        with self._lock:
+            if self._closed:
+                self._dropped += 1
+                return False
+            self._ensure_started()
+        try:
+            if self.policy == "block":
+                self._queue.put(record, timeout=self.block_timeout)
+            else:
+                self._queue.put_nowait(record)
+        except queue.Full:
+            with self._lock:
+                self._dropped += 1
+            return False
+        return True
+
+    def flush(self, timeout: float | None = 10.0) -> bool:
+        """Block until every row submitted before this call has been written."""
+        with self._lock:
+            if self._thread is None:
+                return True
+        marker = _Flush()
+        self._queue.put(marker)
+        return marker.done.wait(timeout)
+
+    def stop(self, timeout: float | None = 10.0) -> None:
+        """Stop accepting rows, write out what is buffered and join the worker."""
+        with self._lock:
+            self._closed = True
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            self._queue.put(_STOP)
+            thread.join(timeout)
+
+    def _ensure_started(self) -> None:
+        # caller holds self._lock
+        if self._thread is None or not self._thread.is_alive():
+            self._thread = threading.Thread(target=self._run, name="prediction-log", daemon=True)
+            self._thread.start()
+
+    def _run(self) -> None:
+        batch: list[dict[str, Any]] = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+            if isinstance(item, dict):
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+                if len(batch) < self.flush_size:
+                    continue
+            self._write(batch)
+            batch, deadline = [], None
+            if isinstance(item, _Flush):
+                item.done.set()
+            elif item is _STOP:
+                return
+
+    def _write(self, batch: list[dict[str, Any]]) -> None:
+        if not batch:
+            return
+        try:
+            with self._session_factory() as db:
+                db.execute(insert(models.Prediction), batch)
+                db.commit()
+        except Exception:
+            log.exception("dropping %d prediction log rows after a failed write", len(batch))
+            with self._lock:
+                self._failed += len(batch)
+            return
+        with self._lock:
+            self._written += len(batch)
+            self._flushes += 1
+
+    def stats(self) -> dict[str, Any]:
+        with self._lock:
+            return {
+                "pending": self._queue.qsize(),
+                "written": self._written,
+                "dropped": self._dropped,
+                "failed": self._failed,
+                "flushes": self._flushes,
+                "policy": self.policy,
+            }
@@ -0,0 +1,288 @@
+"""Read/write splitting: read-only handlers take their session from ``get_read_db``.
+
+With ``DB_REPLICA_URLS`` set, a read session goes to one of the replicas, round-robin
+over the healthy ones. It goes to the primary instead when:
+
+* the client wrote within ``DB_REPLICA_STICKY_S`` (read-your-writes): every successful
+  POST / PUT / PATCH / DELETE sets a cookie saying so, which works across workers
+* no replica is healthy. A background check every ``DB_REPLICA_CHECK_INTERVAL_S``
+  marks a replica down when it is unreachable or more than ``DB_REPLICA_MAX_LAG_S``
+  behind the primary
+* connecting to the chosen replica fails. The replica is then skipped until its next
+  check, and the next one (or the primary) serves the read
+
+Without replicas ``get_read_db`` is ``get_db``.
+"""
+
+import itertools
+import logging
+import math
+import threading
+import time
+from dataclasses import dataclass
+from typing import Any
+
+from fastapi import Request
+from sqlalchemy import text
+from sqlalchemy.engine import Engine, make_url
+from sqlalchemy.exc import DBAPIError
+from sqlalchemy.ext.asyncio import AsyncEngine, AsyncSession
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .db import SessionLocal, _pool_status, build_async_engine, build_engine, get_async_sessionmaker
+
+log = logging.getLogger(__name__)
+
+STICKY_COOKIE = "qa_primary_until"
+SAFE_METHODS = frozenset({"GET", "HEAD", "OPTIONS"})
+
+# seconds of replay lag; 0 on a caught-up standby (an idle primary would otherwise look
+# ever more behind) and on a server that is not a standby at all
+LAG_SQL = text(
+    "SELECT COALESCE(CASE WHEN NOT pg_is_in_recovery()"
+    " OR pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0"
+    " ELSE extract(epoch FROM now() - pg_last_xact_replay_timestamp()) END, 0)"
+)
+
+
+@dataclass(slots=True)
+class Replica:
+    url: str
+    name: str  # URL without the password, for stats and logs
+    down_until: float = 0.0  # time.monotonic(); skipped until then
+    lag_s: float | None = None
+    error: str | None = None
+    reads: int = 0
+    failures: int = 0
+
+
+class ReplicaSet:
+    """Replica engines (built on first use) and their health, shared by a worker's requests."""
+
+    def __init__(
+        self,
+        urls: list[str],
+        check_interval_s: float = 5.0,
+        max_lag_s: float = 5.0,
+        connect_timeout_s: int = 2,
+    ):
+        self.replicas = [
+            Replica(url, make_url(url).render_as_string(hide_password=True)) for url in urls
+        ]
+        self.check_interval_s = check_interval_s
+        self.max_lag_s = max_lag_s
+        self.connect_timeout_s = connect_timeout_s
+        self.primary_fallbacks = 0  # reads that wanted a replica but found none usable
+        self.sticky_reads = 0
+        self._engines: dict[str, Engine] = {}
+        self._async_engines: dict[str, AsyncEngine] = {}
+        self._next = itertools.count()
+        self._lock = threading.Lock()
+        self._watcher: threading.Thread | None = None
+        self._stop = threading.Event()
+
+    def __bool__(self) -> bool:
+        return bool(self.replicas)
+
+    def engine(self, replica: Replica) -> Engine:
+        with self._lock:
+            if replica.url not in self._engines:
+                self._engines[replica.url] = build_engine(replica.url, self.connect_timeout_s)
+            return self._engines[replica.url]
+
+    def async_engine(self, replica: Replica) -> AsyncEngine:
+        with self._lock:
+            if replica.url not in self._async_engines:
+                eng = build_async_engine(replica.url, self.connect_timeout_s)
+                self._async_engines[replica.url] = eng
+            return self._async_engines[replica.url]
+
+    def candidates(self) -> list[Replica]:
+        """Healthy replicas, rotated so consecutive reads start at the next one."""
+        now = time.monotonic()
+        up = [r for r in self.replicas if r.down_until <= now]
+        if not up:
+            return []
+        start = next(self._next) % len(up)
+        return up[start:] + up[:start]
+
+    def mark_down(self, replica: Replica, reason: Exception | str) -> None:
+        replica.down_until = time.monotonic() + max(self.check_interval_s, 1.0)
+        replica.error = str(reason).splitlines()[0] if str(reason) else type(reason).__name__
+        replica.failures += 1
+
+    def check(self) -> None:
+        for replica in self.replicas:
+            try:
+                with self.engine(replica).connect() as conn:
+                    lag = float(conn.execute(LAG_SQL).scalar_one())
+            except (DBAPIError, OSError) as err:
+                self.mark_down(replica, err)
+                continue
+            except Exception as err:  # e.g. a pool timeout; keep the check thread alive
+                log.exception("checking replica %s failed", replica.name)
+                self.mark_down(replica, err)
+                continue
+            replica.lag_s = lag
+            if lag > self.max_lag_s:
+                self.mark_down(replica, f"replication lag {lag:.1f} s")
+            else:
+                replica.down_until = 0.0
+                replica.error = None
+
+    def watch(self) -> None:
+        """Check every replica now and then every ``check_interval_s`` (0 = never)."""
+        if not self.replicas or self.check_interval_s <= 0 or self._watcher is not None:
+            return
+        self._stop.clear()
+        self._watcher = threading.Thread(target=self._watch, name="replica-check", daemon=True)
+        self._watcher.start()
+
+    def _watch(self) -> None:
+        while True:
+            self.check()
+            if self._stop.wait(self.check_interval_s):
+                return
+
+    def stop(self) -> None:
+        self._stop.set()
+        watcher, self._watcher = self._watcher, None
+        if watcher is not None:
+            watcher.join()
+
+    async def dispose(self) -> None:
+        for eng in self._engines.values():
+            eng.dispose()
+        for aeng in self._async_engines.values():
+            await aeng.dispose()
+
+    def stats(self) -> dict[str, Any]:
+        now = time.monotonic()
+        return {
+            "replicas": [
+                {
+                    "name": r.name,
+                    "healthy": r.down_until <= now,
+                    "lag_s": r.lag_s,
+                    "error": r.error,
+                    "reads": r.reads,
+                    "failures": r.failures,
+                    "pool": _pool_status(self._engines[r.url].pool)
+                    if r.url in self._engines
+                    else None,
+                }
+                for r in self.replicas
+            ],
+            "primary_fallbacks": self.primary_fallbacks,
+            "sticky_reads": self.sticky_reads,
+        }
+
+
+replicas = ReplicaSet(
+    settings.db_replica_urls,
+    settings.db_replica_check_interval_s,
+    settings.db_replica_max_lag_s,
+    settings.db_replica_connect_timeout_s,
+)
+
+
+def reads_primary(request: Request) -> bool:
+    """Whether this client wrote recently enough that a replica may not have it yet."""
+    try:
+        return float(request.cookies.get(STICKY_COOKIE, 0)) > time.time()
+    except ValueError:
+        return False
+
+
+def _wants_replica(request: Request) -> bool:
+    if not replicas:
+        return False
+    if reads_primary(request):
+        replicas.sticky_reads += 1
+        return False
+    return True
+
+
+def read_session(request: Request) -> Session:
+    if _wants_replica(request):
+        for replica in replicas.candidates():
+            try:
+                conn = replicas.engine(replica).connect()
+            except (DBAPIError, OSError) as err:
+                replicas.mark_down(replica, err)
+                continue
+            replica.reads += 1
+            return Session(bind=conn, autoflush=False, info={"replica": replica.name})
+        replicas.primary_fallbacks += 1
+    return SessionLocal()
+
+
+def get_read_db(request: Request):
+    """Like get_db, for handlers that only read: a replica session when one is usable."""
+    db = read_session(request)
+    try:
+        yield db
+    finally:
+        db.close()
+        if "replica" in db.info:
+            db.bind.close()
+
+
+async def get_async_read_db(request: Request):
+    if _wants_replica(request):
+        for replica in replicas.candidates():
+            try:
+                conn = await replicas.async_engine(replica).connect()
+            except (DBAPIError, OSError) as err:
+                replicas.mark_down(replica, err)
+                continue
+            replica.reads += 1
+            try:
+                async with AsyncSession(
+                    bind=conn,
+                    autoflush=False,
+                    expire_on_commit=False,
+                    info={"replica": replica.name},
+                ) as db:
+                    yield db
+            finally:
+                await conn.close()
+            return
+        replicas.primary_fallbacks += 1
+    async with get_async_sessionmaker()() as db:
+        yield db
+
+
+def stale_window(db: Session | AsyncSession) -> float:
+    """How far behind the primary reads through ``db`` may be (0 on the primary)."""
+    return settings.db_replica_max_lag_s if "replica" in db.info else 0.0
+
+
+class ReadYourWritesMiddleware:
+    """Pins a client's reads to the primary for ``sticky_s`` after each successful write.
+
+    Plain ASGI like AdmissionMiddleware; the deadline travels in a cookie, so it holds
+    whichever worker serves the next request.
+    """
+
+    def __init__(self, app, sticky_s: float):
+        self.app = app
+        self.sticky_s = sticky_s
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in SAFE_METHODS or self.sticky_s <= 0:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                cookie = (
+                    f"{STICKY_COOKIE}={time.time() + self.sticky_s:.3f}; "
+                    f"Max-Age={math.ceil(self.sticky_s)}; Path=/; HttpOnly; SameSite=Lax"
+                )
+                headers = [*message.get("headers", []), (b"set-cookie", cookie.encode())]
+                message = {**message, "headers": headers}
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
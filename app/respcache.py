@@ -0,0 +1,132 @@
+import math
+import threading
+import time
+from collections.abc import Iterable
+from dataclasses import dataclass, field
+from typing import Any, Protocol
+
+from fastapi import Request, Response
+
+from .cache import LRUCache
+from .config import settings
+
+
+class CacheBackend(Protocol):
+    """Storage for cached responses; a shared store (e.g. Redis) can implement this."""
+
+    def get(self, key: str) -> Any | None: ...
+
+    def set(self, key: str, value: Any) -> None: ...
+
+    def delete(self, key: str) -> None: ...
+
+    def scan(self, prefix: str) -> Iterable[tuple[str, Any]]: ...
+
+    def clear(self) -> None: ...
+
+
+class MemoryBackend:
+    """In-process LRU with TTL; each worker process has its own."""
+
+    def __init__(self, maxsize: int = 1024, ttl: float | None = 60.0):
+        self._lru = LRUCache(maxsize, ttl=ttl)
+
+    def get(self, key: str) -> Any | None:
+        return self._lru.get(key)
+
+    def set(self, key: str, value: Any) -> None:
+        self._lru.set(key, value)
+
+    def delete(self, key: str) -> None:
+        self._lru.pop(key)
+
+    def scan(self, prefix: str) -> Iterable[tuple[str, Any]]:
+        return [(k, v) for k, v in self._lru.items() if k.startswith(prefix)]
+
+    def clear(self) -> None:
+        self._lru.clear()
+
+
+@dataclass(frozen=True, slots=True)
+class CachedResponse:
+    body: bytes
+    etag: str
+    headers: dict[str, str] = field(default_factory=dict)
+    # for list pages: the id range [lo, hi) whose rows can change the page (hi None =
+    # unbounded); offset pages shift on any insert/delete so they match every write
+    lo: int = 0
+    hi: int | None = None
+    offset: bool = False
+
+    def covers(self, item_id: int) -> bool:
+        return self.offset or (self.lo <= item_id and (self.hi is None or item_id < self.hi))
+
+
+class ResponseCache:
+    """Read-through cache of single-row and list responses for one table.
+
+    Writers call ``invalidate(id)`` after committing: it drops the row's own entry and
+    exactly those list pages whose id range could include the row. A read that started
+    before an invalidation does not store its (possibly stale) result, and neither does
+    a read from a replica (``stale_s`` > 0) within ``stale_s`` of an invalidation.
+    """
+
+    def __init__(self, backend: CacheBackend, prefix: str):
+        self.backend = backend
+        self.prefix = prefix
+        self._generation = 0
+        self._invalidated_at = -math.inf  # time.monotonic()
+        self._lock = threading.Lock()
+
+    @property
+    def generation(self) -> int:
+        return self._generation
+
+    def one_key(self, item_id: int) -> str:
+        return f"{self.prefix}:one:{item_id}"
+
+    def page_key(self, *parts: Any) -> str:
+        return f"{self.prefix}:page:" + "|".join("" if p is None else str(p) for p in parts)
+
+    def get(self, key: str) -> CachedResponse | None:
+        if not settings.items_cache_enabled:
+            return None
+        return self.backend.get(key)
+
+    def put(self, key: str, entry: CachedResponse, generation: int, stale_s: float = 0.0) -> None:
+        if not settings.items_cache_enabled:
+            return
+        with self._lock:
+            settled = time.monotonic() - self._invalidated_at >= stale_s
+            if generation == self._generation and settled:
+                self.backend.set(key, entry)
+
+    def invalidate(self, item_ids: Iterable[int]) -> None:
+        ids = list(item_ids)
+        with self._lock:
+            self._generation += 1
+            self._invalidated_at = time.monotonic()
+            for item_id in ids:
+                self.backend.delete(self.one_key(item_id))
+            for key, entry in self.backend.scan(f"{self.prefix}:page:"):
+                if any(entry.covers(item_id) for item_id in ids):
+                    self.backend.delete(key)
+
+
+items_cache = ResponseCache(
+    MemoryBackend(settings.items_cache_maxsize, ttl=settings.items_cache_ttl_s), "items"
+)
+
+
+def _etag_matches(if_none_match: str | None, etag: str) -> bool:
+    if not if_none_match:
+        return False
+    tags = {t.strip().removeprefix("W/") for t in if_none_match.split(",")}
+    return "*" in tags or etag in tags
+
+
+def conditional_response(request: Request, entry: CachedResponse) -> Response:
+    headers = {"ETag": entry.etag, "Cache-Control": "no-cache", **entry.headers}
+    if _etag_matches(request.headers.get("if-none-match"), entry.etag):
+        return Response(status_code=304, headers=headers)
+    return Response(entry.body, media_type="application/json", headers=headers)
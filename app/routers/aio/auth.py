@@ -0,0 +1,107 @@
+from fastapi import APIRouter, Depends, HTTPException, status
+from fastapi.security import OAuth2PasswordRequestForm
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ... import models, schemas
+from ...config import settings
+from ...db import get_async_db
+from ...replicas import get_async_read_db
+from ...security import (
+    Principal,
+    create_access_token,
+    get_current_user_async,
+    hash_password_async,
+    principal_cache,
+    verify_and_update_async,
+    verify_password_async,
+)
+from ...serialization import fast_response
+from ...utils import normalize_email
+from ..auth import stats
+
+router = APIRouter(prefix="/auth", tags=["auth"])
+
+# password hashing is deliberately CPU-bound; it runs on the bounded hash pool and is
+# awaited, so the event loop keeps serving other requests
+
+
+async def _user_by_email(db: AsyncSession, email: str) -> models.User | None:
+    return await db.scalar(select(models.User).where(models.User.email == email))
+
+
+@router.post("/register", response_model=schemas.UserOut, status_code=201)
+async def register(payload: schemas.UserCreate, db: AsyncSession = Depends(get_async_db)):
+    email = normalize_email(str(payload.email))
+    if await _user_by_email(db, email):
+        raise HTTPException(status_code=400, detail="Email already registered")
+    await db.close()  # hand the connection back to the pool while hashing
+    hashed = await hash_password_async(payload.password)
+    user = models.User(email=email, hashed_password=hashed)
+    db.add(user)
+    await db.commit()
+    await db.refresh(user)
+    return fast_response(schemas.UserOut, user, status_code=201)
+
+
+@router.post("/login", response_model=schemas.Token)
+async def login(
+    form: OAuth2PasswordRequestForm = Depends(), db: AsyncSession = Depends(get_async_db)
+):
+    email = normalize_email(form.username)
+    user = await _user_by_email(db, email)
+    if not user:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    # release the connection during the (slow, pooled) verify; user stays loaded, detached
+    await db.close()
+    ok, new_hash = await verify_and_update_async(form.password, user.hashed_password)
+    if not ok:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        user.hashed_password = new_hash
+        db.add(user)
+        await db.commit()
+    token = create_access_token(
+        user.email,
+        settings.access_token_expire_minutes,
+        user_id=user.id if settings.jwt_user_id_claim else None,
+    )
+    return {"access_token": token, "token_type": "bearer"}
+
+
+@router.get("/me", response_model=schemas.UserOut)
+async def me(
+    current_user: Principal = Depends(get_current_user_async),
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    if current_user.created_at is None:
+        # principal came from token claims only
+        user = await db.get(models.User, current_user.id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
+            )
+        return fast_response(schemas.UserOut, user)
+    return fast_response(schemas.UserOut, current_user)
+
+
+@router.post("/change-password", status_code=204)
+async def change_password(
+    payload: schemas.PasswordChange,
+    db: AsyncSession = Depends(get_async_db),
+    current_user: Principal = Depends(get_current_user_async),
+):
+    user = await db.get(models.User, current_user.id)
+    await db.close()  # hand the connection back to the pool while hashing
+    if not user or not await verify_password_async(payload.old_password, user.hashed_password):
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST, detail="Old password is incorrect"
+        )
+    user.hashed_password = await hash_password_async(payload.new_password)
+    db.add(user)
+    await db.commit()
+    principal_cache.pop(user.email)
+    return
+
+
+router.add_api_route("/stats", stats, methods=["GET"])
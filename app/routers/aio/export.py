@@ -0,0 +1,32 @@
+from dataclasses import replace
+
+from fastapi import APIRouter, Depends, Query
+
+from ...export import Compression, ExportRange, Format
+from ...security import get_current_user_async
+from ..export import export_range, export_response
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+# the body is a sync generator either way: Starlette iterates it in the threadpool
+
+
+@router.get("/items")
+async def export_items(
+    fmt: Format = Query("ndjson", alias="format"),
+    compress: Compression = "none",
+    rng: ExportRange = Depends(export_range),
+    current_user=Depends(get_current_user_async),
+):
+    return export_response("items", fmt, compress, rng)
+
+
+@router.get("/predictions")
+async def export_predictions(
+    fmt: Format = Query("ndjson", alias="format"),
+    compress: Compression = "none",
+    rng: ExportRange = Depends(export_range),
+    current_user=Depends(get_current_user_async),
+):
+    rng = replace(rng, user_id=current_user.id)
+    return export_response("predictions", fmt, compress, rng)
@@ -0,0 +1,161 @@
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ... import models, schemas
+from ...config import settings
+from ...db import get_async_db
+from ...replicas import get_async_read_db, stale_window
+from ...respcache import conditional_response, items_cache
+from ...security import get_current_user_async
+from ...serialization import fast_response
+from ..items import (
+    _check_rows,
+    _missing,
+    bulk_delete_stmt,
+    bulk_insert_stmt,
+    bulk_update_stmt,
+    item_entry,
+    item_query,
+    page_entry,
+    page_query,
+    resolve_after_id,
+)
+
+router = APIRouter(prefix="/items", tags=["items"])
+
+
+@router.post("/bulk", response_model=schemas.ItemBulkOut, status_code=201)
+async def create_items_bulk(
+    payload: schemas.ItemBulkCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    good, errors = _check_rows(payload.items, payload.mode)
+    rows = [payload.items[i].model_dump() for i in good]
+    created = (await db.execute(bulk_insert_stmt(), rows)).mappings().all() if rows else []
+    await db.commit()
+    items_cache.invalidate(r["id"] for r in created)
+    return {"items": created, "errors": errors}
+
+
+@router.patch("/bulk", response_model=schemas.ItemBulkOut)
+async def update_items_bulk(
+    payload: schemas.ItemBulkUpdate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    good, errors = _check_rows(payload.items, payload.mode)
+    rows = [payload.items[i] for i in good]
+    updated = {}
+    if rows:
+        updated = {r["id"]: r for r in (await db.execute(bulk_update_stmt(rows))).mappings()}
+    try:
+        errors += _missing([r.id for r in rows], good, set(updated), payload.mode)
+    except HTTPException:
+        await db.rollback()
+        raise
+    await db.commit()
+    items_cache.invalidate(updated)
+    return {"items": [updated[r.id] for r in rows if r.id in updated], "errors": errors}
+
+
+@router.delete("/bulk", response_model=schemas.ItemBulkDeleteOut)
+async def delete_items_bulk(
+    payload: schemas.ItemBulkDelete,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    if len(payload.ids) > settings.items_bulk_max_rows:
+        raise HTTPException(413, f"At most {settings.items_bulk_max_rows} rows per request")
+    deleted = set(await db.scalars(bulk_delete_stmt(payload.ids)))
+    try:
+        errors = _missing(payload.ids, range(len(payload.ids)), deleted, payload.mode)
+    except HTTPException:
+        await db.rollback()
+        raise
+    await db.commit()
+    items_cache.invalidate(deleted)
+    return {"deleted": [i for i in dict.fromkeys(payload.ids) if i in deleted], "errors": errors}
+
+
+@router.post("", response_model=schemas.ItemOut, status_code=201)
+async def create_item(
+    payload: schemas.ItemCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    obj = models.Item(name=payload.name, description=payload.description)
+    db.add(obj)
+    await db.commit()
+    await db.refresh(obj)
+    items_cache.invalidate([obj.id])
+    return fast_response(schemas.ItemOut, obj, status_code=201)
+
+
+@router.get("", response_model=list[schemas.ItemOut])
+async def list_items(
+    request: Request,
+    q: str | None = None,
+    limit: int = Query(10, ge=1, le=settings.items_max_limit),
+    offset: int = Query(0, ge=0),
+    after_id: int | None = None,
+    cursor: str | None = None,
+    db: AsyncSession = Depends(get_async_read_db),
+):
+    after_id = resolve_after_id(after_id, cursor, offset)
+    key = items_cache.page_key(q, limit, offset, after_id)
+    entry = items_cache.get(key)
+    if entry is None:
+        generation = items_cache.generation
+        rows = (await db.execute(page_query(q, limit, offset, after_id))).all()
+        entry = page_entry(rows, limit, offset, after_id)
+        items_cache.put(key, entry, generation, stale_window(db))
+    return conditional_response(request, entry)
+
+
+@router.get("/{item_id}", response_model=schemas.ItemOut)
+async def get_item(item_id: int, request: Request, db: AsyncSession = Depends(get_async_read_db)):
+    key = items_cache.one_key(item_id)
+    entry = items_cache.get(key)
+    if entry is None:
+        generation = items_cache.generation
+        row = (await db.execute(item_query(item_id))).first()
+        if not row:
+            raise HTTPException(404, "Item not found")
+        entry = item_entry(row)
+        items_cache.put(key, entry, generation, stale_window(db))
+    return conditional_response(request, entry)
+
+
+@router.put("/{item_id}", response_model=schemas.ItemOut)
+async def update_item(
+    item_id: int,
+    payload: schemas.ItemCreate,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    obj = await db.get(models.Item, item_id)
+    if not obj:
+        raise HTTPException(404, "Item not found")
+    obj.name = payload.name
+    obj.description = payload.description
+    obj.version = models.Item.version + 1
+    await db.commit()
+    await db.refresh(obj)
+    items_cache.invalidate([item_id])
+    return fast_response(schemas.ItemOut, obj)
+
+
+@router.delete("/{item_id}", status_code=204)
+async def delete_item(
+    item_id: int,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    obj = await db.get(models.Item, item_id)
+    if not obj:
+        raise HTTPException(404, "Item not found")
+    await db.delete(obj)
+    await db.commit()
+    items_cache.invalidate([item_id])
+    return
@@ -0,0 +1,146 @@
+import asyncio
+from datetime import date
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Response
+from fastapi.concurrency import run_in_threadpool
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from ... import models, schemas
+from ...config import settings
+from ...db import get_async_db
+from ...replicas import get_async_read_db
+from ...security import get_current_user_async
+from ...serialization import fast_response
+from ..ml import (
+    FEATURES,
+    HistoryFilter,
+    _predict_rows,
+    activate_model,
+    batcher,
+    cache_key,
+    confidence_histogram,
+    confidence_queries,
+    daily_counts,
+    daily_queries,
+    history_filters,
+    history_query,
+    label_counts,
+    label_counts_queries,
+    list_models,
+    next_cursor,
+    predict_batch,
+    prediction_cache,
+    prediction_log,
+    resolve_after,
+    stats,
+    summarize,
+    watermark_query,
+)
+
+router = APIRouter(prefix="/ml", tags=["ml"])
+
+
+@router.post("/predict", response_model=schemas.IrisOut)
+async def predict(
+    payload: schemas.IrisIn,
+    db: AsyncSession = Depends(get_async_db),
+    current_user=Depends(get_current_user_async),
+):
+    row = [getattr(payload, f) for f in FEATURES]
+    key = cache_key(row)
+    result = prediction_cache.get(key) if key else None
+    if result is None:
+        # predict_proba is CPU-bound: wait on the batch worker, or score in the threadpool
+        if settings.predict_batching:
+            try:
+                proba, target_names = await asyncio.wait_for(
+                    asyncio.wrap_future(batcher.submit(row)), settings.predict_batch_timeout_s
+                )
+            except TimeoutError as err:
+                raise HTTPException(status_code=503, detail="Prediction queue timed out") from err
+        else:
+            [(proba, target_names)] = await run_in_threadpool(_predict_rows, [row])
+        result = summarize(proba, target_names)
+        if key:
+            prediction_cache.set(key, result)
+    elif not settings.predict_cache_log_hits:
+        return fast_response(schemas.IrisOut, {"label": result[0], "probabilities": result[1]})
+    label, probs, confidence = result
+
+    rec = {
+        "user_id": current_user.id,
+        "feature_values": row,
+        "pred_label": label,
+        "pred_confidence": confidence,
+    }
+    if settings.prediction_log_async:
+        if settings.prediction_log_policy == "block":
+            await run_in_threadpool(prediction_log.submit, rec)
+        else:
+            prediction_log.submit(rec)
+    else:
+        db.add(models.Prediction(**rec))
+        await db.commit()
+    return fast_response(schemas.IrisOut, {"label": label, "probabilities": probs})
+
+
+@router.get("/predictions", response_model=list[schemas.PredictionOut])
+async def list_predictions(
+    response: Response,
+    limit: int = Query(20, ge=1, le=settings.predictions_max_limit),
+    offset: int = Query(0, ge=0),
+    cursor: str | None = None,
+    f: HistoryFilter = Depends(history_filters),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user=Depends(get_current_user_async),
+):
+    after = resolve_after(cursor, offset)
+    rows = (await db.scalars(history_query(current_user.id, f, limit, offset, after))).all()
+    response.headers.update(next_cursor(rows, limit))
+    return rows
+
+
+async def _watermark(db: AsyncSession) -> date | None:
+    return await db.scalar(watermark_query()) if settings.predictions_rollups else None
+
+
+async def _run_all(db: AsyncSession, queries: list) -> list:
+    return [(await db.execute(q)).all() for q in queries]
+
+
+@router.get("/predictions/labels", response_model=list[schemas.LabelCount])
+async def prediction_labels(
+    f: HistoryFilter = Depends(history_filters),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user=Depends(get_current_user_async),
+):
+    queries = label_counts_queries(current_user.id, f, await _watermark(db))
+    return label_counts(await _run_all(db, queries))
+
+
+@router.get("/predictions/confidence", response_model=list[schemas.ConfidenceBucket])
+async def prediction_confidence(
+    buckets: int = Query(10, ge=1, le=100),
+    f: HistoryFilter = Depends(history_filters),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user=Depends(get_current_user_async),
+):
+    queries = confidence_queries(current_user.id, f, await _watermark(db), buckets)
+    return confidence_histogram(await _run_all(db, queries), buckets)
+
+
+@router.get("/predictions/daily", response_model=list[schemas.DailyCount])
+async def prediction_daily(
+    f: HistoryFilter = Depends(history_filters),
+    db: AsyncSession = Depends(get_async_read_db),
+    current_user=Depends(get_current_user_async),
+):
+    queries = daily_queries(current_user.id, f, await _watermark(db))
+    return daily_counts(await _run_all(db, queries))
+
+
+# already async (or trivially cheap) in the sync router; shared as-is
+router.add_api_route("/predict/batch", predict_batch, methods=["POST"])
+router.add_api_route("/stats", stats, methods=["GET"])
+router.add_api_route("/models", list_models, methods=["GET"])
+router.add_api_route("/models/{version}/activate", activate_model, methods=["POST"])
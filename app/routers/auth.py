@@ -5,7 +5,18 @@ from sqlalchemy.orm import Session
 from .. import models, schemas
 from ..config import settings
 from ..db import get_db
-from ..security import create_access_token, get_current_user, hash_password, verify_password
+from ..replicas import get_read_db
+from ..security import (
+    Principal,
+    create_access_token,
+    get_current_user,
+    hash_password,
+    hash_pool,
+    principal_cache,
+    verify_and_update,
+    verify_password,
+)
+from ..serialization import fast_response
 from ..utils import normalize_email
 
 router = APIRouter(prefix="/auth", tags=["auth"])
@@ -16,41 +27,72 @@ def register(payload: schemas.UserCreate, db: Session = Depends(get_db)):
     email = normalize_email(str(payload.email))
     if db.query(models.User).filter(models.User.email == email).first():
         raise HTTPException(status_code=400, detail="Email already registered")
+    db.close()  # hand the connection back to the pool while hashing
     user = models.User(email=email, hashed_password=hash_password(payload.password))
     db.add(user)
     db.commit()
     db.refresh(user)
-    return user
+    return fast_response(schemas.UserOut, user, status_code=201)
 
 
 @router.post("/login", response_model=schemas.Token)
 def login(form: OAuth2PasswordRequestForm = Depends(), db: Session = Depends(get_db)):
     email = normalize_email(form.username)
     user = db.query(models.User).filter(models.User.email == email).first()
-    if not user or not verify_password(form.password, user.hashed_password):
+    if not user:
         raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
-    token = create_access_token(user.email, settings.access_token_expire_minutes)
+    # release the connection during the (slow, pooled) verify; user stays loaded, detached
+    db.close()
+    ok, new_hash = verify_and_update(form.password, user.hashed_password)
+    if not ok:
+        raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
+    if new_hash:
+        # stored hash used an old scheme or a lower cost than configured
+        user.hashed_password = new_hash
+        db.add(user)
+        db.commit()
+    token = create_access_token(
+        user.email,
+        settings.access_token_expire_minutes,
+        user_id=user.id if settings.jwt_user_id_claim else None,
+    )
     return {"access_token": token, "token_type": "bearer"}
 
 
 @router.get("/me", response_model=schemas.UserOut)
-def me(current_user=Depends(get_current_user)):
-    return current_user
+def me(current_user: Principal = Depends(get_current_user), db: Session = Depends(get_read_db)):
+    if current_user.created_at is None:
+        # principal came from token claims only
+        user = db.get(models.User, current_user.id)
+        if not user:
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials"
+            )
+        return fast_response(schemas.UserOut, user)
+    return fast_response(schemas.UserOut, current_user)
 
 
 @router.post("/change-password", status_code=204)
 def change_password(
     payload: schemas.PasswordChange,
     db: Session = Depends(get_db),
-    current_user=Depends(get_current_user),
+    current_user: Principal = Depends(get_current_user),
 ):
+    user = db.get(models.User, current_user.id)
+    db.close()  # hand the connection back to the pool while hashing
     # verify old password
-    if not verify_password(payload.old_password, current_user.hashed_password):
+    if not user or not verify_password(payload.old_password, user.hashed_password):
         raise HTTPException(
             status_code=status.HTTP_400_BAD_REQUEST, detail="Old password is incorrect"
         )
     # set new password (validated by schema)
-    current_user.hashed_password = hash_password(payload.new_password)
-    db.add(current_user)
+    user.hashed_password = hash_password(payload.new_password)
+    db.add(user)
     db.commit()
+    principal_cache.pop(user.email)
     return
+
+
+@router.get("/stats")
+def stats(current_user: Principal = Depends(get_current_user)):
+    return {"hash_pool": hash_pool.stats()}
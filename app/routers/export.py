@@ -0,0 +1,65 @@
+from dataclasses import replace
+from datetime import datetime
+
+from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi.responses import StreamingResponse
+
+from ..export import (
+    Compression,
+    ExportRange,
+    ExportUnavailable,
+    Format,
+    Kind,
+    filename,
+    media_type,
+    stream_export,
+)
+from ..security import get_current_user
+
+router = APIRouter(prefix="/export", tags=["export"])
+
+
+def export_range(
+    after_id: int | None = Query(None, description="resume after this id"),
+    before_id: int | None = None,
+    since: datetime | None = Query(None, description="created_at >= since"),
+    until: datetime | None = Query(None, description="created_at < until"),
+) -> ExportRange:
+    return ExportRange(after_id, before_id, since, until)
+
+
+def export_response(
+    kind: Kind, fmt: Format, compress: Compression, rng: ExportRange
+) -> StreamingResponse:
+    try:
+        chunks = stream_export(kind, fmt, compress, rng)
+    except ExportUnavailable as err:
+        raise HTTPException(status_code=501, detail=str(err)) from err
+    return StreamingResponse(
+        chunks,
+        media_type=media_type(fmt, compress),
+        headers={"Content-Disposition": f'attachment; filename="{filename(kind, fmt, compress)}"'},
+    )
+
+
+@router.get("/items")
+def export_items(
+    fmt: Format = Query("ndjson", alias="format"),
+    compress: Compression = "none",
+    rng: ExportRange = Depends(export_range),
+    current_user=Depends(get_current_user),
+):
+    """Every item in id order, streamed from a server-side cursor (constant memory)."""
+    return export_response("items", fmt, compress, rng)
+
+
+@router.get("/predictions")
+def export_predictions(
+    fmt: Format = Query("ndjson", alias="format"),
+    compress: Compression = "none",
+    rng: ExportRange = Depends(export_range),
+    current_user=Depends(get_current_user),
+):
+    """The caller's predictions in id order, one column per feature."""
+    rng = replace(rng, user_id=current_user.id)
+    return export_response("predictions", fmt, compress, rng)
@@ -1,12 +1,220 @@
-from fastapi import APIRouter, Depends, HTTPException
+import hashlib
+from collections.abc import Sequence
+
+from fastapi import APIRouter, Depends, HTTPException, Query, Request
+from pydantic import TypeAdapter
+from sqlalchemy import (
+    Delete,
+    Insert,
+    Integer,
+    Select,
+    String,
+    Text,
+    Update,
+    any_,
+    bindparam,
+    column,
+    delete,
+    insert,
+    select,
+    update,
+    values,
+)
+from sqlalchemy.dialects.postgresql import ARRAY
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
+from ..config import settings
 from ..db import get_db
+from ..replicas import get_read_db, stale_window
+from ..respcache import CachedResponse, conditional_response, items_cache
 from ..security import get_current_user
+from ..serialization import dumps, fast_response, fields
+from ..utils import decode_cursor, encode_cursor, like_pattern
 
 router = APIRouter(prefix="/items", tags=["items"])
 
+_items = models.Item.__table__
+_item_one = TypeAdapter(schemas.ItemOut)
+_item_list = TypeAdapter(list[schemas.ItemOut])
+# reads select plain columns, in ItemOut field order plus version (for the ETag): Core
+# rows skip ORM identity-map and instance construction
+ITEM_FIELDS = fields(schemas.ItemOut)
+ITEM_COLUMNS = (*(_items.c[f] for f in ITEM_FIELDS), _items.c.version)
+
+
+def resolve_after_id(after_id: int | None, cursor: str | None, offset: int) -> int | None:
+    if cursor is not None:
+        try:
+            [after_id] = decode_cursor(cursor)
+        except ValueError as err:
+            raise HTTPException(400, "Invalid cursor") from err
+        if not isinstance(after_id, int):
+            raise HTTPException(400, "Invalid cursor")
+    if after_id is not None and offset:
+        raise HTTPException(400, "Use either offset or a cursor, not both")
+    return after_id
+
+
+def page_query(q: str | None, limit: int, offset: int, after_id: int | None) -> Select:
+    """Newest-first page of items; keyset (``after_id``) or legacy offset."""
+    query = select(*ITEM_COLUMNS)
+    if q:
+        # served by the ix_items_name_trgm GIN index
+        query = query.where(models.Item.name.ilike(like_pattern(q), escape="\\"))
+    if after_id is not None:
+        query = query.where(models.Item.id < after_id)
+    return query.order_by(models.Item.id.desc()).offset(offset).limit(limit)
+
+
+def item_query(item_id: int) -> Select:
+    return select(*ITEM_COLUMNS).where(_items.c.id == item_id)
+
+
+def _item_dict(row) -> dict:
+    return dict(zip(ITEM_FIELDS, row, strict=False))  # drops the trailing version
+
+
+def item_entry(row) -> CachedResponse:
+    if settings.fast_responses:
+        # trusted rows straight from the table: no validation, one encoder call
+        body = dumps(_item_dict(row))
+    else:
+        body = _item_one.dump_json(_item_one.validate_python(row, from_attributes=True))
+    return CachedResponse(body, etag=f'"{row.id}.{row.version}"')
+
+
+def page_entry(rows, limit: int, offset: int, after_id: int | None) -> CachedResponse:
+    if settings.fast_responses:
+        body = dumps([_item_dict(row) for row in rows])
+    else:
+        body = _item_list.dump_json(_item_list.validate_python(rows, from_attributes=True))
+    digest = hashlib.sha1(",".join(f"{r.id}.{r.version}" for r in rows).encode()).hexdigest()
+    full = len(rows) == limit
+    return CachedResponse(
+        body,
+        etag=f'"p{digest[:24]}"',
+        headers={"X-Next-Cursor": encode_cursor(rows[-1].id)} if full else {},
+        # a full page only depends on ids down to its last row; a short one on all below
+        lo=rows[-1].id if full else 0,
+        hi=after_id,
+        offset=offset > 0,
+    )
+
+
+# ---------- bulk writes: one set-based statement per request ----------
+_NAME_MAX = _items.c.name.type.length
+
+
+def _check_rows(
+    rows: Sequence[schemas.ItemCreate], mode: schemas.BulkMode
+) -> tuple[list[int], list[schemas.BulkError]]:
+    """Indices of applicable rows, plus per-row errors (raises 4xx in atomic mode)."""
+    if len(rows) > settings.items_bulk_max_rows:
+        raise HTTPException(413, f"At most {settings.items_bulk_max_rows} rows per request")
+    good, errors, seen = [], [], set()
+    for i, row in enumerate(rows):
+        row_id = getattr(row, "id", None)
+        if len(row.name) > _NAME_MAX:
+            detail = f"name longer than {_NAME_MAX} characters"
+        elif row_id is not None and row_id in seen:
+            detail = "duplicate id in request"
+        else:
+            good.append(i)
+            seen.add(row_id)
+            continue
+        errors.append(schemas.BulkError(index=i, id=row_id, detail=detail))
+    if errors and mode == "atomic":
+        raise HTTPException(422, [e.model_dump() for e in errors])
+    return good, errors
+
+
+def _missing(
+    ids: Sequence[int], index: Sequence[int], found: set[int], mode: schemas.BulkMode
+) -> list[schemas.BulkError]:
+    missing = [
+        schemas.BulkError(index=i, id=item_id, detail="Item not found")
+        for i, item_id in zip(index, ids, strict=True)
+        if item_id not in found
+    ]
+    if missing and mode == "atomic":
+        raise HTTPException(404, [e.model_dump() for e in missing])
+    return missing
+
+
+def bulk_insert_stmt() -> Insert:
+    # executemany + RETURNING is batched into multi-row INSERTs (insertmanyvalues)
+    return insert(_items).returning(*_items.c, sort_by_parameter_order=True)
+
+
+def bulk_update_stmt(rows: Sequence[schemas.ItemUpdate]) -> Update:
+    v = values(
+        column("id", Integer), column("name", String), column("description", Text), name="v"
+    ).data([(r.id, r.name, r.description) for r in rows])
+    return (
+        update(_items)
+        .where(_items.c.id == v.c.id)
+        .values(name=v.c.name, description=v.c.description, version=_items.c.version + 1)
+        .returning(*_items.c)
+    )
+
+
+def bulk_delete_stmt(ids: Sequence[int]) -> Delete:
+    ids_param = bindparam("ids", list(ids), type_=ARRAY(Integer))
+    return delete(_items).where(_items.c.id == any_(ids_param)).returning(_items.c.id)
+
+
+@router.post("/bulk", response_model=schemas.ItemBulkOut, status_code=201)
+def create_items_bulk(
+    payload: schemas.ItemBulkCreate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    good, errors = _check_rows(payload.items, payload.mode)
+    rows = [payload.items[i].model_dump() for i in good]
+    created = db.execute(bulk_insert_stmt(), rows).mappings().all() if rows else []
+    db.commit()
+    items_cache.invalidate(r["id"] for r in created)
+    return {"items": created, "errors": errors}
+
+
+@router.patch("/bulk", response_model=schemas.ItemBulkOut)
+def update_items_bulk(
+    payload: schemas.ItemBulkUpdate,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    good, errors = _check_rows(payload.items, payload.mode)
+    rows = [payload.items[i] for i in good]
+    updated = {r["id"]: r for r in db.execute(bulk_update_stmt(rows)).mappings()} if rows else {}
+    try:
+        errors += _missing([r.id for r in rows], good, set(updated), payload.mode)
+    except HTTPException:
+        db.rollback()
+        raise
+    db.commit()
+    items_cache.invalidate(updated)
+    return {"items": [updated[r.id] for r in rows if r.id in updated], "errors": errors}
+
+
+@router.delete("/bulk", response_model=schemas.ItemBulkDeleteOut)
+def delete_items_bulk(
+    payload: schemas.ItemBulkDelete,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    if len(payload.ids) > settings.items_bulk_max_rows:
+        raise HTTPException(413, f"At most {settings.items_bulk_max_rows} rows per request")
+    deleted = set(db.scalars(bulk_delete_stmt(payload.ids)))
+    try:
+        errors = _missing(payload.ids, range(len(payload.ids)), deleted, payload.mode)
+    except HTTPException:
+        db.rollback()
+        raise
+    db.commit()
+    items_cache.invalidate(deleted)
+    return {"deleted": [i for i in dict.fromkeys(payload.ids) if i in deleted], "errors": errors}
+
 
 @router.post("", response_model=schemas.ItemOut, status_code=201)
 def create_item(
@@ -18,28 +226,43 @@ def create_item(
     db.add(obj)
     db.commit()
     db.refresh(obj)
-    return obj
+    items_cache.invalidate([obj.id])
+    return fast_response(schemas.ItemOut, obj, status_code=201)
 
 
 @router.get("", response_model=list[schemas.ItemOut])
 def list_items(
+    request: Request,
     q: str | None = None,
-    limit: int = 10,
-    offset: int = 0,
-    db: Session = Depends(get_db),
+    limit: int = Query(10, ge=1, le=settings.items_max_limit),
+    offset: int = Query(0, ge=0),
+    after_id: int | None = None,
+    cursor: str | None = None,
+    db: Session = Depends(get_read_db),
 ):
-    query = db.query(models.Item)
-    if q:
-        query = query.filter(models.Item.name.ilike(f"%{q}%"))
-    return query.order_by(models.Item.id.desc()).offset(offset).limit(limit).all()
+    after_id = resolve_after_id(after_id, cursor, offset)
+    key = items_cache.page_key(q, limit, offset, after_id)
+    entry = items_cache.get(key)
+    if entry is None:
+        generation = items_cache.generation
+        rows = db.execute(page_query(q, limit, offset, after_id)).all()
+        entry = page_entry(rows, limit, offset, after_id)
+        items_cache.put(key, entry, generation, stale_window(db))
+    return conditional_response(request, entry)
 
 
 @router.get("/{item_id}", response_model=schemas.ItemOut)
-def get_item(item_id: int, db: Session = Depends(get_db)):
-    obj = db.get(models.Item, item_id)
-    if not obj:
-        raise HTTPException(404, "Item not found")
-    return obj
+def get_item(item_id: int, request: Request, db: Session = Depends(get_read_db)):
+    key = items_cache.one_key(item_id)
+    entry = items_cache.get(key)
+    if entry is None:
+        generation = items_cache.generation
+        row = db.execute(item_query(item_id)).first()
+        if not row:
+            raise HTTPException(404, "Item not found")
+        entry = item_entry(row)
+        items_cache.put(key, entry, generation, stale_window(db))
+    return conditional_response(request, entry)
 
 
 @router.put("/{item_id}", response_model=schemas.ItemOut)
@@ -54,9 +277,11 @@ def update_item(
         raise HTTPException(404, "Item not found")
     obj.name = payload.name
     obj.description = payload.description
+    obj.version = models.Item.version + 1
     db.commit()
     db.refresh(obj)
-    return obj
+    items_cache.invalidate([item_id])
+    return fast_response(schemas.ItemOut, obj)
 
 
 @router.delete("/{item_id}", status_code=204)
@@ -68,4 +293,5 @@ def delete_item(
         raise HTTPException(404, "Item not found")
     db.delete(obj)
     db.commit()
+    items_cache.invalidate([item_id])
     return
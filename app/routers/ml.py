@@ -1,14 +1,82 @@
+import json
+import tempfile
+from collections.abc import Iterable, Iterator
+from concurrent.futures import TimeoutError as FutureTimeoutError
+from dataclasses import dataclass
+from datetime import UTC, date, datetime, timedelta
+from itertools import islice
+from typing import IO
+
 import numpy as np
-from fastapi import APIRouter, Depends
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
+from fastapi.responses import StreamingResponse
+from pydantic import ValidationError
+from sqlalchemy import ColumnElement, Date, Select, cast, func, insert, or_, select, tuple_
+from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.orm import Session
 
 from .. import models, schemas
-from ..db import get_db
-from ..model import load_model
+from ..batching import BatchScheduler
+from ..cache import LRUCache
+from ..config import settings
+from ..db import SessionLocal, get_db
+from ..model import registry as model_registry
+from ..predlog import PredictionLogWriter
+from ..replicas import get_read_db
 from ..security import get_current_user
+from ..serialization import fast_response
+from ..tracing import span
+from ..utils import decode_cursor, encode_cursor, utc_midnight
 
 router = APIRouter(prefix="/ml", tags=["ml"])
 
+FEATURES = models.FEATURES
+NDJSON_TYPES = {"application/x-ndjson", "application/ndjson", "application/jsonl"}
+
+
+def _predict_rows(rows: list[list[float]]) -> list[tuple[np.ndarray, list[str]]]:
+    bundle = model_registry.get()
+    with span("inference"):
+        proba = bundle.predictor.predict_proba(np.asarray(rows, dtype=float))
+    return [(p, bundle.target_names) for p in proba]
+
+
+def summarize(proba: np.ndarray, target_names: list[str]) -> tuple[str, dict[str, float], float]:
+    """(label, probabilities by class name, confidence) for one row of ``predict_proba``."""
+    idx = int(proba.argmax())
+    probs = {target_names[i]: float(proba[i]) for i in range(len(target_names))}
+    return target_names[idx], probs, float(proba[idx])
+
+
+# (model version, load time, rounded features) -> summarize() result
+prediction_cache = LRUCache(settings.predict_cache_size)
+model_registry.add_listener(lambda bundle: prediction_cache.clear())
+
+
+def cache_key(row: list[float]) -> tuple | None:
+    if not settings.predict_cache_enabled:
+        return None
+    active = model_registry.get()
+    # the key pins the model, so a result computed across a swap is never served later
+    quantized = tuple(round(v, settings.predict_cache_decimals) for v in row)
+    return active.version, active.loaded_at, quantized
+
+
+batcher = BatchScheduler(
+    _predict_rows,
+    max_batch_size=settings.predict_batch_max_size,
+    max_wait_us=settings.predict_batch_max_wait_us,
+)
+
+prediction_log = PredictionLogWriter(
+    SessionLocal,
+    max_pending=settings.prediction_log_max_pending,
+    flush_size=settings.prediction_log_flush_size,
+    flush_interval_ms=settings.prediction_log_flush_interval_ms,
+    policy=settings.prediction_log_policy,
+    block_timeout_ms=settings.prediction_log_block_timeout_ms,
+)
+
 
 @router.post("/predict", response_model=schemas.IrisOut)
 def predict(
@@ -16,35 +84,446 @@ def predict(
     db: Session = Depends(get_db),
     current_user=Depends(get_current_user),
 ):
-    model, target_names = load_model()
-    x = np.array(
-        [
-            [
-                payload.sepal_length,
-                payload.sepal_width,
-                payload.petal_length,
-                payload.petal_width,
-            ]
-        ],
-        dtype=float,
-    )
-    proba = model.predict_proba(x)[0]
-    idx = int(proba.argmax())
-    label = target_names[idx]
-    probs = {target_names[i]: float(proba[i]) for i in range(len(target_names))}
+    row = [
+        payload.sepal_length,
+        payload.sepal_width,
+        payload.petal_length,
+        payload.petal_width,
+    ]
+    key = cache_key(row)
+    result = prediction_cache.get(key) if key else None
+    if result is None:
+        if settings.predict_batching:
+            try:
+                proba, target_names = batcher(row, timeout=settings.predict_batch_timeout_s)
+            except FutureTimeoutError as err:
+                raise HTTPException(status_code=503, detail="Prediction queue timed out") from err
+        else:
+            [(proba, target_names)] = _predict_rows([row])
+        result = summarize(proba, target_names)
+        if key:
+            prediction_cache.set(key, result)
+    elif not settings.predict_cache_log_hits:
+        return fast_response(schemas.IrisOut, {"label": result[0], "probabilities": result[1]})
+    label, probs, confidence = result
 
     # log to Postgres
-    rec = models.Prediction(
-        user_id=current_user.id,
-        features={
-            "sepal_length": payload.sepal_length,
-            "sepal_width": payload.sepal_width,
-            "petal_length": payload.petal_length,
-            "petal_width": payload.petal_width,
-        },
-        pred_label=label,
-        pred_confidence=float(proba[idx]),
+    rec = {
+        "user_id": current_user.id,
+        "feature_values": row,
+        "pred_label": label,
+        "pred_confidence": confidence,
+    }
+    if settings.prediction_log_async:
+        prediction_log.submit(rec)
+    else:
+        db.add(models.Prediction(**rec))
+        db.commit()
+    return fast_response(schemas.IrisOut, {"label": label, "probabilities": probs})
+
+
+# rows that fail validation are passed along as error strings so output stays aligned
+Entry = list[float] | str
+
+
+def _entry(obj) -> Entry:
+    try:
+        row = schemas.IrisIn.model_validate(obj, strict=True)
+    except ValidationError as err:
+        first = err.errors()[0]
+        loc = ".".join(str(p) for p in first["loc"]) or "row"
+        return f"invalid row: {loc}: {first['msg']}"
+    return [getattr(row, f) for f in FEATURES]
+
+
+def _json_entries(data) -> Iterator[Entry]:
+    if isinstance(data, list):
+        return (_entry(obj) for obj in data)
+    if isinstance(data, dict) and all(isinstance(data.get(f), list) for f in FEATURES):
+        cols = [data[f] for f in FEATURES]
+        if len({len(col) for col in cols}) != 1:
+            raise ValueError("columnar body needs four arrays of equal length")
+        return (_entry(dict(zip(FEATURES, vals, strict=True))) for vals in zip(*cols, strict=True))
+    raise ValueError("body must be a JSON array of rows or an object of four feature arrays")
+
+
+def _ndjson_entries(fp: IO[bytes]) -> Iterator[Entry]:
+    for line in fp:
+        if not line.strip():
+            continue
+        try:
+            obj = json.loads(line)
+        except ValueError as err:
+            yield f"invalid row: {err}"
+            continue
+        yield _entry(obj)
+
+
+def _score_chunk(chunk: list[Entry], user_id: int) -> tuple[list[str], list[dict]]:
+    valid = [e for e in chunk if not isinstance(e, str)]
+    lines: list[str] = []
+    records: list[dict] = []
+    scored: Iterator = iter(())
+    if valid:
+        bundle = model_registry.get()
+        target_names = bundle.target_names
+        with span("inference"):
+            proba = bundle.predictor.predict_proba(np.asarray(valid, dtype=float))
+        scored = zip(valid, proba, proba.argmax(axis=1), strict=True)
+    for entry in chunk:
+        if isinstance(entry, str):
+            lines.append(json.dumps({"error": entry}))
+            continue
+        row, p, idx = next(scored)
+        label = target_names[idx]
+        probs = {name: float(v) for name, v in zip(target_names, p, strict=True)}
+        lines.append(json.dumps({"label": label, "probabilities": probs}))
+        records.append(
+            {
+                "user_id": user_id,
+                "feature_values": row,
+                "pred_label": label,
+                "pred_confidence": float(p[idx]),
+            }
+        )
+    return lines, records
+
+
+def _stream_predictions(
+    entries: Iterable[Entry], db: Session, user_id: int, spool: IO[bytes] | None = None
+) -> Iterator[bytes]:
+    it = iter(entries)
+    logged = 0
+    try:
+        while chunk := list(islice(it, settings.bulk_predict_chunk_size)):
+            try:
+                lines, records = _score_chunk(chunk, user_id)
+                if records:
+                    # one multi-row INSERT and one commit per chunk, not per row
+                    db.execute(insert(models.Prediction), records)
+                    db.commit()
+            except (SQLAlchemyError, ValueError) as err:
+                db.rollback()
+                # the 200 is already on the wire; tell the client where the stream stopped
+                detail = f"batch aborted: {type(err).__name__}"
+                yield (json.dumps({"error": detail, "rows_logged": logged}) + "\n").encode()
+                return
+            logged += len(records)
+            yield ("\n".join(lines) + "\n").encode()
+    finally:
+        if spool is not None:
+            spool.close()
+
+
+async def _read_capped(request: Request, limit: int) -> bytes:
+    body = bytearray()
+    async for part in request.stream():
+        body += part
+        if len(body) > limit:
+            raise HTTPException(status_code=413, detail=f"JSON batch body exceeds {limit} bytes")
+    return bytes(body)
+
+
+@router.post("/predict/batch")
+async def predict_batch(
+    request: Request,
+    db: Session = Depends(get_db),
+    current_user=Depends(get_current_user),
+):
+    """Score many rows in one request and stream one NDJSON result line per input row.
+
+    Accepts NDJSON (``Content-Type: application/x-ndjson``), a JSON array of feature
+    objects, or a columnar JSON object with one array per feature. NDJSON is spooled to
+    a temp file and parsed line by line, so its size is unbounded; the two JSON forms are
+    parsed whole and capped at ``bulk_predict_max_json_bytes``. Invalid rows produce an
+    ``{"error": ...}`` line in their place.
+    """
+    ctype = request.headers.get("content-type", "").split(";")[0].strip().lower()
+    spool = None
+    if ctype in NDJSON_TYPES:
+        # the body has to be drained before the response starts streaming
+        spool = tempfile.SpooledTemporaryFile(max_size=settings.bulk_predict_spool_bytes)
+        async for part in request.stream():
+            spool.write(part)
+        spool.seek(0)
+        entries = _ndjson_entries(spool)
+    else:
+        body = await _read_capped(request, settings.bulk_predict_max_json_bytes)
+        try:
+            entries = _json_entries(json.loads(body))
+        except ValueError as err:
+            raise HTTPException(status_code=422, detail=f"invalid batch body: {err}") from err
+    return StreamingResponse(
+        _stream_predictions(entries, db, current_user.id, spool),
+        media_type="application/x-ndjson",
+    )
+
+
+# ---------- history + aggregates: all served by the ix_predictions_user_* indexes ----------
+_P = models.Prediction
+_R = models.PredictionDailyRollup
+
+
+@dataclass(frozen=True, slots=True)
+class HistoryFilter:
+    label: str | None = None
+    since: datetime | None = None
+    until: datetime | None = None
+
+    def where(self) -> list[ColumnElement[bool]]:
+        conds = []
+        if self.label is not None:
+            conds.append(_P.pred_label == self.label)
+        if self.since is not None:
+            conds.append(_P.created_at >= self.since)
+        if self.until is not None:
+            conds.append(_P.created_at < self.until)
+        return conds
+
+
+def history_filters(
+    label: str | None = None,
+    since: datetime | None = Query(None, description="created_at >= since"),
+    until: datetime | None = Query(None, description="created_at < until"),
+) -> HistoryFilter:
+    return HistoryFilter(label, since, until)
+
+
+def resolve_after(cursor: str | None, offset: int) -> tuple[datetime, int] | None:
+    if cursor is None:
+        return None
+    if offset:
+        raise HTTPException(400, "Use either offset or a cursor, not both")
+    try:
+        created_at, row_id = decode_cursor(cursor)
+        if not isinstance(row_id, int):
+            raise ValueError(cursor)
+        return datetime.fromisoformat(created_at), row_id
+    except (ValueError, TypeError) as err:
+        raise HTTPException(400, "Invalid cursor") from err
+
+
+def history_query(
+    user_id: int, f: HistoryFilter, limit: int, offset: int, after: tuple[datetime, int] | None
+) -> Select:
+    """Newest-first page of ``user_id``'s predictions; keyset (``after``) or offset."""
+    query = select(_P).where(_P.user_id == user_id, *f.where())
+    if after is not None:
+        # row comparison, so the (user_id, created_at, id) index bounds the scan
+        query = query.where(tuple_(_P.created_at, _P.id) < after)
+    return query.order_by(_P.created_at.desc(), _P.id.desc()).offset(offset).limit(limit)
+
+
+def next_cursor(rows, limit: int) -> dict[str, str]:
+    if len(rows) < limit:
+        return {}
+    last = rows[-1]
+    return {"X-Next-Cursor": encode_cursor(last.created_at.isoformat(), last.id)}
+
+
+# Aggregates are built as one query over raw rows plus, with PREDICTIONS_ROLLUPS, one
+# over the daily rollups for the whole UTC days they already cover; the per-query
+# results are then summed by key (every query yields ``key, count[, confidence_sum]``).
+RollupDays = tuple[date | None, date]
+
+
+def watermark_query() -> Select:
+    return select(models.RollupState.rolled_up_to).where(
+        models.RollupState.name == _R.__tablename__
     )
-    db.add(rec)
-    db.commit()
-    return {"label": label, "probabilities": probs}
+
+
+def rollup_days(f: HistoryFilter, rolled_up_to: date | None) -> RollupDays | None:
+    """The whole days [lo, hi) of ``f``'s range the rollups can answer (lo None: unbounded)."""
+    if rolled_up_to is None:
+        return None
+    lo = hi = None
+    if f.since is not None:
+        since = f.since if f.since.tzinfo else f.since.replace(tzinfo=UTC)
+        lo = since.astimezone(UTC).date()
+        if utc_midnight(lo) < since:
+            lo += timedelta(days=1)
+    hi = rolled_up_to
+    if f.until is not None:
+        until = f.until if f.until.tzinfo else f.until.replace(tzinfo=UTC)
+        hi = min(hi, until.astimezone(UTC).date())
+    if lo is not None and lo >= hi:
+        return None
+    return lo, hi
+
+
+def _raw_where(user_id: int, f: HistoryFilter, days: RollupDays | None) -> list:
+    conds = [_P.user_id == user_id, *f.where()]
+    if days is not None:
+        lo, hi = days
+        rest = _P.created_at >= utc_midnight(hi)
+        if lo is not None:
+            rest = or_(_P.created_at < utc_midnight(lo), rest)
+        conds.append(rest)
+    return conds
+
+
+def _rollup_where(user_id: int, f: HistoryFilter, days: RollupDays) -> list:
+    lo, hi = days
+    conds = [_R.user_id == user_id, _R.day < hi]
+    if lo is not None:
+        conds.append(_R.day >= lo)
+    if f.label is not None:
+        conds.append(_R.pred_label == f.label)
+    return conds
+
+
+def merge_counts(results: Iterable[Iterable]) -> dict:
+    totals: dict = {}
+    for rows in results:
+        for key, *vals in rows:
+            acc = totals.get(key)
+            totals[key] = vals if acc is None else [a + b for a, b in zip(acc, vals, strict=True)]
+    return totals
+
+
+def label_counts_queries(user_id: int, f: HistoryFilter, rolled_up_to: date | None) -> list:
+    days = rollup_days(f, rolled_up_to)
+    queries = [
+        select(_P.pred_label, func.count(), func.sum(_P.pred_confidence))
+        .where(*_raw_where(user_id, f, days))
+        .group_by(_P.pred_label)
+    ]
+    if days is not None:
+        queries.append(
+            select(_R.pred_label, func.sum(_R.count), func.sum(_R.confidence_sum))
+            .where(*_rollup_where(user_id, f, days))
+            .group_by(_R.pred_label)
+        )
+    return queries
+
+
+def label_counts(results: Iterable[Iterable]) -> list[dict]:
+    totals = merge_counts(results)
+    ordered = sorted(totals.items(), key=lambda kv: (-kv[1][0], kv[0]))
+    return [{"label": k, "count": n, "avg_confidence": s / n} for k, (n, s) in ordered]
+
+
+def confidence_queries(
+    user_id: int, f: HistoryFilter, rolled_up_to: date | None, buckets: int
+) -> list:
+    # rollup buckets can only be merged into coarser buckets whose edges line up
+    aligned = models.ROLLUP_BUCKETS % buckets == 0
+    days = rollup_days(f, rolled_up_to) if aligned else None
+    # width_bucket puts confidence == 1.0 in bucket n+1; fold it into the last one
+    bucket = func.least(func.width_bucket(_P.pred_confidence, 0.0, 1.0, buckets), buckets)
+    queries = [select(bucket, func.count()).where(*_raw_where(user_id, f, days)).group_by(bucket)]
+    if days is not None:
+        coarse = (_R.bucket - 1) // (models.ROLLUP_BUCKETS // buckets) + 1
+        queries.append(
+            select(coarse, func.sum(_R.count))
+            .where(*_rollup_where(user_id, f, days))
+            .group_by(coarse)
+        )
+    return queries
+
+
+def confidence_histogram(results: Iterable[Iterable], buckets: int) -> list[dict]:
+    counts = merge_counts(results)
+    return [
+        {"lo": (i - 1) / buckets, "hi": i / buckets, "count": counts.get(i, [0])[0]}
+        for i in range(1, buckets + 1)
+    ]
+
+
+def daily_queries(user_id: int, f: HistoryFilter, rolled_up_to: date | None) -> list:
+    days = rollup_days(f, rolled_up_to)
+    day = cast(func.date_trunc("day", func.timezone("UTC", _P.created_at)), Date)
+    queries = [select(day, func.count()).where(*_raw_where(user_id, f, days)).group_by(day)]
+    if days is not None:
+        queries.append(
+            select(_R.day, func.sum(_R.count))
+            .where(*_rollup_where(user_id, f, days))
+            .group_by(_R.day)
+        )
+    return queries
+
+
+def daily_counts(results: Iterable[Iterable]) -> list[dict]:
+    return [{"day": d, "count": n} for d, (n,) in sorted(merge_counts(results).items())]
+
+
+@router.get("/predictions", response_model=list[schemas.PredictionOut])
+def list_predictions(
+    response: Response,
+    limit: int = Query(20, ge=1, le=settings.predictions_max_limit),
+    offset: int = Query(0, ge=0),
+    cursor: str | None = None,
+    f: HistoryFilter = Depends(history_filters),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    """The caller's predictions, newest first; follow ``X-Next-Cursor`` for the next page."""
+    after = resolve_after(cursor, offset)
+    rows = db.scalars(history_query(current_user.id, f, limit, offset, after)).all()
+    response.headers.update(next_cursor(rows, limit))
+    return rows
+
+
+def _watermark(db: Session) -> date | None:
+    return db.scalar(watermark_query()) if settings.predictions_rollups else None
+
+
+@router.get("/predictions/labels", response_model=list[schemas.LabelCount])
+def prediction_labels(
+    f: HistoryFilter = Depends(history_filters),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    queries = label_counts_queries(current_user.id, f, _watermark(db))
+    return label_counts(db.execute(q).all() for q in queries)
+
+
+@router.get("/predictions/confidence", response_model=list[schemas.ConfidenceBucket])
+def prediction_confidence(
+    buckets: int = Query(10, ge=1, le=100),
+    f: HistoryFilter = Depends(history_filters),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    queries = confidence_queries(current_user.id, f, _watermark(db), buckets)
+    return confidence_histogram((db.execute(q).all() for q in queries), buckets)
+
+
+@router.get("/predictions/daily", response_model=list[schemas.DailyCount])
+def prediction_daily(
+    f: HistoryFilter = Depends(history_filters),
+    db: Session = Depends(get_read_db),
+    current_user=Depends(get_current_user),
+):
+    """Predictions per UTC day (days without any are omitted)."""
+    queries = daily_queries(current_user.id, f, _watermark(db))
+    return daily_counts(db.execute(q).all() for q in queries)
+
+
+@router.get("/stats")
+def stats(current_user=Depends(get_current_user)):
+    return {
+        "batcher": batcher.stats(),
+        "prediction_log": prediction_log.stats(),
+        "prediction_cache": prediction_cache.stats(),
+    }
+
+
+@router.get("/models")
+def list_models(current_user=Depends(get_current_user)):
+    """Active version, versions on disk, and load time / size / memory per loaded model."""
+    return model_registry.report()
+
+
+@router.post("/models/{version}/activate")
+def activate_model(version: str, reload: bool = False, current_user=Depends(get_current_user)):
+    """Serve ``version`` from now on (this worker); ``reload`` re-reads it from disk first."""
+    try:
+        if reload:
+            bundle = model_registry.load(version, activate=True)
+        else:
+            bundle = model_registry.activate(version)
+    except KeyError as err:
+        raise HTTPException(status_code=404, detail=f"Unknown model version {version!r}") from err
+    return bundle.report()
@@ -1,6 +1,7 @@
-from datetime import datetime
+from datetime import date, datetime
+from typing import Literal
 
-from pydantic import BaseModel, EmailStr, Field, field_validator
+from pydantic import BaseModel, ConfigDict, EmailStr, Field, field_validator
 
 
 # ---------- Items ----------
@@ -19,6 +20,46 @@ class ItemOut(BaseModel):
         from_attributes = True  # pydantic v2
 
 
+class ItemUpdate(ItemCreate):
+    id: int
+
+
+# "atomic": any bad row rejects the whole request; "partial": bad rows are reported
+# in ``errors`` and the rest is applied
+BulkMode = Literal["atomic", "partial"]
+
+
+class ItemBulkCreate(BaseModel):
+    items: list[ItemCreate] = Field(min_length=1)
+    mode: BulkMode = "atomic"
+
+
+class ItemBulkUpdate(BaseModel):
+    items: list[ItemUpdate] = Field(min_length=1)
+    mode: BulkMode = "atomic"
+
+
+class ItemBulkDelete(BaseModel):
+    ids: list[int] = Field(min_length=1)
+    mode: BulkMode = "atomic"
+
+
+class BulkError(BaseModel):
+    index: int
+    id: int | None = None
+    detail: str
+
+
+class ItemBulkOut(BaseModel):
+    items: list[ItemOut]
+    errors: list[BulkError] = []
+
+
+class ItemBulkDeleteOut(BaseModel):
+    deleted: list[int]
+    errors: list[BulkError] = []
+
+
 # ---------- Auth / Users ----------
 class UserCreate(BaseModel):
     email: EmailStr
@@ -106,6 +147,8 @@ class PasswordChange(BaseModel):
 
 # ---------- ML (Iris) ----------
 class IrisIn(BaseModel):
+    model_config = ConfigDict(allow_inf_nan=False)
+
     sepal_length: float
     sepal_width: float
     petal_length: float
@@ -115,3 +158,31 @@ class IrisIn(BaseModel):
 class IrisOut(BaseModel):
     label: str
     probabilities: dict[str, float]
+
+
+class PredictionOut(BaseModel):
+    id: int
+    features: dict[str, float] = Field(validation_alias="feature_map")
+    pred_label: str
+    pred_confidence: float
+    created_at: datetime
+
+    class Config:
+        from_attributes = True
+
+
+class LabelCount(BaseModel):
+    label: str
+    count: int
+    avg_confidence: float
+
+
+class ConfidenceBucket(BaseModel):
+    lo: float
+    hi: float
+    count: int
+
+
+class DailyCount(BaseModel):
+    day: date
+    count: int
@@ -1,46 +1,128 @@
 # ruff: noqa: B008
+from dataclasses import dataclass
 from datetime import UTC, datetime, timedelta
 
 from fastapi import Depends, HTTPException, status
 from fastapi.security import OAuth2PasswordBearer
 from jose import JWTError, jwt
 from passlib.context import CryptContext
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.orm import Session
 
 from . import models
+from .cache import LRUCache
 from .config import settings
-from .db import get_db
+from .db import get_async_db, get_db
+from .hashing import HashPool, PoolSaturated
+from .tracing import span
 
-pwd = CryptContext(schemes=["pbkdf2_sha256"], deprecated="auto")
+
+def build_crypt_context(schemes: list[str], rounds: dict[str, int]) -> CryptContext:
+    # the first scheme hashes, the rest only verify; a hash below its scheme's
+    # configured cost (or in an old scheme) reports needs_update and is rehashed on login
+    opts = {}
+    for scheme, n in rounds.items():
+        opts[f"{scheme}__default_rounds"] = n
+        opts[f"{scheme}__min_rounds"] = n
+    return CryptContext(schemes=schemes, deprecated="auto", **opts)
+
+
+pwd = build_crypt_context(settings.password_schemes, settings.password_rounds)
+hash_pool = HashPool(
+    settings.password_hash_workers,
+    settings.password_hash_max_pending,
+    settings.password_hash_timeout_s,
+)
 oauth2_scheme = OAuth2PasswordBearer(tokenUrl="/auth/login")
 
 
+@dataclass(frozen=True, slots=True)
+class Principal:
+    """The authenticated user as seen by request handlers (never the ORM row)."""
+
+    id: int
+    email: str
+    created_at: datetime | None = None  # unknown when built from token claims alone
+
+
+# token subject (email) -> Principal; saves the users lookup on every request
+principal_cache = LRUCache(settings.auth_cache_size, ttl=settings.auth_cache_ttl_s)
+
+
+def _saturated() -> HTTPException:
+    return HTTPException(
+        status_code=status.HTTP_503_SERVICE_UNAVAILABLE,
+        detail="Too many concurrent password operations, retry shortly",
+        headers={"Retry-After": "1"},
+    )
+
+
 def hash_password(p: str) -> str:
-    return pwd.hash(p)
+    try:
+        with span("hash"):
+            return hash_pool.run(pwd.hash, p)
+    except PoolSaturated as err:
+        raise _saturated() from err
 
 
 def verify_password(p: str, h: str) -> bool:
-    return pwd.verify(p, h)
+    return verify_and_update(p, h)[0]
+
+
+def verify_and_update(p: str, h: str) -> tuple[bool, str | None]:
+    """Verify ``p`` against ``h``; also returns a fresh hash if ``h`` is outdated."""
+    try:
+        with span("hash"):
+            return hash_pool.run(pwd.verify_and_update, p, h)
+    except PoolSaturated as err:
+        raise _saturated() from err
+
+
+async def hash_password_async(p: str) -> str:
+    try:
+        with span("hash"):
+            return await hash_pool.run_async(pwd.hash, p)
+    except PoolSaturated as err:
+        raise _saturated() from err
 
 
-def create_access_token(sub: str, expires_minutes: int) -> str:
+async def verify_password_async(p: str, h: str) -> bool:
+    return (await verify_and_update_async(p, h))[0]
+
+
+async def verify_and_update_async(p: str, h: str) -> tuple[bool, str | None]:
+    try:
+        with span("hash"):
+            return await hash_pool.run_async(pwd.verify_and_update, p, h)
+    except PoolSaturated as err:
+        raise _saturated() from err
+
+
+def create_access_token(sub: str, expires_minutes: int, user_id: int | None = None) -> str:
     to_encode = {
         "sub": sub,
         "exp": datetime.now(UTC) + timedelta(minutes=expires_minutes),
     }
+    if user_id is not None:
+        to_encode["uid"] = user_id
     return jwt.encode(to_encode, settings.secret_key, algorithm=settings.algorithm)
 
 
-def get_current_user(
-    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
-) -> models.User:
-    cred_exc = HTTPException(
+def _credentials_exception() -> HTTPException:
+    return HTTPException(
         status_code=status.HTTP_401_UNAUTHORIZED,
         detail="Invalid credentials",
         headers={"WWW-Authenticate": "Bearer"},
     )
+
+
+def _principal_from_token(token: str) -> tuple[str, Principal | None]:
+    """Decode ``token`` into its subject and, when no DB lookup is needed, the principal."""
+    cred_exc = _credentials_exception()
     try:
-        payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
+        with span("jwt"):
+            payload = jwt.decode(token, settings.secret_key, algorithms=[settings.algorithm])
         email: str | None = payload.get("sub")
         if not email:
             raise cred_exc
@@ -49,7 +131,40 @@ def get_current_user(
     except JWTError as err:
         raise cred_exc from err
 
-    user = db.query(models.User).filter(models.User.email == email).first()
+    uid = payload.get("uid")
+    if settings.jwt_user_id_claim and isinstance(uid, int):
+        return email, Principal(id=uid, email=email)
+    if settings.auth_cache_enabled:
+        return email, principal_cache.get(email)
+    return email, None
+
+
+def _remember(user: models.User | None) -> Principal:
     if not user:
-        raise cred_exc
-    return user
+        raise _credentials_exception()
+    principal = Principal(id=user.id, email=user.email, created_at=user.created_at)
+    if settings.auth_cache_enabled:
+        principal_cache.set(user.email, principal)
+    return principal
+
+
+def get_current_user(
+    token: str = Depends(oauth2_scheme), db: Session = Depends(get_db)
+) -> Principal:
+    email, principal = _principal_from_token(token)
+    if principal is not None:
+        return principal
+    with span("auth_lookup"):
+        user = db.query(models.User).filter(models.User.email == email).first()
+    return _remember(user)
+
+
+async def get_current_user_async(
+    token: str = Depends(oauth2_scheme), db: AsyncSession = Depends(get_async_db)
+) -> Principal:
+    email, principal = _principal_from_token(token)
+    if principal is not None:
+        return principal
+    with span("auth_lookup"):
+        user = await db.scalar(select(models.User).where(models.User.email == email))
+    return _remember(user)
@@ -0,0 +1,59 @@
+"""Fast JSON responses for trusted data (``FAST_RESPONSES``).
+
+Rows we just read from the database, or dicts our own code built, already have the
+shape of their response model, so validating them again buys nothing. The fast path
+copies the model's fields out of the row and encodes them in one call: with ``orjson``
+when it is installed, else ``pydantic_core.to_json``. Either way the response holds the
+same JSON values the response model would have produced, though not always the same
+bytes: very small and large floats are spelled differently (``0.00001`` / ``1e20``
+where the stdlib writes ``1e-05`` / ``1e+20``).
+"""
+
+from collections.abc import Mapping
+from functools import cache
+from typing import Any
+
+from fastapi import Response
+from pydantic import BaseModel
+from pydantic_core import to_json
+
+try:
+    import orjson
+except ImportError:  # optional
+    orjson = None
+
+from .config import settings
+
+
+def dumps(obj: Any) -> bytes:
+    if orjson is not None:
+        # UTC as "Z" and numpy scalars as numbers, like pydantic
+        return orjson.dumps(obj, option=orjson.OPT_UTC_Z | orjson.OPT_SERIALIZE_NUMPY)
+    return to_json(obj)
+
+
+class FastJSONResponse(Response):
+    media_type = "application/json"
+
+    def render(self, content: Any) -> bytes:
+        return dumps(content)
+
+
+@cache
+def fields(schema: type[BaseModel]) -> tuple[str, ...]:
+    return tuple(schema.model_fields)
+
+
+def as_dict(schema: type[BaseModel], obj: Any) -> dict[str, Any]:
+    """``obj``'s values for ``schema``'s fields, unvalidated (from a mapping or attributes)."""
+    if isinstance(obj, Mapping):
+        return {f: obj[f] for f in fields(schema)}
+    return {f: getattr(obj, f) for f in fields(schema)}
+
+
+def fast_response(schema: type[BaseModel], obj: Any, status_code: int = 200) -> Any:
+    """``obj`` encoded as ``schema`` when FAST_RESPONSES is on; otherwise ``obj`` itself,
+    for the route's ``response_model`` to validate as usual."""
+    if not settings.fast_responses:
+        return obj
+    return FastJSONResponse(as_dict(schema, obj), status_code=status_code)
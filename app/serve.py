@@ -0,0 +1,290 @@
+"""Prefork launcher: one preloaded parent, N forked uvicorn workers on a shared socket.
+
+    python -m app.serve --host 0.0.0.0 --port 8000            # SERVER_WORKERS, 0 = auto
+    python -m app.serve --workers 4 --max-requests 50000
+
+The parent imports the app and loads the models once, freezes the GC (so reference
+counting and collections do not dirty the shared pages) and forks the workers, which
+start serving without importing or loading anything. It then supervises them:
+
+* a worker that exits is replaced (after a 1 s pause if it died right after starting)
+* SIGHUP: rolling restart, with models whose artifact changed reloaded first (code is
+  not reloaded; restart the launcher for that)
+* SIGTERM / SIGINT: workers stop accepting, finish in-flight requests (up to
+  SERVER_GRACEFUL_TIMEOUT_S) and exit; stragglers are killed
+
+Worker count 0 means one per CPU this process may use (affinity and cgroup quota),
+capped so that workers x (DB_POOL_SIZE + DB_MAX_OVERFLOW) <= SERVER_DB_CONNECTIONS.
+"""
+
+import argparse
+import gc
+import logging
+import math
+import os
+import random
+import select
+import signal
+import socket
+import sys
+import time
+from pathlib import Path
+
+from .config import settings
+
+log = logging.getLogger("app.serve")
+
+CRASH_WINDOW_S = 1.0  # a worker dying sooner than this after its start is crash-looping
+
+
+def available_cpus() -> float:
+    """CPUs this process may use: its affinity mask, bounded by a cgroup v2 CPU quota."""
+    try:
+        cpus: float = len(os.sched_getaffinity(0))
+    except AttributeError:  # not on Linux
+        cpus = os.cpu_count() or 1
+    try:
+        quota, period = Path("/sys/fs/cgroup/cpu.max").read_text().split()
+        if quota != "max":
+            cpus = min(cpus, int(quota) / int(period))
+    except (OSError, ValueError):
+        pass
+    return cpus
+
+
+def auto_workers(cpus: float, db_connections: int = 0) -> int:
+    """One worker per (whole or partial) CPU, within the DB connection budget."""
+    workers = max(1, math.ceil(cpus))
+    per_worker = settings.db_pool_size + settings.db_max_overflow
+    if db_connections > 0 and per_worker > 0:
+        workers = min(workers, max(1, db_connections // per_worker))
+    return workers
+
+
+def bind_socket(host: str, port: int, backlog: int) -> socket.socket:
+    family = socket.AF_INET6 if ":" in host else socket.AF_INET
+    sock = socket.socket(family, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_REUSEADDR, 1)
+    sock.bind((host, port))
+    sock.listen(backlog)
+    sock.set_inheritable(True)
+    return sock
+
+
+def preload_app():
+    """Import the app and load its models in this (parent) process."""
+    from .main import ML_ENABLED, app
+
+    if ML_ENABLED:
+        from .model import registry
+
+        registry.preload(settings.model_preload)
+    return app
+
+
+def disable_per_process_cache(workers: int) -> None:
+    """Turn the items cache off when several workers would each keep their own.
+
+    Its invalidation only reaches the worker that handled the write: the others would
+    serve the old body and ETag for up to ITEMS_CACHE_TTL_S. A shared backend plugged
+    into ``items_cache.backend`` keeps it on.
+    """
+    from .respcache import MemoryBackend, items_cache
+
+    if workers > 1 and settings.items_cache_enabled:
+        if isinstance(items_cache.backend, MemoryBackend):
+            log.warning("items cache is per process; turned off for %d workers", workers)
+            settings.items_cache_enabled = False
+
+
+class Supervisor:
+    def __init__(
+        self,
+        app,
+        sock: socket.socket,
+        workers: int,
+        graceful_timeout_s: float = 30.0,
+        max_requests: int = 0,
+        access_log: bool = False,
+    ):
+        self.app = app
+        self.sock = sock
+        self.workers = workers
+        self.graceful_timeout_s = graceful_timeout_s
+        self.max_requests = max_requests
+        self.access_log = access_log
+        self.children: dict[int, float] = {}  # pid -> start time
+        self._signals: list[int] = []
+        self._wake_r, self._wake_w = os.pipe()
+        self._stopping = False
+
+    # ---------- parent ----------
+    def _on_signal(self, signum, frame) -> None:
+        self._signals.append(signum)
+        os.write(self._wake_w, b"\0")
+
+    def run(self) -> int:
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, self._on_signal)
+        os.set_blocking(self._wake_r, False)
+        os.set_blocking(self._wake_w, False)
+        log.info("listening on %s with %d workers", self.sock.getsockname(), self.workers)
+        for _ in range(self.workers):
+            self.spawn()
+        while not self._stopping:
+            select.select([self._wake_r], [], [], 1.0)
+            try:
+                os.read(self._wake_r, 1024)
+            except BlockingIOError:
+                pass
+            signals, self._signals = self._signals, []
+            if signal.SIGTERM in signals or signal.SIGINT in signals:
+                self._stopping = True
+            elif signal.SIGHUP in signals:
+                self.reload()
+            self.reap()
+        return self.shutdown()
+
+    def spawn(self) -> int:
+        pid = os.fork()
+        if pid == 0:
+            code = 0
+            try:
+                self._worker()
+            except SystemExit as exc:  # uvicorn exits 3 when the app fails to start
+                code = exc.code if isinstance(exc.code, int) else 1
+            except BaseException:
+                log.exception("worker crashed")
+                code = 1
+            os._exit(code)  # never return into the parent's code
+        self.children[pid] = time.monotonic()
+        log.info("worker %d started", pid)
+        return pid
+
+    def reap(self) -> None:
+        while self.children:
+            try:
+                pid, status = os.waitpid(-1, os.WNOHANG)
+            except ChildProcessError:
+                return
+            if pid == 0:
+                return
+            started = self.children.pop(pid, None)
+            if started is None:
+                continue
+            code = os.waitstatus_to_exitcode(status)
+            log.info("worker %d exited (%d)", pid, code)
+            if self._stopping:
+                continue
+            if time.monotonic() - started < CRASH_WINDOW_S:
+                time.sleep(1.0)  # do not spin if workers die on startup
+            self.spawn()
+
+    def reload(self) -> None:
+        """Replace every worker, new ones first, so the socket always has listeners."""
+        from .main import ML_ENABLED
+
+        if ML_ENABLED:
+            from .model import registry
+
+            changed = registry.check_for_updates()
+            if changed:
+                log.info("reloaded models %s", ", ".join(changed))
+        old = list(self.children)
+        for pid in old:
+            self.children.pop(pid)
+            self.spawn()
+            os.kill(pid, signal.SIGTERM)  # drains, then exits
+        self._wait(old, self.graceful_timeout_s)
+
+    def shutdown(self) -> int:
+        pids = list(self.children)
+        for pid in pids:
+            os.kill(pid, signal.SIGTERM)
+        self._wait(pids, self.graceful_timeout_s + 1.0)
+        self.children.clear()
+        return 0
+
+    def _wait(self, pids: list[int], timeout: float) -> None:
+        deadline = time.monotonic() + timeout
+        pending = set(pids)
+        while pending and time.monotonic() < deadline:
+            for pid in list(pending):
+                try:
+                    done, _ = os.waitpid(pid, os.WNOHANG)
+                except ChildProcessError:
+                    done = pid
+                if done:
+                    pending.discard(pid)
+            time.sleep(0.05)
+        for pid in pending:
+            log.warning("worker %d did not stop in %.0f s; killing it", pid, timeout)
+            os.kill(pid, signal.SIGKILL)
+            os.waitpid(pid, 0)
+
+    # ---------- worker ----------
+    def _worker(self) -> None:
+        import uvicorn
+
+        from . import db
+
+        for sig in (signal.SIGTERM, signal.SIGINT, signal.SIGHUP, signal.SIGCHLD):
+            signal.signal(sig, signal.SIG_DFL)  # uvicorn installs its own TERM/INT handlers
+        os.close(self._wake_r)
+        os.close(self._wake_w)
+        gc.enable()
+        random.seed()
+        if db.get_engine.cache_info().currsize:
+            # the parent should never connect, but a pool must not be shared across forks
+            db.get_engine().dispose(close=False)
+        config = uvicorn.Config(
+            self.app,
+            lifespan="on",
+            access_log=self.access_log,
+            timeout_graceful_shutdown=self.graceful_timeout_s,
+            limit_max_requests=self.max_requests or None,
+            # spread restarts so the workers do not all recycle at once
+            limit_max_requests_jitter=self.max_requests // 10,
+        )
+        uvicorn.Server(config).run(sockets=[self.sock])
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.serve",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--host", default=settings.server_host)
+    parser.add_argument("--port", type=int, default=settings.server_port)
+    parser.add_argument("--workers", type=int, default=settings.server_workers)
+    parser.add_argument("--backlog", type=int, default=settings.server_backlog)
+    parser.add_argument(
+        "--graceful-timeout", type=float, default=settings.server_graceful_timeout_s
+    )
+    parser.add_argument("--max-requests", type=int, default=settings.server_max_requests)
+    parser.add_argument("--access-log", action="store_true")
+    args = parser.parse_args(argv)
+    logging.basicConfig(level=logging.INFO, format="%(levelname)s [%(process)d] %(message)s")
+
+    workers = args.workers
+    if workers <= 0:
+        cpus = available_cpus()
+        workers = auto_workers(cpus, settings.server_db_connections)
+        log.info("%.1f CPUs available: %d workers", cpus, workers)
+    # objects created while importing are long-lived: no collections while loading,
+    # then move them all to the permanent generation before forking
+    gc.disable()
+    sock = bind_socket(args.host, args.port, args.backlog)
+    app = preload_app()
+    disable_per_process_cache(workers)
+    gc.collect()
+    gc.freeze()
+    supervisor = Supervisor(
+        app, sock, workers, args.graceful_timeout, args.max_requests, args.access_log
+    )
+    sys.exit(supervisor.run())
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,141 @@
+"""Cold-start profile of the API, with budgets a CI job can enforce:
+
+    python -m app.startup
+    ENABLED_ROUTERS='["items"]' python -m app.startup --path /items --forbid numpy sklearn
+    python -m app.startup --import-budget-ms 1500 --first-request-budget-ms 4000 --json out.json
+
+Starts a fresh interpreter under ``-X importtime`` (configured by the environment, like
+a worker), imports app.main, runs the lifespan startup (model preload included) and
+serves one in-process GET. Prints the phases, import time per top-level package and
+the slowest modules (everything imported until the response, so startup work like the
+model load and the test client's httpx are included), and exits 1 if a phase is over
+its budget or a ``--forbid`` package was imported.
+"""
+
+import argparse
+import json
+import re
+import subprocess
+import sys
+import time
+from collections import Counter
+from typing import Any
+
+_CHILD = """
+import json, sys, time
+t0 = time.perf_counter()
+from app.main import app
+t1 = time.perf_counter()
+from fastapi.testclient import TestClient
+t2 = time.perf_counter()
+with TestClient(app) as client:
+    t3 = time.perf_counter()
+    status = client.get(sys.argv[1]).status_code
+    t4 = time.perf_counter()
+print("STARTUP " + json.dumps({
+    "import_ms": (t1 - t0) * 1000,
+    "startup_ms": (t3 - t2) * 1000,
+    "first_request_ms": (t4 - t3) * 1000,
+    "status": status,
+}))
+"""
+
+# "import time:  self [us] | cumulative | <indent>module"
+_IMPORT_LINE = re.compile(r"^import time:\s+(\d+) \|\s+(\d+) \| (\s*)(\S+)$")
+
+
+def parse_importtime(stderr: str) -> list[tuple[str, int, int]]:
+    """(module, self us, cumulative us) for every module ``-X importtime`` reported."""
+    out = []
+    for line in stderr.splitlines():
+        m = _IMPORT_LINE.match(line)
+        if m:
+            out.append((m[4], int(m[1]), int(m[2])))
+    return out
+
+
+def profile(path: str = "/health", env: dict[str, str] | None = None) -> dict[str, Any]:
+    """Run the cold start in a subprocess and return its phases and import breakdown."""
+    start = time.perf_counter()
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", _CHILD, path],
+        capture_output=True,
+        text=True,
+        env=env,
+    )
+    total_ms = (time.perf_counter() - start) * 1000
+    line = next((ln for ln in proc.stdout.splitlines() if ln.startswith("STARTUP ")), None)
+    if proc.returncode or line is None:
+        raise RuntimeError(f"startup failed (exit {proc.returncode}):\n{proc.stderr[-4000:]}")
+    report = json.loads(line.removeprefix("STARTUP "))
+    modules = parse_importtime(proc.stderr)
+    by_package: Counter[str] = Counter()
+    for name, self_us, _ in modules:
+        by_package[name.partition(".")[0]] += self_us
+    report.update(
+        path=path,
+        process_ms=total_ms,  # interpreter start to exit, as a supervisor would see it
+        packages_ms={k: v / 1000 for k, v in by_package.most_common()},
+        modules_ms={name: cum / 1000 for name, _, cum in modules},
+    )
+    return report
+
+
+def check(report: dict[str, Any], budgets: dict[str, float], forbid: list[str]) -> list[str]:
+    """Budget violations in ``report`` (phase -> max ms) and forbidden packages imported."""
+    problems = [
+        f"{phase} {report[phase]:.0f} ms > budget {limit:.0f} ms"
+        for phase, limit in budgets.items()
+        if report[phase] > limit
+    ]
+    problems += [f"{pkg} was imported" for pkg in forbid if pkg in report["packages_ms"]]
+    if report["status"] >= 500:
+        problems.append(f"GET {report['path']} returned {report['status']}")
+    return problems
+
+
+def main(argv: list[str] | None = None) -> None:
+    parser = argparse.ArgumentParser(
+        prog="python -m app.startup",
+        description=__doc__,
+        formatter_class=argparse.RawDescriptionHelpFormatter,
+    )
+    parser.add_argument("--path", default="/health", help="first request (GET)")
+    parser.add_argument("--top", type=int, default=15, help="slowest modules to list")
+    parser.add_argument("--import-budget-ms", type=float)
+    parser.add_argument("--startup-budget-ms", type=float)
+    parser.add_argument("--first-request-budget-ms", type=float)
+    parser.add_argument("--process-budget-ms", type=float)
+    parser.add_argument("--forbid", nargs="*", default=[], help="packages that must not load")
+    parser.add_argument("--json", help="also write the full report here")
+    args = parser.parse_args(argv)
+
+    report = profile(args.path)
+    phases = ["import_ms", "startup_ms", "first_request_ms", "process_ms"]
+    for phase in phases:
+        print(f"{phase:>17}: {report[phase]:8.1f}")
+    print(f"{'status':>17}: {report['status']}")
+    print("\nimport time by package (self, ms)")
+    for pkg, ms in list(report["packages_ms"].items())[: args.top]:
+        print(f"  {ms:8.1f}  {pkg}")
+    print("\nslowest modules (cumulative, ms)")
+    slowest = sorted(report["modules_ms"].items(), key=lambda kv: -kv[1])[: args.top]
+    for name, ms in slowest:
+        print(f"  {ms:8.1f}  {name}")
+    if args.json:
+        with open(args.json, "w") as f:
+            json.dump(report, f, indent=2)
+
+    budgets = {
+        phase: limit
+        for phase in phases
+        if (limit := getattr(args, phase.removesuffix("_ms") + "_budget_ms")) is not None
+    }
+    problems = check(report, budgets, args.forbid)
+    for problem in problems:
+        print(f"OVER BUDGET: {problem}", file=sys.stderr)
+    sys.exit(1 if problems else 0)
+
+
+if __name__ == "__main__":
+    main()
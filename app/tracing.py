@@ -0,0 +1,140 @@
+import threading
+import time
+from contextvars import ContextVar
+
+from sqlalchemy import event
+from sqlalchemy.engine import Engine
+from sqlalchemy.orm import Session
+
+from .config import settings
+from .metrics import Histogram
+
+# per-request span totals (name -> seconds); None outside a traced request
+_timings: ContextVar[dict[str, float] | None] = ContextVar("trace_timings", default=None)
+
+_spans: dict[str, Histogram] = {}
+_routes: dict[tuple[str, str], Histogram] = {}
+_lock = threading.Lock()
+
+
+def _histogram(table: dict, key, name: str, help: str, labels: dict[str, str]) -> Histogram:
+    hist = table.get(key)
+    if hist is None:
+        with _lock:
+            hist = table.get(key)
+            if hist is None:
+                hist = table[key] = Histogram(name, help, labels=labels)
+    return hist
+
+
+def note(name: str, seconds: float) -> None:
+    """Add ``seconds`` to the current request's total for ``name`` (Server-Timing only)."""
+    timings = _timings.get()
+    if timings is not None:
+        timings[name] = timings.get(name, 0.0) + seconds
+
+
+def record(name: str, seconds: float) -> None:
+    """Observe ``seconds`` in span ``name``'s histogram and the current request's total."""
+    _histogram(
+        _spans, name, "span_seconds", "Time spent in instrumented hot paths", {"span": name}
+    ).observe(seconds)
+    note(name, seconds)
+
+
+class span:
+    """``with span("name"):`` times the block (a class, not @contextmanager: cheaper)."""
+
+    __slots__ = ("name", "start")
+
+    def __init__(self, name: str):
+        self.name = name
+
+    def __enter__(self) -> None:
+        self.start = time.perf_counter() if settings.tracing_enabled else None
+
+    def __exit__(self, *exc) -> None:
+        if self.start is not None:
+            record(self.name, time.perf_counter() - self.start)
+
+
+def _server_timing(timings: dict[str, float], total: float) -> bytes:
+    parts = [f"{name};dur={secs * 1000:.2f}" for name, secs in timings.items()]
+    parts.append(f"total;dur={total * 1000:.2f}")
+    return ", ".join(parts).encode("latin-1")
+
+
+class TimingMiddleware:
+    """Times every HTTP request per route template and collects its spans.
+
+    Plain ASGI (not BaseHTTPMiddleware) so streaming responses pass through untouched.
+    With ``server_timing`` the span totals so far are sent as a ``Server-Timing`` header.
+    """
+
+    def __init__(self, app, server_timing: bool = False):
+        self.app = app
+        self.server_timing = server_timing
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+        timings: dict[str, float] = {}
+        token = _timings.set(timings)
+        start = time.perf_counter()
+
+        async def send_wrapper(message):
+            if message["type"] == "http.response.start" and self.server_timing:
+                headers = list(message.get("headers", []))
+                headers.append(
+                    (b"server-timing", _server_timing(timings, time.perf_counter() - start))
+                )
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            _timings.reset(token)
+            route = scope.get("route")
+            # route templates keep the label set bounded; unmatched paths share one series
+            path = getattr(route, "path", "<unmatched>")
+            _histogram(
+                _routes,
+                (scope["method"], path),
+                "http_request_duration_seconds",
+                "Request latency by route template",
+                {"method": scope["method"], "route": path},
+            ).observe(time.perf_counter() - start)
+
+
+def _before_execute(conn, cursor, statement, parameters, context, executemany):
+    conn.info["trace_sql_start"] = time.perf_counter()
+
+
+def _after_execute(conn, cursor, statement, parameters, context, executemany):
+    start = conn.info.pop("trace_sql_start", None)
+    if start is not None:
+        record("sql", time.perf_counter() - start)
+
+
+def _before_commit(session):
+    session.info["trace_commit_start"] = time.perf_counter()
+
+
+def _after_commit(session):
+    start = session.info.pop("trace_commit_start", None)
+    if start is not None:
+        record("db_commit", time.perf_counter() - start)
+
+
+def instrument_engine(engine: Engine) -> None:
+    """Record statement execution time as span ``sql``."""
+    event.listen(engine, "before_cursor_execute", _before_execute)
+    event.listen(engine, "after_cursor_execute", _after_execute)
+
+
+def instrument_sessions() -> None:
+    """Record ``Session.commit`` (flush included) as span ``db_commit``; all sessions."""
+    event.listen(Session, "before_commit", _before_commit)
+    event.listen(Session, "after_commit", _after_commit)
@@ -1,2 +1,35 @@
+import base64
+import json
+from datetime import UTC, date, datetime
+
+
 def normalize_email(s: str) -> str:
     return s.strip().lower()
+
+
+def encode_cursor(*parts) -> str:
+    """Opaque pagination cursor for a keyset position (JSON-serializable parts)."""
+    raw = json.dumps(parts, separators=(",", ":")).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str) -> list:
+    """Inverse of ``encode_cursor``; raises ValueError on anything it did not produce."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        parts = json.loads(raw)
+    except (ValueError, TypeError) as err:
+        raise ValueError("malformed cursor") from err
+    if not isinstance(parts, list):
+        raise ValueError("malformed cursor")
+    return parts
+
+
+def like_pattern(q: str) -> str:
+    """``%q%`` with LIKE wildcards in ``q`` escaped (use with ``escape="\\\\"``)."""
+    escaped = q.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_")
+    return f"%{escaped}%"
+
+
+def utc_midnight(d: date) -> datetime:
+    return datetime(d.year, d.month, d.day, tzinfo=UTC)
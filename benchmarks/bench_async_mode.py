@@ -0,0 +1,69 @@
+"""Throughput and latency of the sync and async stacks under the same load.
+
+Starts ``uvicorn app.main:app`` once per mode (ASYNC_MODE=0/1) against DATABASE_URL
+and drives GET /items plus authenticated POST /ml/predict at a fixed concurrency:
+
+    python -m benchmarks.bench_async_mode --concurrency 64 --seconds 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+import httpx
+
+from .common import start_uvicorn
+
+EMAIL, PASSWORD = "bench-async@example.com", "Aa1!benchbench"
+ROW = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+async def _load(base: str, concurrency: int, seconds: float) -> list[float]:
+    async with httpx.AsyncClient(base_url=base, timeout=30) as c:
+        await c.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+        r = await c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        latencies: list[float] = []
+        stop = time.perf_counter() + seconds
+
+        async def worker(i: int):
+            n = 0
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                if (i + n) % 2:
+                    await c.get("/items")
+                else:
+                    await c.post("/ml/predict", headers=headers, json=ROW)
+                latencies.append(time.perf_counter() - t0)
+                n += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return latencies
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=32)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--port", type=int, default=8765)
+    args = ap.parse_args()
+
+    for mode, name in (("0", "sync"), ("1", "async")):
+        proc = start_uvicorn({"ASYNC_MODE": mode}, args.port)
+        try:
+            lat = asyncio.run(
+                _load(f"http://127.0.0.1:{args.port}", args.concurrency, args.seconds)
+            )
+        finally:
+            proc.terminate()
+            proc.wait()
+        q = statistics.quantiles(lat, n=100)
+        print(
+            f"{name:5s} {len(lat) / args.seconds:8.0f} req/s"
+            f"  p50 {q[49] * 1000:6.1f} ms  p99 {q[98] * 1000:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,51 @@
+"""Authenticated request throughput with and without the principal cache.
+
+Runs in-process against app.main:app and the database in DATABASE_URL:
+
+    python -m benchmarks.bench_auth_cache --requests 2000
+"""
+
+import argparse
+import time
+
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.security import principal_cache
+
+EMAIL, PASSWORD = "bench-auth@example.com", "Aa1!benchbench"
+
+
+def _run(c: TestClient, headers: dict, n: int) -> float:
+    start = time.perf_counter()
+    for _ in range(n):
+        r = c.get("/ml/stats", headers=headers)
+        assert r.status_code == 200, r.text
+    return n / (time.perf_counter() - start)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--requests", type=int, default=2000)
+    args = ap.parse_args()
+
+    c = TestClient(app)
+    c.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+    modes = [
+        ("db lookup", {"auth_cache_enabled": False, "jwt_user_id_claim": False}),
+        ("principal cache", {"auth_cache_enabled": True, "jwt_user_id_claim": False}),
+        ("user_id claim", {"auth_cache_enabled": False, "jwt_user_id_claim": True}),
+    ]
+    for name, overrides in modes:
+        for k, v in overrides.items():
+            setattr(settings, k, v)
+        principal_cache.clear()
+        r = c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        _run(c, headers, 50)  # warm up
+        print(f"{name:16s} {_run(c, headers, args.requests):9.0f} req/s")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,83 @@
+"""Throughput and peak Python memory of ``app.export`` against the offset-paged ORM reads
+it replaces. Seeds ``--rows`` items into DATABASE_URL and deletes them afterwards:
+
+    python -m benchmarks.bench_export --rows 200000
+"""
+
+import argparse
+import time
+import tracemalloc
+
+from sqlalchemy import delete, insert, select
+
+from app import models
+from app.db import SessionLocal, engine
+from app.export import ExportRange, stream_export
+
+
+def _measure(label: str, run) -> None:
+    tracemalloc.start()
+    t0 = time.perf_counter()
+    rows, size = run()
+    elapsed = time.perf_counter() - t0
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    print(
+        f"{label:>28}: {rows / elapsed:>9.0f} rows/s, {size / 2**20:>7.1f} MiB out, "
+        f"peak {peak / 2**20:.1f} MiB"
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=200_000)
+    ap.add_argument("--page", type=int, default=1000, help="limit per offset page")
+    args = ap.parse_args()
+
+    with engine.begin() as conn:
+        start = conn.scalar(select(models.Item.id).order_by(models.Item.id.desc()).limit(1)) or 0
+        for i in range(0, args.rows, 10_000):
+            n = min(10_000, args.rows - i)
+            conn.execute(
+                insert(models.Item),
+                [{"name": f"bench-export-{i + j}", "description": "x" * 40} for j in range(n)],
+            )
+    rng = ExportRange(after_id=start)
+
+    def offset_pages():
+        rows = size = offset = 0
+        with SessionLocal() as db:
+            while True:
+                page = db.scalars(
+                    select(models.Item)
+                    .where(models.Item.id > start)
+                    .order_by(models.Item.id)
+                    .offset(offset)
+                    .limit(args.page)
+                ).all()
+                if not page:
+                    return rows, size
+                rows += len(page)
+                size += sum(len(i.name) + len(i.description or "") for i in page)
+                offset += args.page
+                db.expunge_all()
+
+    def export(fmt, compress, batch_rows):
+        def run():
+            size = sum(len(c) for c in stream_export("items", fmt, compress, rng, batch_rows))
+            return args.rows, size
+
+        return run
+
+    try:
+        _measure(f"offset pages of {args.page}", offset_pages)
+        for batch_rows in (1000, 5000, 20_000):
+            _measure(f"ndjson, batch {batch_rows}", export("ndjson", "none", batch_rows))
+        _measure("csv + gzip, batch 5000", export("csv", "gzip", 5000))
+    finally:
+        with engine.begin() as conn:
+            conn.execute(delete(models.Item).where(models.Item.id > start))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,45 @@
+"""predict_proba latency: the sklearn pipeline vs the compiled linear fast path.
+
+Loads MODEL_PATH (default artifacts/iris_clf.joblib), compiles it as MODEL_COMPILED
+would, and times both paths for single rows and batches:
+
+    python -m benchmarks.bench_fastpath --batches 1,64,2048
+"""
+
+import argparse
+import statistics
+import timeit
+
+import joblib
+import numpy as np
+
+from app.config import settings
+from app.fastpath import compiled_or_original
+
+
+def _median_us(fn, number: int, repeat: int = 7) -> float:
+    return statistics.median(timeit.repeat(fn, number=number, repeat=repeat)) / number * 1e6
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--batches", default="1,64,2048")
+    args = ap.parse_args()
+
+    model = joblib.load(settings.model_path)["model"]
+    fast = compiled_or_original(model)
+    if fast is model:
+        raise SystemExit("model has no compiled fast path")
+    rng = np.random.default_rng(0)
+    print(f"{'rows':>6} {'pipeline us':>12} {'compiled us':>12} {'speedup':>8}")
+    for n in (int(b) for b in args.batches.split(",")):
+        X = rng.normal(3.0, 1.5, size=(n, fast.n_features_in_))
+        rows = X.tolist()  # what the endpoints hand over
+        number = max(10, 20_000 // n)
+        slow = _median_us(lambda r=rows: model.predict_proba(np.asarray(r, dtype=float)), number)
+        quick = _median_us(lambda r=rows: fast.predict_proba(np.asarray(r, dtype=float)), number)
+        print(f"{n:>6} {slow:>12.1f} {quick:>12.1f} {slow / quick:>7.1f}x")
+
+
+if __name__ == "__main__":
+    main()
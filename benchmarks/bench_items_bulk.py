@@ -0,0 +1,95 @@
+"""Rows/second for item writes: one request per row vs the set-based bulk endpoints.
+
+Runs in-process against the database in DATABASE_URL and removes what it creates:
+
+    python -m benchmarks.bench_items_bulk --rows 5000
+"""
+
+import argparse
+import time
+import uuid
+
+from fastapi.testclient import TestClient
+
+from app.main import app
+
+EMAIL = "bench-bulk@example.com"
+PASSWORD = "Aa1!benchbulkbench"
+
+
+def _headers(c: TestClient) -> dict[str, str]:
+    c.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+    r = c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+    r.raise_for_status()
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def _rate(n: int, fn) -> float:
+    t0 = time.perf_counter()
+    fn()
+    return n / (time.perf_counter() - t0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=5000)
+    ap.add_argument("--chunk", type=int, default=1000, help="rows per bulk request")
+    args = ap.parse_args()
+
+    c = TestClient(app)
+    h = _headers(c)
+    tag = f"bench-bulk-{uuid.uuid4().hex[:8]}"
+    rows = [{"name": f"{tag}-{i}", "description": "bench"} for i in range(args.rows)]
+    chunks = [rows[i : i + args.chunk] for i in range(0, len(rows), args.chunk)]
+
+    single: list[int] = []
+    bulk: list[int] = []
+    results = {
+        "create single": _rate(
+            args.rows,
+            lambda: single.extend(c.post("/items", headers=h, json=r).json()["id"] for r in rows),
+        ),
+        "create bulk": _rate(
+            args.rows,
+            lambda: bulk.extend(
+                i["id"]
+                for chunk in chunks
+                for i in c.post("/items/bulk", headers=h, json={"items": chunk}).json()["items"]
+            ),
+        ),
+        "update single": _rate(
+            args.rows,
+            lambda: [c.put(f"/items/{i}", headers=h, json={"name": f"{tag}-u"}) for i in single],
+        ),
+        "update bulk": _rate(
+            args.rows,
+            lambda: [
+                c.patch(
+                    "/items/bulk",
+                    headers=h,
+                    json={
+                        "items": [{"id": i, "name": f"{tag}-u"} for i in bulk[j : j + args.chunk]]
+                    },
+                )
+                for j in range(0, len(bulk), args.chunk)
+            ],
+        ),
+        "delete single": _rate(
+            args.rows, lambda: [c.delete(f"/items/{i}", headers=h) for i in single]
+        ),
+        "delete bulk": _rate(
+            args.rows,
+            lambda: [
+                c.request(
+                    "DELETE", "/items/bulk", headers=h, json={"ids": bulk[j : j + args.chunk]}
+                )
+                for j in range(0, len(bulk), args.chunk)
+            ],
+        ),
+    }
+    for name, rate in results.items():
+        print(f"{name:>14}: {rate:>10.0f} rows/s")
+
+
+if __name__ == "__main__":
+    main()
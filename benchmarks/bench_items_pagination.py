@@ -0,0 +1,75 @@
+"""Page latency for GET /items: deep OFFSET pages vs keyset cursors.
+
+Seeds ``--rows`` items (tagged so they can be removed afterwards) into the database in
+DATABASE_URL, then times the same query page_query() builds for the endpoint:
+
+    python -m benchmarks.bench_items_pagination --rows 1000000
+"""
+
+import argparse
+import statistics
+import time
+
+from sqlalchemy import delete, func, select, text
+
+from app import models
+from app.db import SessionLocal
+from app.routers.items import page_query
+
+TAG = "bench-page"
+
+
+def _time(db, stmt, repeat: int) -> float:
+    samples = []
+    for _ in range(repeat):
+        t0 = time.perf_counter()
+        db.scalars(stmt).all()
+        samples.append(time.perf_counter() - t0)
+    return statistics.median(samples) * 1000
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=1_000_000)
+    ap.add_argument("--limit", type=int, default=20)
+    ap.add_argument("--repeat", type=int, default=5)
+    ap.add_argument("--keep", action="store_true", help="leave the seeded rows in place")
+    args = ap.parse_args()
+
+    with SessionLocal() as db:
+        db.execute(
+            text(
+                "INSERT INTO items (name, description) "
+                "SELECT :tag || '-' || g, 'seeded' FROM generate_series(1, :n) AS g"
+            ),
+            {"tag": TAG, "n": args.rows},
+        )
+        db.commit()
+        db.execute(text("ANALYZE items"))
+        try:
+            total = db.scalar(select(func.count()).select_from(models.Item))
+            print(f"items: {total} rows, page size {args.limit}")
+            print(f"{'depth':>10} {'offset ms':>10} {'cursor ms':>10}")
+            depths = {0, 1_000, 10_000, 100_000, args.rows // 2, args.rows - args.limit}
+            for depth in sorted(depths):
+                if depth >= total:
+                    continue
+                # id of the row just above the page, i.e. what the previous page's cursor holds
+                after_id = None
+                if depth:
+                    after_id = db.scalar(
+                        select(models.Item.id).order_by(models.Item.id.desc()).offset(depth - 1)
+                    )
+                off = _time(db, page_query(None, args.limit, depth, None), args.repeat)
+                cur = _time(db, page_query(None, args.limit, 0, after_id), args.repeat)
+                print(f"{depth:>10} {off:>10.2f} {cur:>10.2f}")
+            search = _time(db, page_query("-4242", args.limit, 0, None), args.repeat)
+            print(f"substring search '%-4242%': {search:.2f} ms")
+        finally:
+            if not args.keep:
+                db.execute(delete(models.Item).where(models.Item.name.like(f"{TAG}-%")))
+                db.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,77 @@
+"""GET /items latency while a burst of logins hits the server.
+
+Starts ``uvicorn app.main:app`` twice against DATABASE_URL: once with hashing
+effectively unbounded (as many hash workers as request threads) and once with the
+default bounded pool, then runs ``--logins`` concurrent login loops next to a
+single reader timing GET /items:
+
+    python -m benchmarks.bench_login_burst --logins 64 --seconds 10
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from .common import start_uvicorn
+
+EMAIL, PASSWORD = "bench-burst@example.com", "Aa1!benchbench"
+
+MODES = {
+    "unbounded": {"PASSWORD_HASH_WORKERS": "40", "PASSWORD_HASH_MAX_PENDING": "10000"},
+    "bounded": {},
+}
+
+
+async def _burst(base: str, logins: int, seconds: float) -> tuple[list[float], Counter]:
+    async with httpx.AsyncClient(base_url=base, timeout=60) as c:
+        await c.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+        statuses: Counter = Counter()
+        reads: list[float] = []
+        stop = time.perf_counter() + seconds
+
+        async def login():
+            while time.perf_counter() < stop:
+                r = await c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+                statuses[r.status_code] += 1
+                if r.status_code == 503:
+                    await asyncio.sleep(float(r.headers.get("Retry-After", "1")))
+
+        async def read():
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                await c.get("/items")
+                reads.append(time.perf_counter() - t0)
+
+        await asyncio.gather(read(), *(login() for _ in range(logins)))
+        return reads, statuses
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--logins", type=int, default=64)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--port", type=int, default=8766)
+    args = ap.parse_args()
+
+    for name, env in MODES.items():
+        proc = start_uvicorn(env, args.port)
+        try:
+            reads, statuses = asyncio.run(
+                _burst(f"http://127.0.0.1:{args.port}", args.logins, args.seconds)
+            )
+        finally:
+            proc.terminate()
+            proc.wait()
+        q = statistics.quantiles(reads, n=100)
+        print(
+            f"{name:9s} /items p50 {q[49] * 1000:7.1f} ms  p99 {q[98] * 1000:7.1f} ms"
+            f"  logins {dict(sorted(statuses.items()))}"
+        )
+
+
+if __name__ == "__main__":
+    main()
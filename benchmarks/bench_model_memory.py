@@ -0,0 +1,109 @@
+"""Per-worker memory with and without memory-mapped model artifacts.
+
+Writes a synthetic model bundle with ``--mb`` of coefficients (same layout as
+scripts/train_iris.py: uncompressed joblib) to a temp dir, starts
+``uvicorn --workers N`` on it with MODEL_MMAP=0 and =1, waits for every worker to
+load it, and prints each worker's RSS, PSS and shared pages from
+/proc/<pid>/smaps_rollup (Linux):
+
+    python -m benchmarks.bench_model_memory --workers 4 --mb 200
+"""
+
+import argparse
+import tempfile
+import time
+from pathlib import Path
+
+import joblib
+import numpy as np
+from sklearn.linear_model import LogisticRegression
+
+from .common import start_uvicorn
+
+MIB = 1024 * 1024
+
+
+def _synthetic_bundle(path: Path, mb: int) -> None:
+    n_features = max(4, mb * MIB // (3 * 8))
+    clf = LogisticRegression()
+    clf.classes_ = np.arange(3)
+    clf.coef_ = np.random.default_rng(0).standard_normal((3, n_features))
+    clf.intercept_ = np.zeros(3)
+    clf.n_features_in_ = n_features
+    joblib.dump({"model": clf, "target_names": ["a", "b", "c"]}, path, compress=0)
+
+
+def _smaps(pid: int) -> dict[str, int]:
+    out = {}
+    with open(f"/proc/{pid}/smaps_rollup") as f:
+        for line in f:
+            key, _, value = line.partition(":")
+            if value.strip().endswith("kB"):
+                out[key] = int(value.split()[0]) * 1024
+    return out
+
+
+def _workers(pid: int) -> list[int]:
+    with open(f"/proc/{pid}/task/{pid}/children") as f:
+        children = [int(p) for p in f.read().split()]
+    # skip multiprocessing's resource tracker
+    return [
+        p for p in children if b"resource_tracker" not in Path(f"/proc/{p}/cmdline").read_bytes()
+    ]
+
+
+def _settled(pid: int, workers: int, timeout: float = 120.0) -> list[int]:
+    """Worker pids once there are ``workers`` of them and their RSS stops growing."""
+    deadline = time.monotonic() + timeout
+    last = None
+    while time.monotonic() < deadline:
+        pids = _workers(pid)
+        if len(pids) >= workers:
+            total = sum(_smaps(p)["Rss"] for p in pids)
+            if total == last:
+                return pids
+            last = total
+        time.sleep(1.0)
+    raise RuntimeError("workers did not settle")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, default=4)
+    ap.add_argument("--mb", type=int, default=200, help="size of the synthetic coefficients")
+    ap.add_argument("--port", type=int, default=8769)
+    args = ap.parse_args()
+
+    with tempfile.TemporaryDirectory() as tmp:
+        artifact = Path(tmp) / "big.joblib"
+        _synthetic_bundle(artifact, args.mb)
+        print(f"artifact {artifact.stat().st_size / MIB:.0f} MiB, {args.workers} workers")
+        for mmap in ("0", "1"):
+            env = {"MODEL_PATH": str(artifact), "MODEL_MMAP": mmap}
+            proc = start_uvicorn(env, args.port, ["--workers", str(args.workers)], wait_s=120)
+            try:
+                pids = _settled(proc.pid, args.workers)
+                rows = [_smaps(p) for p in pids]
+            finally:
+                proc.terminate()
+                proc.wait()
+            print(f"\nMODEL_MMAP={mmap}")
+            print(
+                f"{'pid':>8} {'rss MiB':>9} {'pss MiB':>9} {'shared MiB':>11} {'private MiB':>12}"
+            )
+            for pid, m in zip(pids, rows, strict=True):
+                shared = m.get("Shared_Clean", 0) + m.get("Shared_Dirty", 0)
+                private = m.get("Private_Clean", 0) + m.get("Private_Dirty", 0)
+                print(
+                    f"{pid:>8} {m['Rss'] / MIB:>9.1f} {m['Pss'] / MIB:>9.1f}"
+                    f" {shared / MIB:>11.1f} {private / MIB:>12.1f}"
+                )
+            print(
+                f"{'total':>8} {sum(m['Rss'] for m in rows) / MIB:>9.1f}"
+                f" {sum(m['Pss'] for m in rows) / MIB:>9.1f}"
+                "   (PSS total = real memory used)"
+            )
+
+
+if __name__ == "__main__":
+    main()
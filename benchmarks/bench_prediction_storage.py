@@ -0,0 +1,98 @@
+"""Table size, insert rate and scan time for the ways to store prediction features.
+
+Compares the old JSONB object, the ``real[]`` column predictions now use, and four
+``real`` columns, each in a temporary table (nothing persists) in DATABASE_URL:
+
+    python -m benchmarks.bench_prediction_storage --rows 100000
+"""
+
+import argparse
+import random
+import time
+
+from sqlalchemy import (
+    REAL,
+    Column,
+    DateTime,
+    Float,
+    Integer,
+    MetaData,
+    String,
+    Table,
+    func,
+    insert,
+    select,
+)
+from sqlalchemy.dialects.postgresql import ARRAY, JSONB
+
+from app.db import engine
+from app.models import FEATURES
+
+
+def _table(md: MetaData, name: str, *feature_cols: Column) -> Table:
+    return Table(
+        name,
+        md,
+        Column("id", Integer, primary_key=True),
+        Column("user_id", Integer, nullable=False),
+        *feature_cols,
+        Column("pred_label", String(100), nullable=False),
+        Column("pred_confidence", Float, nullable=False),
+        Column("created_at", DateTime(timezone=True), server_default=func.now()),
+        prefixes=["TEMPORARY"],
+    )
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--rows", type=int, default=100_000)
+    ap.add_argument("--batch", type=int, default=500, help="rows per INSERT (log flush size)")
+    args = ap.parse_args()
+
+    md = MetaData()
+    layouts = {
+        "jsonb": (
+            _table(md, "bench_features_jsonb", Column("features", JSONB)),
+            lambda row: {"features": dict(zip(FEATURES, row, strict=True))},
+            lambda t: t.c.features["sepal_length"].as_float(),
+        ),
+        "real[]": (
+            _table(md, "bench_features_array", Column("feature_values", ARRAY(REAL))),
+            lambda row: {"feature_values": row},
+            lambda t: t.c.feature_values[1],
+        ),
+        "4 x real": (
+            _table(md, "bench_features_columns", *(Column(f, REAL) for f in FEATURES)),
+            lambda row: dict(zip(FEATURES, row, strict=True)),
+            lambda t: t.c.sepal_length,
+        ),
+    }
+    rng = random.Random(0)
+    rows = [[round(rng.uniform(0.1, 8.0), 1) for _ in FEATURES] for _ in range(args.rows)]
+
+    with engine.connect() as conn:
+        md.create_all(conn)
+        for name, (table, columns, first_feature) in layouts.items():
+            records = [
+                {"user_id": 1, "pred_label": "setosa", "pred_confidence": 0.97, **columns(r)}
+                for r in rows
+            ]
+            t0 = time.perf_counter()
+            for i in range(0, len(records), args.batch):
+                conn.execute(insert(table), records[i : i + args.batch])
+                conn.commit()
+            rate = args.rows / (time.perf_counter() - t0)
+            size = conn.scalar(select(func.pg_total_relation_size(table.name)))
+            t0 = time.perf_counter()
+            conn.scalar(select(func.avg(first_feature(table))))
+            scan_ms = (time.perf_counter() - t0) * 1000
+            print(
+                f"{name:>9}: {rate:>9.0f} rows/s insert, {size / args.rows:>6.1f} bytes/row "
+                f"({size / 2**20:.1f} MiB), avg(sepal_length) scan {scan_ms:.1f} ms"
+            )
+        md.drop_all(conn)
+        conn.commit()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,122 @@
+"""Throughput scaling of ``python -m app.serve`` from 1 to N workers.
+
+Starts the launcher once per worker count against DATABASE_URL and drives authenticated
+POST /ml/predict (CPU-bound) and GET /items from ``--clients`` load processes, so the
+load generator is not the bottleneck. Also reports the workers' PSS to show the
+memory shared through the preloaded parent:
+
+    python -m benchmarks.bench_prefork --workers 1 2 4 8 --seconds 10
+"""
+
+import argparse
+import asyncio
+import multiprocessing
+import os
+import signal
+import subprocess
+import sys
+import time
+
+import httpx
+
+from app.serve import available_cpus
+
+from .common import percentiles
+
+EMAIL, PASSWORD = "bench-prefork@example.com", "Aa1!benchbench"
+ROW = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+
+def _start(workers: int, port: int) -> subprocess.Popen:
+    cmd = [sys.executable, "-m", "app.serve", "--workers", str(workers), "--port", str(port)]
+    proc = subprocess.Popen(cmd, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    for _ in range(300):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("launcher did not start")
+
+
+def _client(base: str, token: str, concurrency: int, seconds: float, path: str) -> list[float]:
+    async def run() -> list[float]:
+        headers = {"Authorization": f"Bearer {token}"}
+        latencies: list[float] = []
+        stop = time.perf_counter() + seconds
+        limits = httpx.Limits(max_connections=concurrency)
+        async with httpx.AsyncClient(base_url=base, timeout=30, limits=limits) as c:
+
+            async def worker():
+                while time.perf_counter() < stop:
+                    t0 = time.perf_counter()
+                    if path == "/ml/predict":
+                        r = await c.post(path, headers=headers, json=ROW)
+                    else:
+                        r = await c.get(path)
+                    r.raise_for_status()
+                    latencies.append(time.perf_counter() - t0)
+
+            await asyncio.gather(*(worker() for _ in range(concurrency)))
+        return latencies
+
+    return asyncio.run(run())
+
+
+def _pss_kib(parent: int) -> int:
+    """Summed PSS of the launcher's workers (Linux only; 0 elsewhere)."""
+    total = 0
+    for pid in os.listdir("/proc") if os.path.isdir("/proc") else []:
+        try:
+            with open(f"/proc/{pid}/stat") as f:
+                if int(f.read().rsplit(")", 1)[1].split()[1]) != parent:
+                    continue
+            with open(f"/proc/{pid}/smaps_rollup") as f:
+                total += next(int(ln.split()[1]) for ln in f if ln.startswith("Pss:"))
+        except (OSError, ValueError, StopIteration):
+            continue
+    return total
+
+
+def main() -> None:
+    cpus = available_cpus()
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--workers", type=int, nargs="+", default=[1, 2, 4, 8])
+    ap.add_argument("--path", default="/ml/predict", choices=["/ml/predict", "/items"])
+    ap.add_argument("--clients", type=int, default=max(2, int(cpus)))
+    ap.add_argument("--concurrency", type=int, default=64, help="in-flight requests, total")
+    ap.add_argument("--seconds", type=float, default=10.0)
+    ap.add_argument("--port", type=int, default=8766)
+    args = ap.parse_args()
+    print(f"{cpus:.1f} CPUs available; {args.clients} load processes on the same host")
+
+    base = f"http://127.0.0.1:{args.port}"
+    baseline = None
+    for workers in args.workers:
+        proc = _start(workers, args.port)
+        try:
+            httpx.post(f"{base}/auth/register", json={"email": EMAIL, "password": PASSWORD})
+            r = httpx.post(f"{base}/auth/login", data={"username": EMAIL, "password": PASSWORD})
+            token = r.json()["access_token"]
+            per_client = max(1, args.concurrency // args.clients)
+            job = (base, token, per_client, args.seconds, args.path)
+            with multiprocessing.get_context("spawn").Pool(args.clients) as pool:
+                results = pool.starmap(_client, [job] * args.clients)
+            pss = _pss_kib(proc.pid)
+        finally:
+            proc.send_signal(signal.SIGTERM)
+            proc.wait()
+        latencies = [x for r in results for x in r]
+        rps = len(latencies) / args.seconds
+        baseline = baseline or rps / workers
+        p = percentiles(latencies)
+        print(
+            f"{workers:>3} workers: {rps:8.0f} req/s ({rps / baseline:4.1f}x of 1 worker), "
+            f"p50 {p['p50_ms']:6.1f} ms, p99 {p['p99_ms']:6.1f} ms, "
+            f"workers' PSS {pss / 1024:6.1f} MiB"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""CPU time and allocations per ``GET /items`` response, by serialization path.
+
+For pages of 10 to 1000 rows, times the encoding step alone (rows fetched once):
+
+* ``orm + jsonable``: ORM objects validated into ItemOut, stdlib ``json`` (the classic
+  FastAPI ``response_model`` path)
+* ``core + pydantic``: Core rows validated and dumped by a TypeAdapter (the default)
+* ``core + fast``: Core rows copied into dicts and encoded in one call (FAST_RESPONSES;
+  orjson if installed)
+
+then whole requests through app.main:app with FAST_RESPONSES off and on (pages up to
+ITEMS_MAX_LIMIT). Seeds rows into DATABASE_URL if there are fewer than the largest page:
+
+    ITEMS_MAX_LIMIT=1000 python -m benchmarks.bench_serialization --pages 10 100 1000
+"""
+
+import argparse
+import json
+import time
+import tracemalloc
+
+from fastapi.encoders import jsonable_encoder
+from fastapi.testclient import TestClient
+from pydantic import TypeAdapter
+from sqlalchemy import func, insert, select
+
+from app import models, schemas
+from app.config import settings
+from app.db import SessionLocal, engine
+from app.main import app
+from app.routers.items import page_entry, page_query
+from app.serialization import orjson
+
+_list = TypeAdapter(list[schemas.ItemOut])
+
+
+def _per_call(fn, n: int) -> tuple[float, float]:
+    """(CPU microseconds, peak KiB allocated) per call."""
+    fn()
+    start = time.process_time()
+    for _ in range(n):
+        fn()
+    cpu = (time.process_time() - start) / n * 1e6
+    tracemalloc.start()
+    fn()
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return cpu, peak / 1024
+
+
+def _set_fast(value: bool) -> None:
+    settings.fast_responses = value
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--pages", type=int, nargs="+", default=[10, 100, 1000])
+    ap.add_argument("--iterations", type=int, default=200)
+    args = ap.parse_args()
+
+    top = max(args.pages)
+    with engine.begin() as conn:
+        have = conn.scalar(select(func.count()).select_from(models.Item))
+        if have < top:
+            conn.execute(
+                insert(models.Item),
+                [{"name": f"bench-ser-{i}", "description": "d" * 40} for i in range(top - have)],
+            )
+
+    encoder = "orjson" if orjson is not None else "pydantic_core"
+    print(f"encoding only (fast path encoder: {encoder})")
+    with SessionLocal() as db:
+        for n in args.pages:
+            orm = db.scalars(select(models.Item).order_by(models.Item.id.desc()).limit(n)).all()
+            core = db.execute(page_query(None, n, 0, None)).all()
+            paths = {
+                "orm + jsonable": lambda orm=orm: json.dumps(
+                    jsonable_encoder(_list.validate_python(orm, from_attributes=True))
+                ).encode(),
+                "core + pydantic": lambda core=core, n=n: (
+                    _set_fast(False),
+                    page_entry(core, n, 0, None),
+                ),
+                "core + fast": lambda core=core, n=n: (
+                    _set_fast(True),
+                    page_entry(core, n, 0, None),
+                ),
+            }
+            iters = max(10, args.iterations * 10 // n)
+            for name, fn in paths.items():
+                cpu, kib = _per_call(fn, iters)
+                print(f"{n:>5} rows  {name:>16}: {cpu:>9.0f} us CPU, peak {kib:>7.1f} KiB")
+
+    print("whole request, GET /items (response cache off)")
+    settings.items_cache_enabled = False
+    c = TestClient(app)
+
+    def get_page(n: int) -> None:
+        r = c.get("/items", params={"limit": n})
+        assert r.status_code == 200, r.text
+
+    for n in args.pages:
+        if n > settings.items_max_limit:
+            print(f"{n:>5} rows: skipped, above ITEMS_MAX_LIMIT={settings.items_max_limit}")
+            continue
+        for fast in (False, True):
+            _set_fast(fast)
+            iters = max(10, args.iterations * 10 // n)
+            cpu, kib = _per_call(lambda n=n: get_page(n), iters)
+            label = "fast" if fast else "default"
+            print(f"{n:>5} rows  {label:>16}: {cpu:>9.0f} us CPU, peak {kib:>7.1f} KiB")
+
+
+if __name__ == "__main__":
+    main()
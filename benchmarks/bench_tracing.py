@@ -0,0 +1,93 @@
+"""Overhead of the timing middleware and hot-path spans.
+
+Microbenchmark of one ``span()`` (tracing on and off), then the same uvicorn load
+(GET /items plus authenticated POST /ml/predict) with TRACING_ENABLED=0, =1 and
+=1 plus SERVER_TIMING=1, against DATABASE_URL:
+
+    python -m benchmarks.bench_tracing --concurrency 16 --seconds 10
+"""
+
+import argparse
+import asyncio
+import time
+import timeit
+
+import httpx
+
+from app.config import settings
+from app.tracing import span
+
+from .common import percentiles, start_uvicorn
+
+EMAIL, PASSWORD = "bench-tracing@example.com", "Aa1!benchbench"
+ROW = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+MODES = {
+    "off": {"TRACING_ENABLED": "0"},
+    "on": {"TRACING_ENABLED": "1", "SERVER_TIMING": "0"},
+    "on+header": {"TRACING_ENABLED": "1", "SERVER_TIMING": "1"},
+}
+
+
+def _span_ns(enabled: bool, n: int = 200_000) -> float:
+    settings.tracing_enabled = enabled
+
+    def one():
+        with span("bench"):
+            pass
+
+    return timeit.timeit(one, number=n) / n * 1e9
+
+
+async def _load(base: str, concurrency: int, seconds: float) -> list[float]:
+    async with httpx.AsyncClient(base_url=base, timeout=30) as c:
+        await c.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+        r = await c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        await c.post("/ml/predict", headers=headers, json=ROW)  # loads the model
+        latencies: list[float] = []
+        stop = time.perf_counter() + seconds
+
+        async def worker(i: int):
+            n = 0
+            while time.perf_counter() < stop:
+                t0 = time.perf_counter()
+                if (i + n) % 2:
+                    await c.get("/items")
+                else:
+                    await c.post("/ml/predict", headers=headers, json=ROW)
+                latencies.append(time.perf_counter() - t0)
+                n += 1
+
+        await asyncio.gather(*(worker(i) for i in range(concurrency)))
+        return latencies
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--concurrency", type=int, default=16)
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--port", type=int, default=8768)
+    args = ap.parse_args()
+
+    print(f"span(): {_span_ns(True):.0f} ns on, {_span_ns(False):.0f} ns off")
+    baseline = None
+    for name, env in MODES.items():
+        proc = start_uvicorn(env, args.port)
+        try:
+            lat = asyncio.run(
+                _load(f"http://127.0.0.1:{args.port}", args.concurrency, args.seconds)
+            )
+        finally:
+            proc.terminate()
+            proc.wait()
+        rps = len(lat) / args.seconds
+        baseline = baseline or rps
+        p = percentiles(lat)
+        print(
+            f"{name:10s} {rps:8.0f} req/s ({(rps / baseline - 1) * 100:+5.1f}%)"
+            f"  p50 {p['p50_ms']:6.1f} ms  p99 {p['p99_ms']:6.1f} ms"
+        )
+
+
+if __name__ == "__main__":
+    main()
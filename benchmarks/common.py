@@ -0,0 +1,38 @@
+"""Helpers shared by the benchmark scripts."""
+
+import os
+import statistics
+import subprocess
+import sys
+import time
+from collections.abc import Sequence
+
+import httpx
+
+
+def start_uvicorn(
+    env: dict[str, str], port: int, extra_args: Sequence[str] = (), wait_s: float = 10.0
+) -> subprocess.Popen:
+    """Run ``uvicorn app.main:app`` with ``env`` layered over os.environ; waits for /health."""
+    cmd = [sys.executable, "-m", "uvicorn", "app.main:app", "--port", str(port), "--no-access-log"]
+    cmd += extra_args
+    proc = subprocess.Popen(
+        cmd, env={**os.environ, **env}, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    for _ in range(int(wait_s * 10)):
+        try:
+            httpx.get(f"http://127.0.0.1:{port}/health")
+            return proc
+        except httpx.TransportError:
+            time.sleep(0.1)
+    proc.kill()
+    raise RuntimeError("uvicorn did not start")
+
+
+def percentiles(samples: list[float]) -> dict[str, float]:
+    """p50/p95/p99 of ``samples`` (seconds) in milliseconds."""
+    if len(samples) < 2:
+        only = samples[0] * 1000 if samples else 0.0
+        return {"p50_ms": only, "p95_ms": only, "p99_ms": only}
+    q = statistics.quantiles(samples, n=100, method="inclusive")
+    return {"p50_ms": q[49] * 1000, "p95_ms": q[94] * 1000, "p99_ms": q[98] * 1000}
@@ -0,0 +1,324 @@
+"""Benchmark suite: mixed workloads against app.main:app, with a regression gate.
+
+Creates a throwaway Postgres database on the server in ``--admin-url`` (default:
+DATABASE_URL; the role needs CREATEDB), migrates it to head, seeds it, and drives
+each scenario either in-process (ASGI transport) or against a local uvicorn:
+
+    python -m benchmarks.suite --transport inprocess --seconds 5
+    python -m benchmarks.suite --transport uvicorn --out run.json --baseline prev.json
+
+Every scenario reports throughput, p50/p95/p99 latency and errors; in-process runs
+also report tracemalloc peak and retained memory from a separate, untimed pass.
+Results are written as JSON (default ``benchmarks/results/``). With ``--baseline`` the
+run exits 1 if any scenario lost more than ``--max-regression`` of its throughput or
+gained that much p95 latency. SQLite is not an option: items search and bulk writes
+rely on Postgres features (pg_trgm, arrays, JSONB).
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+import uuid
+from collections import Counter
+from collections.abc import Awaitable, Callable, Iterator
+from contextlib import contextmanager
+from dataclasses import dataclass
+from datetime import UTC, datetime
+from pathlib import Path
+from typing import Any
+
+import httpx
+from sqlalchemy import create_engine, text
+from sqlalchemy.engine import make_url
+
+from .common import percentiles, start_uvicorn
+
+EMAIL, PASSWORD = "bench-suite@example.com", "Aa1!benchsuite"
+ROW = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+RESULTS_DIR = Path(__file__).parent / "results"
+
+Op = Callable[[httpx.AsyncClient, "State", int], Awaitable[httpx.Response]]
+
+
+@dataclass
+class State:
+    headers: dict[str, str]
+    item_ids: list[int]
+
+
+@dataclass(frozen=True)
+class Scenario:
+    name: str
+    concurrency: int
+    op: Op
+    ok: frozenset[int] = frozenset({200, 201, 204})
+    shed: frozenset[int] = frozenset({429, 503})  # load shedding, counted apart from errors
+
+
+async def _login(c: httpx.AsyncClient, s: State, i: int) -> httpx.Response:
+    return await c.post("/auth/login", data={"username": EMAIL, "password": PASSWORD})
+
+
+async def _items_mix(c: httpx.AsyncClient, s: State, i: int) -> httpx.Response:
+    # 10% create, 10% update, 40% list pages, 40% single reads
+    slot = i % 10
+    if slot == 0:
+        return await c.post("/items", headers=s.headers, json={"name": f"bench-{i}"})
+    item_id = random.choice(s.item_ids)
+    if slot == 1:
+        return await c.put(f"/items/{item_id}", headers=s.headers, json={"name": f"bench-u{i}"})
+    if slot < 6:
+        return await c.get("/items", params={"limit": 20})
+    return await c.get(f"/items/{item_id}")
+
+
+async def _predict(c: httpx.AsyncClient, s: State, i: int) -> httpx.Response:
+    return await c.post("/ml/predict", headers=s.headers, json=ROW)
+
+
+SCENARIOS = [
+    Scenario("login_storm", 32, _login),
+    Scenario("items_mix", 16, _items_mix),
+    Scenario("predict_c1", 1, _predict),
+    Scenario("predict_c8", 8, _predict),
+    Scenario("predict_c32", 32, _predict),
+]
+
+
+@contextmanager
+def throwaway_database(admin_url: str, keep: bool = False) -> Iterator[str]:
+    """Create an empty database next to ``admin_url``, migrate it to head, yield its URL."""
+    name = f"quickapi_bench_{uuid.uuid4().hex[:8]}"
+    admin = create_engine(admin_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    url = make_url(admin_url).set(database=name).render_as_string(hide_password=False)
+    try:
+        subprocess.run(
+            [sys.executable, "-m", "alembic", "upgrade", "head"],
+            env={**os.environ, "DATABASE_URL": url},
+            check=True,
+            stdout=subprocess.DEVNULL,
+        )
+        yield url
+    finally:
+        if not keep:
+            with admin.connect() as conn:
+                conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+        admin.dispose()
+
+
+async def _prepare(c: httpx.AsyncClient, seed_items: int) -> State:
+    await c.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+    r = await _login(c, None, 0)  # type: ignore[arg-type]
+    r.raise_for_status()
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    rows = [{"name": f"seed-{i}", "description": "bench"} for i in range(seed_items)]
+    r = await c.post("/items/bulk", headers=headers, json={"items": rows})
+    r.raise_for_status()
+    return State(headers, [i["id"] for i in r.json()["items"]])
+
+
+async def _drive(
+    c: httpx.AsyncClient, s: State, sc: Scenario, *, seconds: float = 0.0, requests: int = 0
+) -> tuple[list[float], Counter]:
+    """Run ``sc`` for ``seconds`` (or until ``requests`` were sent); latencies + statuses."""
+    latencies: list[float] = []
+    statuses: Counter = Counter()
+    stop = time.perf_counter() + seconds
+    counter = iter(range(sys.maxsize))
+
+    def more() -> bool:
+        return len(latencies) < requests if requests else time.perf_counter() < stop
+
+    async def worker() -> None:
+        while more():
+            t0 = time.perf_counter()
+            try:
+                r = await sc.op(c, s, next(counter))
+                status = r.status_code
+            except httpx.TransportError:
+                status = 0
+            latencies.append(time.perf_counter() - t0)
+            statuses[status] += 1
+
+    await asyncio.gather(*(worker() for _ in range(sc.concurrency)))
+    return latencies, statuses
+
+
+async def _allocations(c: httpx.AsyncClient, s: State, sc: Scenario, n: int) -> dict[str, float]:
+    tracemalloc.start()
+    try:
+        base, _ = tracemalloc.get_traced_memory()
+        await _drive(c, s, sc, requests=n)
+        current, peak = tracemalloc.get_traced_memory()
+    finally:
+        tracemalloc.stop()
+    return {"alloc_peak_kib": (peak - base) / 1024, "alloc_retained_kib": (current - base) / 1024}
+
+
+async def run_scenarios(
+    c: httpx.AsyncClient, scenarios: list[Scenario], args: argparse.Namespace, in_process: bool
+) -> dict[str, dict[str, Any]]:
+    state = await _prepare(c, args.seed_items)
+    results = {}
+    for sc in scenarios:
+        await _drive(c, state, sc, seconds=args.warmup)
+        start = time.perf_counter()
+        latencies, statuses = await _drive(c, state, sc, seconds=args.seconds)
+        elapsed = time.perf_counter() - start
+        shed = sum(n for code, n in statuses.items() if code in sc.shed)
+        ok = sum(n for code, n in statuses.items() if code in sc.ok)
+        res: dict[str, Any] = {
+            "concurrency": sc.concurrency,
+            "requests": len(latencies),
+            "rps": ok / elapsed,
+            **percentiles(latencies),
+            "errors": len(latencies) - ok - shed,
+            "shed": shed,
+            "statuses": {str(k): v for k, v in sorted(statuses.items())},
+        }
+        if in_process and args.alloc_requests:
+            res.update(await _allocations(c, state, sc, args.alloc_requests))
+        results[sc.name] = res
+        print(
+            f"{sc.name:12s} c={sc.concurrency:<3d} {res['rps']:8.0f} req/s"
+            f"  p50 {res['p50_ms']:7.1f}  p95 {res['p95_ms']:7.1f}  p99 {res['p99_ms']:7.1f} ms"
+            f"  errors {res['errors']}  shed {res['shed']}",
+            flush=True,
+        )
+    return results
+
+
+def compare(current: dict[str, Any], baseline: dict[str, Any], max_regression: float) -> list[str]:
+    """Scenarios that regressed past ``max_regression`` (a fraction) against ``baseline``."""
+    failures = []
+    for name, cur in current["scenarios"].items():
+        base = baseline.get("scenarios", {}).get(name)
+        if not base:
+            continue
+        if base["rps"] and cur["rps"] < base["rps"] * (1 - max_regression):
+            failures.append(f"{name}: throughput {base['rps']:.0f} -> {cur['rps']:.0f} req/s")
+        if base["p95_ms"] and cur["p95_ms"] > base["p95_ms"] * (1 + max_regression):
+            failures.append(f"{name}: p95 {base['p95_ms']:.1f} -> {cur['p95_ms']:.1f} ms")
+        if cur["errors"] > base["errors"]:
+            failures.append(f"{name}: errors {base['errors']} -> {cur['errors']}")
+    return failures
+
+
+def _meta(args: argparse.Namespace) -> dict[str, Any]:
+    try:
+        rev = subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        rev = None
+    return {
+        "timestamp": datetime.now(UTC).isoformat(timespec="seconds"),
+        "git_rev": rev,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "cpus": os.cpu_count(),
+        "transport": args.transport,
+        "seconds": args.seconds,
+        "env": {k: v for k, v in os.environ.items() if k in _TUNABLES},
+    }
+
+
+# Settings that change results; recorded so runs are comparable
+_TUNABLES = {
+    "ASYNC_MODE",
+    "DB_POOL_SIZE",
+    "DB_MAX_OVERFLOW",
+    "AUTH_CACHE_ENABLED",
+    "JWT_USER_ID_CLAIM",
+    "ITEMS_CACHE_ENABLED",
+    "PREDICT_BATCHING",
+    "PREDICTION_LOG_ASYNC",
+    "PASSWORD_HASH_WORKERS",
+    "PASSWORD_HASH_MAX_PENDING",
+    "TRACING_ENABLED",
+    "SERVER_TIMING",
+}
+
+
+def _run(args: argparse.Namespace, scenarios: list[Scenario], url: str) -> dict[str, Any]:
+    if args.transport == "uvicorn":
+        proc = start_uvicorn({"DATABASE_URL": url}, args.port)
+        try:
+            client = httpx.AsyncClient(base_url=f"http://127.0.0.1:{args.port}", timeout=60)
+            return asyncio.run(_with(client, scenarios, args, in_process=False))
+        finally:
+            proc.terminate()
+            proc.wait()
+    # engines are built from settings at import time: point them at the throwaway DB first
+    from app.config import settings
+
+    settings.database_url = url
+    from app.main import app
+
+    transport = httpx.ASGITransport(app=app)
+    client = httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=60)
+    return asyncio.run(_with(client, scenarios, args, in_process=True))
+
+
+async def _with(client, scenarios, args, in_process: bool) -> dict[str, Any]:
+    async with client:
+        return await run_scenarios(client, scenarios, args, in_process)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser()
+    ap.add_argument("--transport", choices=("inprocess", "uvicorn"), default="inprocess")
+    ap.add_argument(
+        "--scenarios", help="comma-separated subset of " + ",".join(s.name for s in SCENARIOS)
+    )
+    ap.add_argument("--seconds", type=float, default=5.0)
+    ap.add_argument("--warmup", type=float, default=1.0)
+    ap.add_argument("--seed-items", type=int, default=1000)
+    ap.add_argument("--alloc-requests", type=int, default=200, help="0 skips tracemalloc")
+    ap.add_argument("--port", type=int, default=8767)
+    ap.add_argument("--admin-url", default=None, help="server to create the database on")
+    ap.add_argument("--keep-db", action="store_true")
+    ap.add_argument("--out", type=Path)
+    ap.add_argument("--baseline", type=Path)
+    ap.add_argument("--max-regression", type=float, default=0.10)
+    args = ap.parse_args()
+
+    scenarios = SCENARIOS
+    if args.scenarios:
+        wanted = set(args.scenarios.split(","))
+        scenarios = [s for s in SCENARIOS if s.name in wanted]
+        if unknown := wanted - {s.name for s in scenarios}:
+            ap.error(f"unknown scenarios: {', '.join(sorted(unknown))}")
+
+    admin_url = args.admin_url
+    if not admin_url:
+        from app.config import settings
+
+        admin_url = settings.database_url
+    with throwaway_database(admin_url, keep=args.keep_db) as url:
+        results = {"meta": _meta(args), "scenarios": _run(args, scenarios, url)}
+
+    out = args.out or RESULTS_DIR / f"{args.transport}-{datetime.now():%Y%m%d-%H%M%S}.json"
+    out.parent.mkdir(parents=True, exist_ok=True)
+    out.write_text(json.dumps(results, indent=2))
+    print(f"results: {out}")
+
+    if args.baseline:
+        failures = compare(results, json.loads(args.baseline.read_text()), args.max_regression)
+        for f in failures:
+            print(f"REGRESSION {f}")
+        if failures:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,46 @@
+"""items name trigram index
+
+Revision ID: 38772d89d192
+Revises: d417292ad5c6
+Create Date: 2026-10-18 10:12:31.402511
+
+"""
+
+import logging
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "38772d89d192"
+down_revision: str | Sequence[str] | None = "d417292ad5c6"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+log = logging.getLogger("alembic.runtime.migration")
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # GIN trigram index so `name ILIKE '%q%'` can use an index; ix_items_name
+    # (btree) only serves prefix matches
+    bind = op.get_bind()
+    available = bind.scalar(sa.text("SELECT 1 FROM pg_available_extensions WHERE name = 'pg_trgm'"))
+    if not available:
+        log.warning("pg_trgm is not installed on this server; skipping ix_items_name_trgm")
+        return
+    op.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+    op.create_index(
+        "ix_items_name_trgm",
+        "items",
+        ["name"],
+        unique=False,
+        postgresql_using="gin",
+        postgresql_ops={"name": "gin_trgm_ops"},
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.execute("DROP INDEX IF EXISTS ix_items_name_trgm")
@@ -0,0 +1,90 @@
+"""predictions feature_values float4[]
+
+Revision ID: 9f72b40c082c
+Revises: d6cef7f72cfc
+Create Date: 2026-10-18 18:40:13.284597
+
+"""
+
+import logging
+import time
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+from sqlalchemy.dialects import postgresql
+
+# revision identifiers, used by Alembic.
+revision: str = "9f72b40c082c"
+down_revision: str | Sequence[str] | None = "d6cef7f72cfc"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+log = logging.getLogger("alembic.runtime.migration")
+
+# app.models.FEATURES at the time of writing; the array order is part of the schema
+FEATURES = ("sepal_length", "sepal_width", "petal_length", "petal_width")
+BATCH = 5_000
+
+_TO_ARRAY = "ARRAY[{}]::real[]".format(", ".join(f"(features->>'{f}')::real" for f in FEATURES))
+_TO_JSONB = "jsonb_build_object({})".format(
+    ", ".join(f"'{f}', feature_values[{i}]" for i, f in enumerate(FEATURES, 1))
+)
+
+
+def _backfill(set_clause: str, pending: str) -> None:
+    # short autocommitted batches: row locks on BATCH rows at a time, never a table
+    # lock, and SKIP LOCKED steps around rows a concurrent writer holds. An empty batch
+    # only ends the loop once no row is pending; otherwise those rows are still locked
+    bind = op.get_bind()
+    total = 0
+    with op.get_context().autocommit_block():
+        while True:
+            done = bind.execute(
+                sa.text(
+                    f"UPDATE predictions SET {set_clause} WHERE (id, created_at) IN ("
+                    f"SELECT id, created_at FROM predictions WHERE {pending} "
+                    f"LIMIT {BATCH} FOR UPDATE SKIP LOCKED)"
+                )
+            ).rowcount
+            total += done
+            if done:
+                log.info("backfilled %d predictions", total)
+                continue
+            if not bind.scalar(
+                sa.text(f"SELECT EXISTS (SELECT 1 FROM predictions WHERE {pending})")
+            ):
+                break
+            time.sleep(0.1)  # wait for the writer holding them to commit
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # both are catalog-only changes: no rewrite, no long lock
+    op.add_column(
+        "predictions", sa.Column("feature_values", postgresql.ARRAY(sa.REAL()), nullable=True)
+    )
+    op.alter_column(
+        "predictions",
+        "features",
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=True,
+    )
+    # the JSONB is cleared as rows are converted, so their space is reused by vacuum;
+    # the column itself stays (nullable) until every writer logs feature_values
+    _backfill(
+        f"feature_values = {_TO_ARRAY}, features = NULL",
+        "feature_values IS NULL AND features IS NOT NULL",
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    _backfill(f"features = {_TO_JSONB}", "features IS NULL")
+    op.alter_column(
+        "predictions",
+        "features",
+        existing_type=postgresql.JSONB(astext_type=sa.Text()),
+        nullable=False,
+    )
+    op.drop_column("predictions", "feature_values")
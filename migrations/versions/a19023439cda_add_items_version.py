@@ -0,0 +1,32 @@
+"""add items version
+
+Revision ID: a19023439cda
+Revises: 38772d89d192
+Create Date: 2026-10-18 11:02:47.118305
+
+"""
+
+from collections.abc import Sequence
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "a19023439cda"
+down_revision: str | Sequence[str] | None = "38772d89d192"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # bumped on every update; the basis for item ETags
+    op.add_column(
+        "items",
+        sa.Column("version", sa.Integer(), server_default=sa.text("1"), nullable=False),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_column("items", "version")
@@ -0,0 +1,136 @@
+"""partition predictions by month, add daily rollups
+
+Revision ID: d6cef7f72cfc
+Revises: f48e25586e52
+Create Date: 2026-10-18 16:05:42.871230
+
+"""
+
+from collections.abc import Sequence
+from datetime import UTC, date, datetime
+
+import sqlalchemy as sa
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "d6cef7f72cfc"
+down_revision: str | Sequence[str] | None = "f48e25586e52"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+# months created ahead of now; later ones come from `python -m app.maintenance`
+AHEAD = 3
+
+COLUMNS = "id, user_id, features, pred_label, pred_confidence, created_at"
+
+
+def _next_month(d: date) -> date:
+    return date(d.year + d.month // 12, d.month % 12 + 1, 1)
+
+
+def _create_history_indexes() -> None:
+    op.create_index("ix_predictions_user_created", "predictions", ["user_id", "created_at", "id"])
+    op.create_index(
+        "ix_predictions_user_label_created",
+        "predictions",
+        ["user_id", "pred_label", "created_at", "id"],
+        postgresql_include=["pred_confidence"],
+    )
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # rows are copied in this transaction (ACCESS EXCLUSIVE on predictions until
+    # commit); for a very large table run it in a maintenance window
+    op.execute("ALTER TABLE predictions RENAME TO predictions_unpartitioned")
+    op.execute("ALTER INDEX predictions_pkey RENAME TO predictions_unpartitioned_pkey")
+    op.drop_index("ix_predictions_user_created", table_name="predictions_unpartitioned")
+    op.drop_index("ix_predictions_user_label_created", table_name="predictions_unpartitioned")
+    # the partition key has to be part of the primary key
+    op.execute(
+        """
+        CREATE TABLE predictions (
+            id integer NOT NULL DEFAULT nextval('predictions_id_seq'),
+            user_id integer NOT NULL,
+            features jsonb NOT NULL,
+            pred_label varchar(100) NOT NULL,
+            pred_confidence double precision NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            -- named: an auto-generated name would dodge the partitions' copies of it
+            CONSTRAINT predictions_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id),
+            CONSTRAINT predictions_pkey PRIMARY KEY (id, created_at)
+        ) PARTITION BY RANGE (created_at)
+        """
+    )
+    op.execute("ALTER SEQUENCE predictions_id_seq OWNED BY predictions.id")
+    # catches rows outside every monthly partition; maintenance moves them out
+    op.execute("CREATE TABLE predictions_default PARTITION OF predictions DEFAULT")
+
+    oldest = op.get_bind().scalar(sa.text("SELECT min(created_at) FROM predictions_unpartitioned"))
+    today = datetime.now(UTC).date()
+    month = (oldest.astimezone(UTC).date() if oldest else today).replace(day=1)
+    last = today.replace(day=1)
+    for _ in range(AHEAD):
+        last = _next_month(last)
+    while month <= last:
+        nxt = _next_month(month)
+        op.execute(
+            f"CREATE TABLE predictions_p{month:%Y%m} PARTITION OF predictions "
+            f"FOR VALUES FROM ('{month} 00:00+00') TO ('{nxt} 00:00+00')"
+        )
+        month = nxt
+
+    op.execute(
+        f"INSERT INTO predictions ({COLUMNS}) SELECT {COLUMNS} FROM predictions_unpartitioned"
+    )
+    op.drop_table("predictions_unpartitioned")
+    # created on the parent, so every partition (present and future) gets them
+    _create_history_indexes()
+
+    op.create_table(
+        "prediction_daily_rollups",
+        sa.Column("user_id", sa.Integer(), nullable=False),
+        sa.Column("day", sa.Date(), nullable=False),
+        sa.Column("pred_label", sa.String(length=100), nullable=False),
+        sa.Column("bucket", sa.SmallInteger(), nullable=False),
+        sa.Column("count", sa.Integer(), nullable=False),
+        sa.Column("confidence_sum", sa.Float(), nullable=False),
+        sa.ForeignKeyConstraint(["user_id"], ["users.id"]),
+        sa.PrimaryKeyConstraint("user_id", "day", "pred_label", "bucket"),
+    )
+    op.create_table(
+        "prediction_rollup_state",
+        sa.Column("name", sa.String(length=64), nullable=False),
+        sa.Column("rolled_up_to", sa.Date(), nullable=False),
+        sa.PrimaryKeyConstraint("name"),
+    )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    op.drop_table("prediction_rollup_state")
+    op.drop_table("prediction_daily_rollups")
+    op.execute("ALTER TABLE predictions RENAME TO predictions_partitioned")
+    op.execute("ALTER INDEX predictions_pkey RENAME TO predictions_partitioned_pkey")
+    op.drop_index("ix_predictions_user_created", table_name="predictions_partitioned")
+    op.drop_index("ix_predictions_user_label_created", table_name="predictions_partitioned")
+    op.execute(
+        """
+        CREATE TABLE predictions (
+            id integer NOT NULL DEFAULT nextval('predictions_id_seq'),
+            user_id integer NOT NULL,
+            features jsonb NOT NULL,
+            pred_label varchar(100) NOT NULL,
+            pred_confidence double precision NOT NULL,
+            created_at timestamptz NOT NULL DEFAULT now(),
+            -- back to the names of f48e25586e52 (upgrade() renames predictions_pkey);
+            -- the partitioned table's primary key was renamed above to free the name
+            CONSTRAINT predictions_user_id_fkey FOREIGN KEY (user_id) REFERENCES users (id),
+            CONSTRAINT predictions_pkey PRIMARY KEY (id)
+        )
+        """
+    )
+    op.execute("ALTER SEQUENCE predictions_id_seq OWNED BY predictions.id")
+    op.execute(f"INSERT INTO predictions ({COLUMNS}) SELECT {COLUMNS} FROM predictions_partitioned")
+    op.drop_table("predictions_partitioned")  # partitions go with it
+    _create_history_indexes()
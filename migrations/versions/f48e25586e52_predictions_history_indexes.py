@@ -0,0 +1,59 @@
+"""predictions history indexes
+
+Revision ID: f48e25586e52
+Revises: a19023439cda
+Create Date: 2026-10-18 14:21:09.530172
+
+"""
+
+from collections.abc import Sequence
+
+from alembic import op
+
+# revision identifiers, used by Alembic.
+revision: str = "f48e25586e52"
+down_revision: str | Sequence[str] | None = "a19023439cda"
+branch_labels: str | Sequence[str] | None = None
+depends_on: str | Sequence[str] | None = None
+
+
+def upgrade() -> None:
+    """Upgrade schema."""
+    # predictions is written on every /ml/predict: build without blocking inserts
+    with op.get_context().autocommit_block():
+        # GET /ml/predictions keyset pages + per-day volume
+        op.create_index(
+            "ix_predictions_user_created",
+            "predictions",
+            ["user_id", "created_at", "id"],
+            unique=False,
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+        # ?label= history, label counts and confidence histogram (index-only scans)
+        op.create_index(
+            "ix_predictions_user_label_created",
+            "predictions",
+            ["user_id", "pred_label", "created_at", "id"],
+            unique=False,
+            postgresql_include=["pred_confidence"],
+            postgresql_concurrently=True,
+            if_not_exists=True,
+        )
+
+
+def downgrade() -> None:
+    """Downgrade schema."""
+    with op.get_context().autocommit_block():
+        op.drop_index(
+            "ix_predictions_user_label_created",
+            table_name="predictions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
+        op.drop_index(
+            "ix_predictions_user_created",
+            table_name="predictions",
+            postgresql_concurrently=True,
+            if_exists=True,
+        )
@@ -19,7 +19,9 @@ acc = accuracy_score(yte, pipe.predict(Xte))
 
 os.makedirs("artifacts", exist_ok=True)
 bundle = {"model": pipe, "target_names": iris.target_names.tolist()}
-joblib.dump(bundle, "artifacts/iris_clf.joblib")
+# uncompressed on purpose: numpy arrays are stored raw and aligned, so the app can load
+# them with mmap_mode="r" and every worker shares the same pages (MODEL_MMAP)
+joblib.dump(bundle, "artifacts/iris_clf.joblib", compress=0)
 with open("artifacts/iris_meta.json", "w") as f:
     json.dump({"test_accuracy": acc}, f)
 
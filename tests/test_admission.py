@@ -0,0 +1,110 @@
+import asyncio
+
+import pytest
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.admission import (
+    AdmissionController,
+    AdmissionMiddleware,
+    GroupLimiter,
+    LocalStore,
+    MemoryBuckets,
+    Rejected,
+    SharedBuckets,
+)
+from app.security import create_access_token
+
+
+def test_limiter_queues_hands_over_and_sheds():
+    async def scenario():
+        limiter = GroupLimiter("t-queue", limit=1, max_queue=1, queue_timeout_s=1.0)
+        await limiter.acquire()
+        waiter = asyncio.create_task(limiter.acquire())
+        await asyncio.sleep(0)
+        assert limiter.stats()["queued"] == 1
+        with pytest.raises(Rejected) as exc:
+            await limiter.acquire()  # queue full
+        assert (exc.value.status, exc.value.reason) == (503, "queue_full")
+        limiter.release(0.05)
+        await waiter  # got the slot directly
+        assert limiter.stats()["active"] == 1
+        limiter.release(0.05)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == 0 and stats["admitted"] == 2
+    assert stats["rejected"] == {"queue_full": 1}
+    assert stats["queue_wait_seconds"]["count"] == 1
+
+
+def test_limiter_sheds_on_expected_wait_and_timeout():
+    async def scenario():
+        limiter = GroupLimiter("t-wait", limit=1, queue_timeout_s=0.05, target_wait_s=1.0)
+        await limiter.acquire()
+        with pytest.raises(Rejected) as exc:
+            await limiter.acquire()  # nobody ahead, slot busy: times out in the queue
+        assert exc.value.reason == "queue_timeout"
+        limiter.release(3.0)  # requests now hold the slot ~3 s
+        await limiter.acquire()
+        with pytest.raises(Rejected) as exc:
+            await limiter.acquire()
+        assert exc.value.reason == "expected_wait" and exc.value.retry_after == 3
+        limiter.release(3.0)
+        return limiter.stats()
+
+    stats = asyncio.run(scenario())
+    assert stats["active"] == stats["queued"] == 0
+
+
+@pytest.mark.parametrize("buckets", [MemoryBuckets(), SharedBuckets(LocalStore())])
+def test_token_buckets(buckets):
+    async def takes(key, n):
+        return [await buckets.take(key, rate=1.0, burst=2) for _ in range(n)]
+
+    first = asyncio.run(takes("a", 3))
+    assert first[:2] == [0.0, 0.0] and 0.9 < first[2] <= 1.0
+    assert asyncio.run(takes("b", 1)) == [0.0]  # separate bucket per key
+
+
+def test_routes_match_whole_path_segments():
+    controller = AdmissionController(
+        limits={"default": 4, "predict": 2, "batch": 1},
+        routes={"/ml/predict": "predict", "/ml/predict/batch": "batch"},
+        exempt=["/health"],
+    )
+    assert controller.group("/ml/predict").name == "predict"
+    assert controller.group("/ml/predict/batch").name == "batch"
+    assert controller.group("/ml/predictions").name == "default"  # read-only history
+    assert controller.group("/ml/predictions/stats").name == "default"
+    assert controller.is_exempt("/health/db") and not controller.is_exempt("/healthz")
+
+
+def test_middleware_rate_limits_by_token_subject():
+    app = FastAPI()
+
+    @app.get("/ping")
+    def ping():
+        return {"ok": True}
+
+    controller = AdmissionController(
+        limits={"default": 4}, exempt=["/health"], rate_per_s=0.5, burst=2
+    )
+    app.add_middleware(AdmissionMiddleware, controller=controller)
+
+    @app.get("/health")
+    def health():
+        return {"ok": True}
+
+    c = TestClient(app)
+    alice = {"Authorization": f"Bearer {create_access_token('alice@example.com', 5)}"}
+    assert [c.get("/ping", headers=alice).status_code for _ in range(2)] == [200, 200]
+    r = c.get("/ping", headers=alice)
+    assert r.status_code == 429 and r.headers["retry-after"] == "2"
+    assert r.json()["reason"] == "rate_limited"
+    # a different subject (here: no token, so the client address) has its own bucket
+    assert c.get("/ping").status_code == 200
+    assert all(c.get("/health", headers=alice).status_code == 200 for _ in range(3))
+    stats = controller.stats()
+    assert stats["rate_limit"]["limited"] == 1
+    assert stats["groups"]["default"]["admitted"] == 3
@@ -0,0 +1,66 @@
+from contextlib import asynccontextmanager
+
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.db import dispose_async_engine
+from app.routers.aio import auth, export, items, ml
+
+
+@asynccontextmanager
+async def _lifespan(app):
+    yield
+    await dispose_async_engine()
+
+
+def _app() -> FastAPI:
+    app = FastAPI(lifespan=_lifespan)
+    for module in (auth, items, ml, export):
+        app.include_router(module.router)
+    return app
+
+
+def test_async_routers_end_to_end():
+    # one client context = one event loop for the asyncpg pool
+    with TestClient(_app()) as c:
+        c.post("/auth/register", json={"email": "async@example.com", "password": "Aa1!asyncasync"})
+        r = c.post(
+            "/auth/login", data={"username": "async@example.com", "password": "Aa1!asyncasync"}
+        )
+        assert r.status_code == 200, r.text
+        headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+        assert c.get("/auth/me", headers=headers).json()["email"] == "async@example.com"
+
+        r = c.post("/items", headers=headers, json={"name": "async", "description": "d"})
+        assert r.status_code == 201, r.text
+        item = r.json()
+        assert c.get(f"/items/{item['id']}").json() == item
+        assert any(i["id"] == item["id"] for i in c.get("/items", params={"q": "async"}).json())
+        r = c.put(f"/items/{item['id']}", headers=headers, json={"name": "async2"})
+        assert r.json()["name"] == "async2"
+        assert c.delete(f"/items/{item['id']}", headers=headers).status_code == 204
+        assert c.get(f"/items/{item['id']}").status_code == 404
+
+        r = c.post(
+            "/items/bulk", headers=headers, json={"items": [{"name": "ab1"}, {"name": "ab2"}]}
+        )
+        ids = [i["id"] for i in r.json()["items"]]
+        r = c.patch("/items/bulk", headers=headers, json={"items": [{"id": ids[0], "name": "ab3"}]})
+        assert r.json()["items"][0]["name"] == "ab3"
+        r = c.request("DELETE", "/items/bulk", headers=headers, json={"ids": ids})
+        assert r.json() == {"deleted": ids, "errors": []}
+
+        row = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+        r = c.post("/ml/predict", headers=headers, json=row)
+        assert r.status_code == 200, r.text
+        assert r.json()["label"] == "setosa"
+
+        r = c.get("/ml/predictions", headers=headers, params={"limit": 1})
+        assert r.json()[0]["pred_label"] == "setosa"
+        assert "X-Next-Cursor" in r.headers
+        r = c.get("/ml/predictions/labels", headers=headers)
+        assert "setosa" in [row["label"] for row in r.json()]
+
+        r = c.get("/export/predictions", headers=headers, params={"format": "csv"})
+        assert r.status_code == 200, r.text
+        assert r.text.splitlines()[0].startswith("id,user_id,sepal_length")
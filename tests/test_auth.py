@@ -0,0 +1,68 @@
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.config import settings
+from app.db import engine
+from app.main import app
+from app.security import principal_cache
+
+c = TestClient(app)
+
+EMAIL, PASSWORD = "cache@example.com", "Aa1!cachecache"
+
+
+def _login(password=PASSWORD):
+    c.post("/auth/register", json={"email": EMAIL, "password": PASSWORD})
+    r = c.post("/auth/login", data={"username": EMAIL, "password": password})
+    assert r.status_code == 200, r.text
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+class _UserQueries:
+    def __init__(self):
+        self.n = 0
+
+    def __enter__(self):
+        event.listen(engine, "before_cursor_execute", self._count)
+        return self
+
+    def __exit__(self, *exc):
+        event.remove(engine, "before_cursor_execute", self._count)
+
+    def _count(self, conn, cursor, statement, *args):
+        if "FROM users" in statement:
+            self.n += 1
+
+
+def test_principal_cache_skips_lookup_and_is_invalidated():
+    headers = _login()
+    principal_cache.clear()
+    with _UserQueries() as q:
+        assert c.get("/auth/me", headers=headers).json()["email"] == EMAIL
+        assert c.get("/auth/me", headers=headers).status_code == 200
+    assert q.n == 1
+
+    new = "Bb2@cachecache"
+    r = c.post(
+        "/auth/change-password",
+        headers=headers,
+        json={"old_password": PASSWORD, "new_password": new},
+    )
+    assert r.status_code == 204
+    assert principal_cache.get(EMAIL) is None
+    r = c.post(
+        "/auth/change-password",
+        headers=_login(new),
+        json={"old_password": new, "new_password": PASSWORD},
+    )
+    assert r.status_code == 204
+
+
+def test_user_id_claim_needs_no_lookup(monkeypatch):
+    monkeypatch.setattr(settings, "jwt_user_id_claim", True)
+    headers = _login()
+    principal_cache.clear()
+    with _UserQueries() as q:
+        assert c.get("/ml/stats", headers=headers).status_code == 200
+    assert q.n == 0
+    assert c.get("/auth/me", headers=headers).json()["email"] == EMAIL
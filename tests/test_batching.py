@@ -0,0 +1,79 @@
+import threading
+import time
+
+from app.batching import BatchScheduler
+
+
+def test_concurrent_rows_share_batches():
+    def double(rows):
+        time.sleep(0.005)  # let the queue build up behind the running batch
+        return [r * 2 for r in rows]
+
+    sched = BatchScheduler(double, max_batch_size=8, max_wait_us=2000)
+    results = {}
+
+    def call(i):
+        results[i] = sched(i, timeout=5)
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(32)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    sched.stop()
+
+    assert results == {i: i * 2 for i in range(32)}
+    stats = sched.stats()
+    assert stats["rows"] == 32
+    assert stats["batches"] < 32
+    assert max(stats["batch_size_histogram"]) <= 8
+    assert stats["queue_depth"] == 0
+
+
+def test_errors_propagate_to_every_caller():
+    def boom(rows):
+        raise ValueError("bad batch")
+
+    sched = BatchScheduler(boom, max_wait_us=0)
+    try:
+        sched(1, timeout=5)
+    except ValueError as err:
+        assert "bad batch" in str(err)
+    else:
+        raise AssertionError("expected ValueError")
+    finally:
+        sched.stop()
+
+
+def test_bad_row_only_fails_its_caller():
+    def strict(rows):
+        if any(r < 0 for r in rows):
+            raise ValueError("negative row")
+        return rows
+
+    sched = BatchScheduler(strict, max_batch_size=8, max_wait_us=50_000)
+    futures = [sched.submit(r) for r in (1, -1, 2)]
+    assert futures[0].result(5) == 1
+    assert futures[2].result(5) == 2
+    assert isinstance(futures[1].exception(5), ValueError)
+    sched.stop()
+
+
+def test_wrong_result_count_does_not_kill_worker():
+    sched = BatchScheduler(lambda rows: [], max_wait_us=0)
+    assert isinstance(sched.submit(1).exception(5), RuntimeError)
+    sched._fn = lambda rows: rows
+    assert sched(2, timeout=5) == 2
+    sched.stop()
+
+
+def test_submit_after_stop_is_rejected():
+    sched = BatchScheduler(lambda rows: rows)
+    assert sched(1, timeout=5) == 1
+    sched.stop()
+    try:
+        sched.submit(2)
+    except RuntimeError:
+        pass
+    else:
+        raise AssertionError("expected RuntimeError")
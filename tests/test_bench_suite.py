@@ -0,0 +1,26 @@
+import pytest
+
+from benchmarks.common import percentiles
+from benchmarks.suite import compare
+
+
+def _run(rps, p95, errors=0):
+    return {"scenarios": {"items_mix": {"rps": rps, "p95_ms": p95, "errors": errors}}}
+
+
+def test_compare_flags_only_regressions_past_the_threshold():
+    base = _run(100, 10.0)
+    assert compare(_run(95, 10.5), base, 0.10) == []
+    assert compare(_run(200, 5.0), base, 0.10) == []
+    failures = compare(_run(80, 12.0, errors=3), base, 0.10)
+    assert len(failures) == 3
+    assert all(f.startswith("items_mix:") for f in failures)
+    # scenarios missing from the baseline are not compared
+    assert compare(_run(1, 1000.0), {"scenarios": {}}, 0.10) == []
+
+
+def test_percentiles_in_milliseconds():
+    p = percentiles([i / 1000 for i in range(1, 101)])
+    assert p["p50_ms"] == pytest.approx(50.5)
+    assert 95 <= p["p95_ms"] <= 96
+    assert percentiles([0.002]) == {"p50_ms": 2.0, "p95_ms": 2.0, "p99_ms": 2.0}
@@ -0,0 +1,30 @@
+from fastapi.testclient import TestClient
+
+from app import db
+from app.config import settings
+from app.main import app
+
+c = TestClient(app)
+
+
+def test_pool_metrics_endpoint():
+    c.post("/auth/register", json={"email": "pool@example.com", "password": "Aa1!poolpool1"})
+    r = c.post("/auth/login", data={"username": "pool@example.com", "password": "Aa1!poolpool1"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+    assert c.get("/health/db").status_code == 401
+    body = c.get("/health/db", headers=headers).json()
+    assert body["sync"]["size"] == settings.db_pool_size
+    assert body["sync"]["checked_out"] >= 0
+    wait = body["checkout_wait_seconds"]
+    assert wait["count"] > 0 and wait["buckets"]["+Inf"] == wait["count"]
+
+
+def test_statement_timeout_from_settings(monkeypatch):
+    monkeypatch.setattr(settings, "db_statement_timeout_ms", 4321)
+    for pgbouncer in (False, True):
+        monkeypatch.setattr(settings, "db_pgbouncer", pgbouncer)
+        eng = db.build_engine(settings.database_url)
+        with eng.connect() as conn:
+            assert conn.exec_driver_sql("SHOW statement_timeout").scalar() == "4321ms"
+        eng.dispose()
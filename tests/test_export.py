@@ -0,0 +1,82 @@
+import csv
+import gzip
+import io
+import json
+import sys
+import uuid
+
+import pytest
+from fastapi.testclient import TestClient
+
+from app import export
+from app.main import app
+
+c = TestClient(app)
+
+
+def _login() -> dict[str, str]:
+    email = f"export-{uuid.uuid4().hex[:8]}@example.com"
+    c.post("/auth/register", json={"email": email, "password": "Sup3rSaf3!Pass"})
+    r = c.post("/auth/login", data={"username": email, "password": "Sup3rSaf3!Pass"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_items_ndjson_resume_and_csv_gzip():
+    headers = _login()
+    tag = uuid.uuid4().hex[:8]
+    ids = [
+        c.post("/items", headers=headers, json={"name": f"exp-{tag}-{i}"}).json()["id"]
+        for i in range(3)
+    ]
+    assert c.get("/export/items").status_code == 401
+
+    params = {"after_id": ids[0] - 1, "before_id": ids[-1] + 1}
+    r = c.get("/export/items", headers=headers, params=params)
+    assert r.headers["content-type"] == "application/x-ndjson"
+    assert 'filename="items.ndjson"' in r.headers["content-disposition"]
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert [row["id"] for row in rows] == ids
+    assert rows[1]["name"] == f"exp-{tag}-1"
+
+    # resume after the first row; gzip decodes to the same rows as CSV
+    params = {**params, "after_id": ids[0], "format": "csv", "compress": "gzip"}
+    r = c.get("/export/items", headers=headers, params=params)
+    assert r.headers["content-type"] == "application/gzip"
+    table = list(csv.DictReader(io.StringIO(gzip.decompress(r.content).decode())))
+    assert [int(row["id"]) for row in table] == ids[1:]
+
+    r = c.get("/export/items", headers=headers, params={"after_id": ids[-1] + 10**9})
+    assert r.status_code == 200 and r.text == ""
+
+
+def test_predictions_are_scoped_to_the_caller(tmp_path):
+    headers, other = _login(), _login()
+    sample = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+    for _ in range(2):
+        c.post("/ml/predict", headers=headers, json=sample)
+    c.post("/ml/predict", headers=other, json=sample)
+
+    r = c.get("/export/predictions", headers=headers)
+    rows = [json.loads(line) for line in r.text.splitlines()]
+    assert len(rows) == 2 and len({row["user_id"] for row in rows}) == 1
+    assert {k: rows[0][k] for k in sample} == sample
+    assert rows[0]["pred_label"] == "setosa"
+
+    # the CLI writes the same rows
+    out = tmp_path / "preds.ndjson"
+    export.main(["predictions", "--user-id", str(rows[0]["user_id"]), "-o", str(out)])
+    assert [json.loads(line) for line in out.read_text().splitlines()] == rows
+
+
+def test_parquet_export():
+    pq = pytest.importorskip("pyarrow.parquet")
+    r = c.get("/export/items", headers=_login(), params={"format": "parquet"})
+    assert r.status_code == 200
+    assert "id" in pq.read_table(io.BytesIO(r.content)).column_names
+
+
+def test_missing_optional_package_is_a_501(monkeypatch):
+    monkeypatch.setitem(sys.modules, "zstandard", None)  # import raises ImportError
+    r = c.get("/export/items", headers=_login(), params={"compress": "zstd"})
+    assert r.status_code == 501
+    assert "zstandard" in r.json()["detail"]
@@ -0,0 +1,62 @@
+import joblib
+import numpy as np
+import pytest
+from sklearn.datasets import load_iris
+from sklearn.decomposition import PCA
+from sklearn.linear_model import LogisticRegression
+from sklearn.pipeline import Pipeline
+from sklearn.preprocessing import StandardScaler
+
+from app import fastpath
+from app.fastpath import LinearPredictor, compile_linear, compiled_or_original
+from app.model import ModelRegistry
+
+X, y = load_iris(return_X_y=True)
+
+
+@pytest.mark.parametrize(
+    "model",
+    [
+        Pipeline([("s", StandardScaler()), ("c", LogisticRegression(max_iter=500))]),
+        Pipeline([("s", StandardScaler(with_mean=False)), ("c", LogisticRegression())]),
+        LogisticRegression(max_iter=1000),
+        LogisticRegression(fit_intercept=False, max_iter=1000),
+    ],
+)
+def test_compiled_matches_predict_proba(model):
+    model.fit(X, y)
+    fast = compile_linear(model)
+    assert fast is not None
+    np.testing.assert_allclose(fast.predict_proba(X), model.predict_proba(X), rtol=1e-9)
+    np.testing.assert_allclose(fast.predict_proba(X[0]), model.predict_proba(X[:1]), rtol=1e-9)
+
+
+def test_binary_and_fresh_outputs():
+    model = Pipeline([("s", StandardScaler()), ("c", LogisticRegression())]).fit(X, y == 0)
+    fast = compile_linear(model)
+    first = fast.predict_proba(X[:1])
+    second = fast.predict_proba(X[-1:])
+    np.testing.assert_allclose(first, model.predict_proba(X[:1]), rtol=1e-9)
+    assert not np.shares_memory(first, second)
+    np.testing.assert_allclose(fast.predict_proba(X), model.predict_proba(X), rtol=1e-9)
+
+
+def test_unsupported_or_disagreeing_models_fall_back(monkeypatch):
+    pca = Pipeline([("p", PCA(2)), ("c", LogisticRegression())]).fit(X, y)
+    assert compile_linear(pca) is None
+    assert compiled_or_original(pca) is pca
+
+    model = LogisticRegression(max_iter=1000).fit(X, y)
+    wrong = LinearPredictor(np.zeros((3, 4)), np.zeros(3), "softmax")
+    monkeypatch.setattr(fastpath, "compile_linear", lambda m: wrong)
+    assert compiled_or_original(model) is model
+
+
+def test_registry_serves_the_compiled_predictor(tmp_path):
+    joblib.dump(joblib.load("artifacts/iris_clf.joblib"), tmp_path / "v1.joblib")
+    bundle = ModelRegistry(tmp_path, "v1", compiled=True).get()
+    assert isinstance(bundle.predictor, LinearPredictor)
+    assert bundle.report()["compiled"] is True
+    np.testing.assert_allclose(
+        bundle.predictor.predict_proba(X), bundle.model.predict_proba(X), rtol=1e-9
+    )
@@ -0,0 +1,81 @@
+import threading
+
+import pytest
+from fastapi.testclient import TestClient
+from sqlalchemy import update
+
+from app import models
+from app.db import SessionLocal
+from app.hashing import HashPool, PoolSaturated
+from app.main import app
+from app.security import hash_pool, pwd
+
+c = TestClient(app)
+
+
+def test_pool_rejects_when_saturated():
+    pool = HashPool(workers=1, max_pending=1, timeout_s=0.05)
+    gate = threading.Event()
+    try:
+        running = pool.submit(gate.wait)
+        queued = pool.submit(lambda: "queued")
+        with pytest.raises(PoolSaturated):
+            pool.submit(lambda: "rejected")
+        assert pool.stats()["rejected"] == 1
+        gate.set()
+        assert running.result(1) is True
+        assert queued.result(1) == "queued"
+        assert pool.run(lambda: 42) == 42
+    finally:
+        gate.set()
+        pool.stop()
+
+
+def test_pool_times_out_queued_job():
+    pool = HashPool(workers=1, max_pending=1, timeout_s=0.05)
+    gate = threading.Event()
+    try:
+        pool.submit(gate.wait)
+        with pytest.raises(PoolSaturated):
+            pool.run(lambda: "never")
+        assert pool.stats()["timeouts"] == 1
+    finally:
+        gate.set()
+        pool.stop()
+    assert pool.stats()["in_flight"] == 0
+
+
+def test_login_returns_503_when_pool_is_full(monkeypatch):
+    monkeypatch.setattr(hash_pool, "submit", _reject)
+    r = c.post("/auth/register", json={"email": "shed@example.com", "password": "Aa1!shedshed"})
+    assert r.status_code == 503
+    assert r.headers["Retry-After"] == "1"
+
+
+def _reject(*args):
+    raise PoolSaturated
+
+
+def test_outdated_hash_is_upgraded_on_login():
+    email, password = "rehash@example.com", "Aa1!rehashrehash"
+    c.post("/auth/register", json={"email": email, "password": password})
+    weak = pwd.handler().using(rounds=1000).hash(password)
+    with SessionLocal() as db:
+        db.execute(
+            update(models.User).where(models.User.email == email).values(hashed_password=weak)
+        )
+        db.commit()
+
+    r = c.post("/auth/login", data={"username": email, "password": password})
+    assert r.status_code == 200, r.text
+    with SessionLocal() as db:
+        user = db.query(models.User).filter(models.User.email == email).one()
+    assert user.hashed_password != weak
+    assert not pwd.needs_update(user.hashed_password)
+    assert c.post("/auth/login", data={"username": email, "password": password}).status_code == 200
+    stats = c.get("/auth/stats", headers=_bearer(r)).json()["hash_pool"]
+    assert stats["hash_seconds"]["count"] > 0
+
+
+def _bearer(r):
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
@@ -0,0 +1,210 @@
+import asyncio
+import uuid
+from datetime import UTC, datetime, timedelta
+
+import httpx
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import func, insert, select
+
+from app import models
+from app.db import get_engine
+from app.idempotency import (
+    DBStore,
+    IdempotencyGuard,
+    IdempotencyMiddleware,
+    MemoryStore,
+    Outcome,
+    build_guard,
+    purge_expired,
+)
+from app.main import app
+from app.security import create_access_token
+
+c = TestClient(IdempotencyMiddleware(app, build_guard()))  # as with IDEMPOTENCY_ENABLED
+
+
+def _headers():
+    c.post("/auth/register", json={"email": "idem@example.com", "password": "Aa1!idemidem1"})
+    r = c.post("/auth/login", data={"username": "idem@example.com", "password": "Aa1!idemidem1"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_retried_create_item_runs_once():
+    headers = {**_headers(), "Idempotency-Key": uuid.uuid4().hex}
+    name = f"idem-{uuid.uuid4().hex[:8]}"
+    first = c.post("/items", headers=headers, json={"name": name})
+    retry = c.post("/items", headers=headers, json={"name": name})
+    assert first.status_code == retry.status_code == 201
+    assert retry.json() == first.json() and retry.headers["idempotent-replayed"] == "true"
+    with get_engine().connect() as conn:
+        count = conn.scalar(select(func.count()).where(models.Item.name == name))
+    assert count == 1
+
+    other = c.post("/items", headers=headers, json={"name": name + "-other"})
+    assert other.status_code == 422  # same key, different request
+    assert (
+        c.post("/items", headers={"Idempotency-Key": "k"}, json={"name": name}).status_code == 401
+    )
+
+
+def test_errors_are_not_replayed():
+    headers = {**_headers(), "Idempotency-Key": uuid.uuid4().hex}
+    assert c.post("/items", headers=headers, json={}).status_code == 422
+    assert c.post("/items", headers=headers, json={}).status_code == 422
+    assert c.post("/items", headers=headers, json={"name": "fixed"}).status_code == 201
+
+
+def _slow_app(store) -> tuple[FastAPI, list[int]]:
+    calls = []
+    mini = FastAPI()
+    guard = IdempotencyGuard(store, frozenset({"/work", "/fail"}), wait_s=5.0)
+    mini.add_middleware(IdempotencyMiddleware, guard=guard)
+
+    @mini.post("/work")
+    async def work(payload: dict):
+        calls.append(payload["n"])
+        await asyncio.sleep(0.3)
+        return {"n": payload["n"], "call": len(calls)}
+
+    @mini.post("/fail")
+    async def fail():
+        calls.append(0)
+        raise HTTPException(500)
+
+    mini.state.guard = guard
+    return mini, calls
+
+
+@pytest.mark.parametrize("store", [MemoryStore, DBStore], ids=["memory", "db"])
+def test_concurrent_duplicates_wait_for_the_first(store):
+    mini, calls = _slow_app(store())
+    token = create_access_token(f"idem-{uuid.uuid4().hex}@example.com", 5)
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "k1"}
+
+    async def scenario():
+        transport = httpx.ASGITransport(app=mini)
+        async with httpx.AsyncClient(transport=transport, base_url="http://t") as client:
+            rs = await asyncio.gather(
+                *(client.post("/work", headers=headers, json={"n": 7}) for _ in range(4))
+            )
+            busy = await asyncio.gather(
+                client.post("/fail", headers={**headers, "Idempotency-Key": "k2"}),
+                client.post("/fail", headers={**headers, "Idempotency-Key": "k2"}),
+            )
+        return rs, busy
+
+    responses, failed = asyncio.run(scenario())
+    assert [r.json() for r in responses] == [{"n": 7, "call": 1}] * 4
+    assert sum(r.headers.get("idempotent-replayed") == "true" for r in responses) == 3
+    # a failed first attempt releases the key: the duplicate runs again
+    assert [r.status_code for r in failed] == [500, 500]
+    assert calls == [7, 0, 0]
+    counts = mini.state.guard.stats()
+    assert counts["executed"] == 3 and counts["replayed_after_wait"] == 3
+
+
+def test_oversized_bodies_are_refused_before_running():
+    mini, calls = _slow_app(MemoryStore())
+    mini.state.guard.max_request_bytes = 16
+    token = create_access_token("idem-large@example.com", 5)
+    headers = {"Authorization": f"Bearer {token}", "Idempotency-Key": "big"}
+    client = TestClient(mini)
+    r = client.post("/work", headers=headers, json={"n": 1, "pad": "x" * 32})
+    assert r.status_code == 413 and calls == []
+
+    def chunked():  # no Content-Length: caught while reading
+        yield b'{"n": 1, '
+        yield b'"pad": "' + b"x" * 32 + b'"}'
+
+    r = client.post(
+        "/work", headers={**headers, "Content-Type": "application/json"}, content=chunked()
+    )
+    assert r.status_code == 413 and calls == []
+    assert client.post("/work", headers=headers, json={"n": 1}).status_code == 200
+    assert mini.state.guard.stats()["too_large"] == 2
+
+
+def test_long_subject_and_key_fit_the_db_store():
+    mini, calls = _slow_app(DBStore())
+    email = "a" * (255 - len("@example.com")) + "@example.com"
+    headers = {
+        "Authorization": f"Bearer {create_access_token(email, 5)}",
+        "Idempotency-Key": uuid.uuid4().hex + "k" * 223,  # 255 characters
+    }
+    client = TestClient(mini)
+    first = client.post("/work", headers=headers, json={"n": 1})
+    retry = client.post("/work", headers=headers, json={"n": 1})
+    assert first.status_code == retry.status_code == 200
+    assert retry.headers["idempotent-replayed"] == "true" and calls == [1]
+
+
+def test_app_sees_the_disconnect_after_the_body():
+    seen = []
+
+    async def app(scope, receive, send):
+        seen.extend([await receive(), await receive()])
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    messages = [
+        {"type": "http.request", "body": b'{"n":', "more_body": True},
+        {"type": "http.request", "body": b"1}", "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+    async def receive():
+        return messages.pop(0)
+
+    async def send(message):
+        pass
+
+    token = create_access_token("idem-disconnect@example.com", 5)
+    scope = {
+        "type": "http",
+        "method": "POST",
+        "path": "/work",
+        "query_string": b"",
+        "headers": [(b"authorization", f"Bearer {token}".encode()), (b"idempotency-key", b"k")],
+    }
+    guard = IdempotencyGuard(MemoryStore(), frozenset({"/work"}))
+    asyncio.run(IdempotencyMiddleware(app, guard)(scope, receive, send))
+    assert seen == [
+        {"type": "http.request", "body": b'{"n":1}', "more_body": False},
+        {"type": "http.disconnect"},
+    ]
+
+
+def test_memory_store_is_bounded():
+    async def scenario():
+        store = MemoryStore(max_keys=1)
+        assert (await store.acquire("a", "fp"))[0] is Outcome.RUN
+        assert (await store.acquire("b", "fp"))[0] is Outcome.BUSY  # no room to track it
+        await store.complete("a", "fp", None)
+        assert (await store.acquire("b", "fp"))[0] is Outcome.RUN
+
+    asyncio.run(scenario())
+
+
+def test_db_store_takes_over_abandoned_claims_and_purges():
+    key = f"sub:test:{uuid.uuid4().hex}"
+    past = datetime.now(UTC) - timedelta(seconds=1)
+    with get_engine().begin() as conn:
+        conn.execute(
+            insert(models.IdempotencyKey).values(key=key, fingerprint="a", expires_at=past)
+        )
+    store = DBStore(lock_timeout_s=60)
+    assert asyncio.run(store.acquire(key, "b"))[0] is Outcome.RUN  # its worker died
+    assert asyncio.run(store.acquire(key, "b"))[0] is Outcome.BUSY
+    with get_engine().begin() as conn:
+        conn.execute(
+            models.IdempotencyKey.__table__.update()
+            .where(models.IdempotencyKey.key == key)
+            .values(expires_at=past)
+        )
+        assert purge_expired(conn) >= 1
+        assert (
+            conn.scalar(select(models.IdempotencyKey.key).where(models.IdempotencyKey.key == key))
+            is None
+        )
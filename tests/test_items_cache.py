@@ -0,0 +1,107 @@
+import uuid
+
+from fastapi.testclient import TestClient
+from sqlalchemy import event
+
+from app.config import settings
+from app.db import engine
+from app.main import app
+from app.respcache import items_cache
+
+c = TestClient(app)
+
+
+class FakeSharedBackend:
+    """Dict-backed stand-in for a shared cache such as Redis."""
+
+    def __init__(self):
+        self.data = {}
+
+    def get(self, key):
+        return self.data.get(key)
+
+    def set(self, key, value):
+        self.data[key] = value
+
+    def delete(self, key):
+        self.data.pop(key, None)
+
+    def scan(self, prefix):
+        return [(k, v) for k, v in list(self.data.items()) if k.startswith(prefix)]
+
+    def clear(self):
+        self.data.clear()
+
+
+def _headers():
+    c.post("/auth/register", json={"email": "etag@example.com", "password": "Aa1!etagetag1"})
+    r = c.post("/auth/login", data={"username": "etag@example.com", "password": "Aa1!etagetag1"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}
+
+
+def test_cached_reads_etags_and_exact_invalidation(monkeypatch):
+    monkeypatch.setattr(settings, "items_cache_enabled", True)
+    monkeypatch.setattr(items_cache, "backend", FakeSharedBackend())
+    headers = _headers()
+    tag = f"etag-{uuid.uuid4().hex[:8]}"
+    a = c.post("/items", headers=headers, json={"name": f"{tag}-a"}).json()
+
+    r1 = c.get(f"/items/{a['id']}")
+    etag = r1.headers["ETag"]
+    statements = []
+
+    def listener(conn, cursor, statement, *args):
+        statements.append(statement)
+
+    event.listen(engine, "before_cursor_execute", listener)
+    try:
+        r2 = c.get(f"/items/{a['id']}")
+        r3 = c.get(f"/items/{a['id']}", headers={"If-None-Match": etag})
+    finally:
+        event.remove(engine, "before_cursor_execute", listener)
+    assert r2.json() == r1.json() == a
+    assert r3.status_code == 304 and r3.content == b""
+    assert not any("FROM items" in s for s in statements)
+
+    page = c.get("/items", params={"q": tag})
+    assert [i["id"] for i in page.json()] == [a["id"]]
+
+    # update: item entry and the page containing it are dropped, ETag changes
+    c.put(f"/items/{a['id']}", headers=headers, json={"name": f"{tag}-a2"})
+    r4 = c.get(f"/items/{a['id']}", headers={"If-None-Match": etag})
+    assert r4.status_code == 200 and r4.json()["name"] == f"{tag}-a2"
+    assert r4.headers["ETag"] != etag
+    assert c.get("/items", params={"q": tag}).json()[0]["name"] == f"{tag}-a2"
+
+    # create: first pages see the new row
+    b = c.post("/items", headers=headers, json={"name": f"{tag}-b"}).json()
+    assert [i["id"] for i in c.get("/items", params={"q": tag}).json()] == [b["id"], a["id"]]
+
+    # delete: gone from both the row and the page
+    c.delete(f"/items/{a['id']}", headers=headers)
+    assert c.get(f"/items/{a['id']}").status_code == 404
+    assert [i["id"] for i in c.get("/items", params={"q": tag}).json()] == [b["id"]]
+    c.delete(f"/items/{b['id']}", headers=headers)
+
+
+def test_page_entries_only_cover_their_id_range(monkeypatch):
+    monkeypatch.setattr(settings, "items_cache_enabled", True)
+    backend = FakeSharedBackend()
+    monkeypatch.setattr(items_cache, "backend", backend)
+    headers = _headers()
+    tag = f"range-{uuid.uuid4().hex[:8]}"
+    ids = [
+        c.post("/items", headers=headers, json={"name": f"{tag}-{i}"}).json()["id"]
+        for i in range(4)
+    ]
+
+    first = c.get("/items", params={"q": tag, "limit": 2})
+    c.get("/items", params={"q": tag, "limit": 2, "cursor": first.headers["X-Next-Cursor"]})
+    assert len(backend.scan("items:page:")) == 2
+
+    # ids[0] is only on the second page
+    c.put(f"/items/{ids[0]}", headers=headers, json={"name": f"{tag}-0b"})
+    [(key, _)] = backend.scan("items:page:")
+    assert key == items_cache.page_key(tag, 2, 0, None)
+    for item_id in ids:
+        c.delete(f"/items/{item_id}", headers=headers)
@@ -1,3 +1,5 @@
+import uuid
+
 from fastapi.testclient import TestClient
 
 from app.main import app
@@ -45,3 +47,73 @@ def test_crud_flow():
     # delete (protected)
     r = c.delete(f"/items/{item['id']}", headers=headers)
     assert r.status_code == 204
+
+
+def test_cursor_pagination_and_search():
+    headers = {"Authorization": f"Bearer {_get_token()}"}
+    tag = f"page-{uuid.uuid4().hex[:8]}"
+    ids = [
+        c.post("/items", headers=headers, json={"name": f"{tag}-{i}"}).json()["id"]
+        for i in range(5)
+    ]
+
+    seen, cursor = [], None
+    while True:
+        params = {"q": tag, "limit": 2, **({"cursor": cursor} if cursor else {})}
+        r = c.get("/items", params=params)
+        assert r.status_code == 200
+        seen += [i["id"] for i in r.json()]
+        cursor = r.headers.get("X-Next-Cursor")
+        if not cursor:
+            break
+    assert seen == sorted(ids, reverse=True)
+
+    r = c.get("/items", params={"q": tag, "after_id": ids[2], "limit": 10})
+    assert [i["id"] for i in r.json()] == [ids[1], ids[0]]
+    # LIKE wildcards in q are literal
+    assert c.get("/items", params={"q": tag.replace("-", "_")}).json() == []
+    assert c.get("/items", params={"limit": 10_000}).status_code == 422
+    assert c.get("/items", params={"cursor": "not-a-cursor"}).status_code == 400
+    for item_id in ids:
+        c.delete(f"/items/{item_id}", headers=headers)
+
+
+def test_bulk_create_update_delete():
+    headers = {"Authorization": f"Bearer {_get_token()}"}
+    tag = f"bulk-{uuid.uuid4().hex[:8]}"
+
+    rows = [{"name": f"{tag}-{i}", "description": str(i)} for i in range(3)]
+    too_long = {"name": "x" * 300}
+    r = c.post("/items/bulk", headers=headers, json={"items": [*rows, too_long]})
+    assert r.status_code == 422
+    assert c.get("/items", params={"q": tag}).json() == []
+
+    r = c.post("/items/bulk", headers=headers, json={"items": [*rows, too_long], "mode": "partial"})
+    assert r.status_code == 201, r.text
+    body = r.json()
+    assert [i["name"] for i in body["items"]] == [row["name"] for row in rows]
+    assert [(e["index"], e["id"]) for e in body["errors"]] == [(3, None)]
+    ids = [i["id"] for i in body["items"]]
+
+    missing = max(ids) + 1_000_000
+    changes = [{"id": ids[0], "name": f"{tag}-a"}, {"id": missing, "name": f"{tag}-b"}]
+    r = c.patch("/items/bulk", headers=headers, json={"items": changes})
+    assert r.status_code == 404
+    assert c.get(f"/items/{ids[0]}").json()["name"] == f"{tag}-0"
+
+    r = c.patch("/items/bulk", headers=headers, json={"items": changes, "mode": "partial"})
+    assert r.status_code == 200, r.text
+    body = r.json()
+    assert [(i["id"], i["name"]) for i in body["items"]] == [(ids[0], f"{tag}-a")]
+    assert [e["id"] for e in body["errors"]] == [missing]
+    assert c.get(f"/items/{ids[0]}").headers["ETag"] == f'"{ids[0]}.2"'
+
+    r = c.request("DELETE", "/items/bulk", headers=headers, json={"ids": [*ids, missing]})
+    assert r.status_code == 404
+    r = c.request(
+        "DELETE", "/items/bulk", headers=headers, json={"ids": [*ids, missing], "mode": "partial"}
+    )
+    assert r.status_code == 200, r.text
+    assert r.json()["deleted"] == ids
+    assert [e["index"] for e in r.json()["errors"]] == [3]
+    assert c.get("/items", params={"q": tag}).json() == []
@@ -0,0 +1,101 @@
+import gzip
+import uuid
+from datetime import UTC, date, datetime
+
+from fastapi.testclient import TestClient
+from sqlalchemy import delete, func, insert, select, text
+
+from app import maintenance, models
+from app.config import settings
+from app.db import engine
+from app.main import app
+
+c = TestClient(app)
+
+
+def _login() -> tuple[dict[str, str], int]:
+    email = f"maint-{uuid.uuid4().hex[:8]}@example.com"
+    user_id = c.post("/auth/register", json={"email": email, "password": "Sup3rSaf3!Pass"})
+    r = c.post("/auth/login", data={"username": email, "password": "Sup3rSaf3!Pass"})
+    return {"Authorization": f"Bearer {r.json()['access_token']}"}, user_id.json()["id"]
+
+
+def _row(user_id: int, ts: str, label: str, confidence: float) -> dict:
+    return {
+        "user_id": user_id,
+        "features": {},
+        "pred_label": label,
+        "pred_confidence": confidence,
+        "created_at": datetime.fromisoformat(ts).replace(tzinfo=UTC),
+    }
+
+
+def test_partitions_rollups_and_expiry(monkeypatch, tmp_path):
+    headers, user_id = _login()
+    rows = [
+        _row(user_id, "2001-01-20T08:00", "setosa", 0.97),
+        _row(user_id, "2001-01-20T18:00", "virginica", 0.55),
+        _row(user_id, "2001-02-03T10:00", "setosa", 1.0),
+        _row(user_id, "2001-02-03T11:00", "setosa", 0.81),
+        _row(user_id, "2001-02-10T23:59", "versicolor", 0.42),
+    ]
+    with engine.begin() as conn:
+        # no partition covers 2001 yet: everything lands in predictions_default
+        conn.execute(insert(models.Prediction), rows)
+        assert maintenance.ensure_partitions(conn, date(2001, 1, 5), ahead=1) == [
+            "predictions_p200101",
+            "predictions_p200102",
+        ]
+        assert maintenance.ensure_partitions(conn, date(2001, 1, 5), ahead=1) == []
+        per_table = dict(
+            conn.execute(
+                text(
+                    "SELECT tableoid::regclass::text, count(*) FROM predictions "
+                    "WHERE user_id = :u GROUP BY 1"
+                ),
+                {"u": user_id},
+            ).all()
+        )
+        assert per_table == {"predictions_p200101": 2, "predictions_p200102": 3}
+        maintenance.refresh_rollups(conn, datetime.now(UTC).date(), since=date(2001, 1, 1))
+
+    windows = [
+        {"since": "2001-01-01T00:00:00Z", "until": "2001-03-01T00:00:00Z"},
+        # partial days at both ends come from raw rows, whole days from the rollups
+        {"since": "2001-01-20T12:00:00Z", "until": "2001-02-10T12:00:00Z"},
+        {"since": "2001-01-01T00:00:00Z", "label": "setosa"},
+    ]
+    paths = ["/ml/predictions/labels", "/ml/predictions/daily", "/ml/predictions/confidence"]
+
+    def answers():
+        return [c.get(p, headers=headers, params=w).json() for p in paths for w in windows]
+
+    raw = answers()
+    monkeypatch.setattr(settings, "predictions_rollups", True)
+    rolled = answers()
+    assert rolled == raw
+    assert raw[0] == [
+        {"label": "setosa", "count": 3, "avg_confidence": (0.97 + 1.0 + 0.81) / 3},
+        {"label": "versicolor", "count": 1, "avg_confidence": 0.42},
+        {"label": "virginica", "count": 1, "avg_confidence": 0.55},
+    ]
+    with engine.connect() as conn:
+        rollup_rows = conn.scalar(
+            select(func.sum(models.PredictionDailyRollup.count)).where(
+                models.PredictionDailyRollup.user_id == user_id
+            )
+        )
+    assert rollup_rows == 5
+
+    with engine.begin() as conn:
+        dropped = maintenance.expire_partitions(conn, date(2001, 3, 5), 1, str(tmp_path))
+        assert dropped == ["predictions_p200101", "predictions_p200102"]
+        left = conn.scalar(select(func.count()).where(models.Prediction.user_id == user_id))
+        assert left == 0
+        conn.execute(
+            delete(models.PredictionDailyRollup).where(
+                models.PredictionDailyRollup.user_id == user_id
+            )
+        )
+    with gzip.open(tmp_path / "predictions_p200102.csv.gz", "rt") as f:
+        assert len(f.read().splitlines()) == 1 + 3  # header + rows
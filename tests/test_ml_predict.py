@@ -1,5 +1,13 @@
+import json
+import uuid
+
+import pytest
 from fastapi.testclient import TestClient
+from sqlalchemy import event, func, select
 
+from app import models
+from app.config import settings
+from app.db import SessionLocal, engine
 from app.main import app
 
 c = TestClient(app)
@@ -28,3 +36,148 @@ def test_predict():
     body = r.json()
     assert "label" in body and "probabilities" in body
     assert isinstance(body["probabilities"], dict)
+
+
+def test_predict_same_with_and_without_batching(monkeypatch):
+    headers = {"Authorization": f"Bearer {_get_token()}"}
+    row = {"sepal_length": 6.3, "sepal_width": 2.9, "petal_length": 5.6, "petal_width": 1.8}
+
+    monkeypatch.setattr(settings, "predict_batching", False)
+    direct = c.post("/ml/predict", headers=headers, json=row).json()
+    monkeypatch.setattr(settings, "predict_batching", True)
+    batched = c.post("/ml/predict", headers=headers, json=row).json()
+    assert batched == direct
+
+
+def test_predict_rejects_non_finite():
+    headers = {"Authorization": f"Bearer {_get_token()}", "Content-Type": "application/json"}
+    body = '{"sepal_length": NaN, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}'
+    r = c.post("/ml/predict", headers=headers, content=body)
+    assert r.status_code == 422
+
+
+def test_predict_batch_formats():
+    headers = {"Authorization": f"Bearer {_get_token()}"}
+    rows = [
+        {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2},
+        {"sepal_length": 6.3, "sepal_width": 2.9, "petal_length": 5.6, "petal_width": 1.8},
+    ]
+    singles = [c.post("/ml/predict", headers=headers, json=row).json() for row in rows]
+
+    def same(lines, expected):
+        # vectorized scoring may differ from the 1-row path in the last ulp
+        got = [json.loads(line) for line in lines]
+        assert [g["label"] for g in got] == [e["label"] for e in expected]
+        for g, e in zip(got, expected, strict=True):
+            assert g["probabilities"] == pytest.approx(e["probabilities"])
+
+    inserts = []
+
+    def count_inserts(conn, cursor, statement, params, context, executemany):
+        if statement.startswith("INSERT INTO predictions"):
+            inserts.append(statement)
+
+    with SessionLocal() as db:
+        before = db.scalar(select(func.count()).select_from(models.Prediction))
+    event.listen(engine, "before_cursor_execute", count_inserts)
+    try:
+        r = c.post("/ml/predict/batch", headers=headers, json=rows + rows)
+    finally:
+        event.remove(engine, "before_cursor_execute", count_inserts)
+    assert r.status_code == 200
+    same(r.text.splitlines(), singles + singles)
+    assert len(inserts) == 1
+    with SessionLocal() as db:
+        assert db.scalar(select(func.count()).select_from(models.Prediction)) == before + 4
+
+    columnar = {k: [row[k] for row in rows] for k in rows[0]}
+    r = c.post("/ml/predict/batch", headers=headers, json=columnar)
+    same(r.text.splitlines(), singles)
+
+    bad = {**rows[0], "petal_width": "inf"}
+    r = c.post("/ml/predict/batch", headers=headers, json=[rows[0], bad])
+    assert [("error" in json.loads(line)) for line in r.text.splitlines()] == [False, True]
+
+    ndjson = "\n".join(
+        [json.dumps(rows[0]), "{not json", json.dumps({**rows[1], "sepal_width": float("nan")})]
+    )
+    r = c.post(
+        "/ml/predict/batch",
+        headers={**headers, "Content-Type": "application/x-ndjson"},
+        content=ndjson,
+    )
+    same(r.text.splitlines()[:1], singles[:1])
+    lines = [json.loads(line) for line in r.text.splitlines()]
+    assert ["error" in line for line in lines] == [False, True, True]
+
+    r = c.post("/ml/predict/batch", headers=headers, json={"sepal_length": [1.0]})
+    assert r.status_code == 422
+
+
+def test_prediction_cache_hits_and_model_swap(monkeypatch):
+    from app.model import registry
+    from app.routers.ml import prediction_cache
+
+    headers = {"Authorization": f"Bearer {_get_token()}"}
+    row = {"sepal_length": 5.9, "sepal_width": 3.0, "petal_length": 5.1, "petal_width": 1.8}
+    nudged = {**row, "sepal_length": 5.9 + 1e-9}  # same after rounding
+    monkeypatch.setattr(settings, "predict_cache_enabled", True)
+    prediction_cache.clear()
+
+    def logged():
+        with SessionLocal() as db:
+            return db.scalar(select(func.count()).select_from(models.Prediction))
+
+    before = logged()
+    first = c.post("/ml/predict", headers=headers, json=row).json()
+    stats = prediction_cache.stats()
+    assert c.post("/ml/predict", headers=headers, json=nudged).json() == first
+    assert prediction_cache.stats()["hits"] == stats["hits"] + 1
+    assert logged() == before + 2  # hits are still logged by default
+
+    monkeypatch.setattr(settings, "predict_cache_log_hits", False)
+    assert c.post("/ml/predict", headers=headers, json=row).json() == first
+    assert logged() == before + 2
+
+    registry.load(registry.get().version)  # hot reload of the active model
+    assert len(prediction_cache) == 0
+    assert c.get("/ml/stats", headers=headers).json()["prediction_cache"]["size"] == 0
+
+
+def test_prediction_history_and_aggregates():
+    email = f"history-{uuid.uuid4().hex[:8]}@example.com"
+    c.post("/auth/register", json={"email": email, "password": "Sup3rSaf3!Pass"})
+    r = c.post("/auth/login", data={"username": email, "password": "Sup3rSaf3!Pass"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    setosa = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+    virginica = {"sepal_length": 6.3, "sepal_width": 2.9, "petal_length": 5.6, "petal_width": 1.8}
+    for row in (setosa, virginica, setosa):
+        assert c.post("/ml/predict", headers=headers, json=row).status_code == 200
+
+    r = c.get("/ml/predictions", headers=headers, params={"limit": 2})
+    first = r.json()
+    assert [p["pred_label"] for p in first] == ["setosa", "virginica"]
+    r = c.get("/ml/predictions", headers=headers, params={"cursor": r.headers["X-Next-Cursor"]})
+    assert [p["pred_label"] for p in r.json()] == ["setosa"]
+    assert "X-Next-Cursor" not in r.headers
+    assert r.json()[0]["features"] == setosa
+    with SessionLocal() as db:
+        stored = db.get(models.Prediction, r.json()[0]["id"])
+        assert (stored.features, stored.feature_values) == (None, list(setosa.values()))
+        # rows logged by older versions only have the JSONB column
+        stored.feature_values, stored.features = None, setosa
+        db.commit()
+    assert c.get("/ml/predictions", headers=headers, params={"offset": 2}).json() == r.json()
+    r = c.get("/ml/predictions", headers=headers, params={"label": "virginica"})
+    assert [p["id"] for p in r.json()] == [first[1]["id"]]
+    assert c.get("/ml/predictions", headers=headers, params={"cursor": "nope"}).status_code == 400
+
+    labels = c.get("/ml/predictions/labels", headers=headers).json()
+    assert [(row["label"], row["count"]) for row in labels] == [("setosa", 2), ("virginica", 1)]
+    hist = c.get("/ml/predictions/confidence", headers=headers, params={"buckets": 4}).json()
+    assert [b["hi"] for b in hist] == [0.25, 0.5, 0.75, 1.0]
+    assert sum(b["count"] for b in hist) == 3
+    daily = c.get("/ml/predictions/daily", headers=headers).json()
+    assert [d["count"] for d in daily] == [3]
+    r = c.get("/ml/predictions/daily", headers=headers, params={"since": "2999-01-01T00:00:00Z"})
+    assert r.json() == []
@@ -0,0 +1,97 @@
+import os
+import threading
+import time
+
+import joblib
+import pytest
+from fastapi.testclient import TestClient
+
+from app import model as model_module
+from app.main import app
+from app.model import ModelRegistry
+
+c = TestClient(app)
+
+
+@pytest.fixture
+def artifacts(tmp_path):
+    bundle = joblib.load("artifacts/iris_clf.joblib")
+    joblib.dump(bundle, tmp_path / "v1.joblib")
+    joblib.dump(
+        {**bundle, "target_names": [n.upper() for n in bundle["target_names"]]},
+        tmp_path / "v2.joblib",
+    )
+    return tmp_path
+
+
+def test_concurrent_first_calls_load_once(artifacts, monkeypatch):
+    calls = []
+    real = model_module._load_bundle
+
+    def slow_load(*args):
+        calls.append(args[0])
+        time.sleep(0.05)
+        return real(*args)
+
+    monkeypatch.setattr(model_module, "_load_bundle", slow_load)
+    reg = ModelRegistry(artifacts, "v1")
+    got = []
+    threads = [threading.Thread(target=lambda: got.append(reg.get())) for _ in range(8)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    assert calls == ["v1"]
+    assert len({id(b) for b in got}) == 1
+    assert got[0].warmup_seconds > 0
+    assert got[0].memory_bytes > 0
+
+
+def test_activate_and_hot_reload_swap_atomically(artifacts):
+    reg = ModelRegistry(artifacts, "v1")
+    old = reg.get()
+    assert reg.activate("v2").version == "v2"
+    assert reg.get().target_names[0] == "SETOSA"
+    assert old.target_names[0] == "setosa"  # in-flight holders keep their bundle
+
+    before = reg.get()
+    mtime = os.stat(artifacts / "v2.joblib").st_mtime
+    os.utime(artifacts / "v2.joblib", (mtime + 10, mtime + 10))
+    assert reg.check_for_updates() == ["v2"]
+    assert reg.get() is not before and reg.get().version == "v2"
+    assert reg.check_for_updates() == []
+
+    with pytest.raises(KeyError):
+        reg.activate("../v1")
+    with pytest.raises(ValueError):
+        reg.unload("v2")
+    report = reg.report()
+    assert report["active"] == "v2"
+    assert report["available"] == ["v1", "v2"]
+    assert {m["version"] for m in report["loaded"]} == {"v1", "v2"}
+
+
+def test_model_endpoints():
+    c.post("/auth/register", json={"email": "models@example.com", "password": "Aa1!modelsmodels"})
+    r = c.post(
+        "/auth/login", data={"username": "models@example.com", "password": "Aa1!modelsmodels"}
+    )
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    assert c.get("/ml/models").status_code == 401
+    r = c.post("/ml/models/iris_clf/activate", headers=headers, params={"reload": True})
+    assert r.status_code == 200, r.text
+    assert r.json()["version"] == "iris_clf"
+    assert c.get("/ml/models", headers=headers).json()["active"] == "iris_clf"
+    assert c.post("/ml/models/nope/activate", headers=headers).status_code == 404
+
+
+def test_mmap_loading_maps_arrays_read_only(artifacts):
+    bundle = ModelRegistry(artifacts, "v1", mmap_arrays=True).get()
+    coef = bundle.model.named_steps["clf"].coef_
+    assert not coef.flags.writeable
+    assert bundle.mapped_bytes >= coef.nbytes
+    assert ModelRegistry(artifacts, "v1").get().mapped_bytes == 0
+    assert bundle.model.predict_proba([[5.1, 3.5, 1.4, 0.2]]).shape == (1, 3)
+    report = ModelRegistry(artifacts, "v1").report()["process"]
+    if "rss_bytes" in report:  # Linux
+        assert report["rss_bytes"] >= report["private_bytes"] > 0
@@ -0,0 +1,67 @@
+import threading
+
+from fastapi.testclient import TestClient
+from sqlalchemy import func, select
+
+from app import models
+from app.config import settings
+from app.db import SessionLocal
+from app.main import app
+from app.predlog import PredictionLogWriter
+from app.routers import ml
+
+c = TestClient(app)
+
+
+class _StuckSession:
+    """Stand-in session whose writes wait until released."""
+
+    def __init__(self, gate, rows):
+        self.gate, self.rows = gate, rows
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        return False
+
+    def execute(self, stmt, params):
+        self.gate.wait(5)
+        self.rows.extend(params)
+
+    def commit(self):
+        pass
+
+
+def test_drop_policy_counts_overflow_and_stop_flushes():
+    gate, rows = threading.Event(), []
+    writer = PredictionLogWriter(
+        lambda: _StuckSession(gate, rows), max_pending=2, flush_size=1, policy="drop"
+    )
+    accepted = [writer.submit({"n": i}) for i in range(10)]
+    assert not all(accepted)
+    assert writer.stats()["dropped"] == accepted.count(False)
+
+    gate.set()
+    writer.stop()
+    assert writer.stats()["written"] == len(rows) == accepted.count(True)
+    assert writer.submit({"n": 99}) is False
+
+
+def test_async_logging_from_predict(monkeypatch):
+    c.post("/auth/register", json={"email": "log@example.com", "password": "Sup3rSaf3!Pass"})
+    r = c.post("/auth/login", data={"username": "log@example.com", "password": "Sup3rSaf3!Pass"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    with SessionLocal() as db:
+        user_id = db.scalar(select(models.User.id).where(models.User.email == "log@example.com"))
+        count = select(func.count()).where(models.Prediction.user_id == user_id)
+        before = db.scalar(count)
+
+    monkeypatch.setattr(settings, "prediction_log_async", True)
+    row = {"sepal_length": 5.9, "sepal_width": 3.0, "petal_length": 5.1, "petal_width": 1.8}
+    for _ in range(3):
+        assert c.post("/ml/predict", headers=headers, json=row).status_code == 200
+    assert ml.prediction_log.flush()
+
+    with SessionLocal() as db:
+        assert db.scalar(count) == before + 3
@@ -0,0 +1,131 @@
+import asyncio
+import time
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from fastapi.testclient import TestClient
+from sqlalchemy import create_engine, insert, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.schema import CreateTable
+from starlette.requests import Request
+
+from app import models, replicas
+from app.config import settings
+from app.main import app
+from app.replicas import STICKY_COOKIE, ReadYourWritesMiddleware, ReplicaSet
+from app.respcache import CachedResponse, MemoryBackend, ResponseCache
+
+c = TestClient(app)
+ONLY_ON_REPLICA = 2_000_000_000  # an item id that exists on the stand-in replica only
+DOWN = "postgresql://appuser:x@127.0.0.1:1/nowhere"  # nothing listens on port 1
+
+
+@pytest.fixture(scope="module")
+def replica_url():
+    """A second local database standing in for a replica, with a row the primary lacks."""
+    name = "quickapi_replica_test"
+    admin = create_engine(settings.database_url, isolation_level="AUTOCOMMIT")
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}"'))
+        conn.execute(text(f'CREATE DATABASE "{name}"'))
+    url = make_url(settings.database_url).set(database=name).render_as_string(False)
+    eng = create_engine(url)
+    with eng.begin() as conn:
+        conn.execute(CreateTable(models.Item.__table__))  # without the indexes
+        conn.execute(insert(models.Item).values(id=ONLY_ON_REPLICA, name="replica"))
+    eng.dispose()
+    yield url
+    with admin.connect() as conn:
+        conn.execute(text(f'DROP DATABASE IF EXISTS "{name}" WITH (FORCE)'))
+    admin.dispose()
+
+
+def test_reads_go_to_a_healthy_replica_unless_sticky(monkeypatch, replica_url):
+    rs = ReplicaSet([DOWN, replica_url], check_interval_s=60)
+    monkeypatch.setattr(replicas, "replicas", rs)
+    for _ in range(2):  # the down replica is tried once, then skipped
+        assert c.get(f"/items/{ONLY_ON_REPLICA}").json()["name"] == "replica"
+    down, up = rs.stats()["replicas"]
+    assert (down["healthy"], down["failures"], up["healthy"], up["reads"]) == (False, 1, True, 2)
+
+    # after its own write a client reads from the primary
+    c.cookies.set(STICKY_COOKIE, str(time.time() + 5))
+    try:
+        assert c.get(f"/items/{ONLY_ON_REPLICA}").status_code == 404
+    finally:
+        c.cookies.clear()
+    assert rs.stats()["sticky_reads"] == 1
+
+    rs.check()
+    assert [r["healthy"] for r in rs.stats()["replicas"]] == [False, True]
+    assert rs.stats()["replicas"][1]["lag_s"] == 0.0
+    asyncio.run(rs.dispose())
+
+
+def test_unexpected_check_errors_mark_the_replica_down(monkeypatch, replica_url):
+    rs = ReplicaSet([replica_url], check_interval_s=60)
+    monkeypatch.setattr(replicas, "LAG_SQL", text("SELECT 'not a number'"))
+    rs.check()  # ValueError from float(): logged, not raised out of the thread
+    (state,) = rs.stats()["replicas"]
+    assert not state["healthy"] and state["failures"] == 1 and "float" in state["error"]
+    asyncio.run(rs.dispose())
+
+
+def test_falls_back_to_the_primary(monkeypatch):
+    rs = ReplicaSet([DOWN], check_interval_s=60)
+    monkeypatch.setattr(replicas, "replicas", rs)
+    assert c.get(f"/items/{ONLY_ON_REPLICA}").status_code == 404
+    assert c.get("/items").status_code == 200
+    stats = rs.stats()
+    assert stats["primary_fallbacks"] == 2 and stats["replicas"][0]["failures"] == 1
+    asyncio.run(rs.dispose())
+
+
+def test_async_read_session(monkeypatch, replica_url):
+    rs = ReplicaSet([replica_url])
+    monkeypatch.setattr(replicas, "replicas", rs)
+    request = Request({"type": "http", "method": "GET", "headers": []})
+
+    async def name():
+        gen = replicas.get_async_read_db(request)
+        db = await anext(gen)
+        try:
+            return (await db.get(models.Item, ONLY_ON_REPLICA)).name, replicas.stale_window(db)
+        finally:
+            await gen.aclose()
+            await rs.dispose()
+
+    assert asyncio.run(name()) == ("replica", settings.db_replica_max_lag_s)
+
+
+def test_successful_writes_pin_reads_to_the_primary():
+    mini = FastAPI()
+    mini.add_middleware(ReadYourWritesMiddleware, sticky_s=5)
+
+    @mini.post("/ok")
+    def ok():
+        return {}
+
+    @mini.post("/bad")
+    def bad():
+        raise HTTPException(400)
+
+    @mini.get("/read")
+    def read():
+        return {}
+
+    client = TestClient(mini)
+    assert STICKY_COOKIE not in client.get("/read").cookies
+    assert STICKY_COOKIE not in client.post("/bad").cookies
+    until = float(client.post("/ok").cookies[STICKY_COOKIE])
+    assert time.time() < until <= time.time() + 5
+
+
+def test_replica_reads_are_not_cached_right_after_a_write(monkeypatch):
+    monkeypatch.setattr(settings, "items_cache_enabled", True)
+    cache = ResponseCache(MemoryBackend(), "t")
+    entry = CachedResponse(b"{}", etag='"1.1"')
+    cache.invalidate([1])
+    cache.put("a", entry, cache.generation, stale_s=5.0)  # replica may predate the write
+    cache.put("b", entry, cache.generation)  # primary
+    assert cache.get("a") is None and cache.get("b") is entry
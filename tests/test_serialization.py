@@ -0,0 +1,76 @@
+import json
+import uuid
+from datetime import UTC, datetime, timedelta, timezone
+
+import numpy as np
+import pytest
+from fastapi.encoders import jsonable_encoder
+from fastapi.responses import JSONResponse
+from fastapi.testclient import TestClient
+from pydantic_core import to_json
+
+from app import serialization
+from app.config import settings
+from app.main import app
+from app.schemas import IrisOut
+
+c = TestClient(app)
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "pydantic_core"])
+def test_dumps_matches_pydantic(monkeypatch, encoder):
+    if encoder == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    value = {
+        "utc": datetime(2026, 1, 2, 3, 4, 5, 678, tzinfo=UTC),
+        "offset": datetime(2026, 1, 2, 3, 4, 5, tzinfo=timezone(timedelta(hours=2))),
+        "none": None,
+        "floats": [0.1, 1e-7, float(np.float64(0.25))],
+        "text": 'ünï "q"',
+    }
+    assert serialization.dumps(value) == to_json(value)
+
+
+@pytest.mark.parametrize("encoder", ["orjson", "pydantic_core"])
+def test_extreme_floats_keep_their_values(monkeypatch, encoder):
+    if encoder == "orjson":
+        pytest.importorskip("orjson")
+    else:
+        monkeypatch.setattr(serialization, "orjson", None)
+    monkeypatch.setattr(settings, "fast_responses", True)
+    out = {"label": "setosa", "probabilities": {"setosa": 1e20, "versicolor": 1e-5, "x": 1 / 3}}
+    fast = serialization.fast_response(IrisOut, out).body
+    slow = JSONResponse(jsonable_encoder(IrisOut(**out))).body  # the response model path
+    assert json.loads(fast) == json.loads(slow)  # not the bytes: 0.00001 vs 1e-05
+
+
+def test_fast_responses_are_byte_identical(monkeypatch):
+    email = f"ser-{uuid.uuid4().hex[:8]}@example.com"
+    c.post("/auth/register", json={"email": email, "password": "Sup3rSaf3!Pass"})
+    r = c.post("/auth/login", data={"username": email, "password": "Sup3rSaf3!Pass"})
+    headers = {"Authorization": f"Bearer {r.json()['access_token']}"}
+    item = c.post("/items", headers=headers, json={"name": "ser", "description": None}).json()
+    sample = {"sepal_length": 5.1, "sepal_width": 3.5, "petal_length": 1.4, "petal_width": 0.2}
+
+    def responses():
+        return [
+            c.get("/items", params={"limit": 50}),
+            c.get(f"/items/{item['id']}"),
+            c.get("/auth/me", headers=headers),
+            c.post("/ml/predict", headers=headers, json=sample),
+        ]
+
+    slow = responses()
+    monkeypatch.setattr(settings, "fast_responses", True)
+    fast = responses()
+    for a, b in zip(slow, fast, strict=True):
+        assert a.status_code == b.status_code
+        assert a.headers["content-type"] == b.headers["content-type"]
+        assert a.content == b.content
+
+    r = c.put(f"/items/{item['id']}", headers=headers, json={"name": "ser2"})
+    assert r.status_code == 200 and r.json()["name"] == "ser2"
+    r = c.post("/items", headers=headers, json={"name": "ser3"})
+    assert r.status_code == 201 and set(r.json()) == {"id", "name", "description", "created_at"}
@@ -0,0 +1,103 @@
+import os
+import signal
+import socket
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+import httpx
+import pytest
+
+from app import serve
+from app.config import settings
+
+
+def test_auto_workers(monkeypatch):
+    monkeypatch.setattr(settings, "db_pool_size", 5)
+    monkeypatch.setattr(settings, "db_max_overflow", 5)
+    assert serve.auto_workers(4) == 4
+    assert serve.auto_workers(1.5) == 2  # a partial CPU still gets a worker
+    assert serve.auto_workers(0.25) == 1
+    assert serve.auto_workers(8, db_connections=30) == 3  # 10 connections per worker
+    assert serve.auto_workers(8, db_connections=5) == 1
+    assert 0 < serve.available_cpus() <= os.cpu_count()
+
+
+def test_per_process_items_cache_is_off_with_several_workers(monkeypatch):
+    from app.respcache import items_cache
+
+    monkeypatch.setattr(settings, "items_cache_enabled", True)
+    serve.disable_per_process_cache(1)
+    assert settings.items_cache_enabled
+    monkeypatch.setattr(items_cache, "backend", object())  # a shared store
+    serve.disable_per_process_cache(4)
+    assert settings.items_cache_enabled
+    monkeypatch.undo()
+    monkeypatch.setattr(settings, "items_cache_enabled", True)
+    serve.disable_per_process_cache(4)
+    assert not settings.items_cache_enabled
+
+
+def _free_port() -> int:
+    with socket.socket() as s:
+        s.bind(("127.0.0.1", 0))
+        return s.getsockname()[1]
+
+
+def _children(pid: int) -> set[int]:
+    found = set()
+    for stat in Path("/proc").glob("[0-9]*/stat"):
+        try:
+            fields = stat.read_text().rsplit(")", 1)[1].split()
+        except OSError:
+            continue
+        if int(fields[1]) == pid:  # ppid
+            found.add(int(stat.parent.name))
+    return found
+
+
+def _until(predicate, timeout: float = 15.0):
+    deadline = time.monotonic() + timeout
+    while time.monotonic() < deadline:
+        value = predicate()
+        if value:
+            return value
+        time.sleep(0.1)
+    raise AssertionError("timed out")
+
+
+def _healthy(port: int) -> bool:
+    try:
+        return httpx.get(f"http://127.0.0.1:{port}/health").status_code == 200
+    except httpx.TransportError:
+        return False
+
+
+@pytest.mark.skipif(not Path("/proc/self/stat").exists(), reason="needs /proc")
+def test_launcher_respawns_reloads_and_drains():
+    port = _free_port()
+    env = {**os.environ, "ENABLED_ROUTERS": '["items"]'}
+    cmd = [sys.executable, "-m", "app.serve", "--workers", "2", "--port", str(port)]
+    proc = subprocess.Popen(cmd, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    try:
+        _until(lambda: _healthy(port))
+        workers = _until(lambda: len(w := _children(proc.pid)) == 2 and w)
+
+        # a crashed worker is replaced
+        victim = min(workers)
+        os.kill(victim, signal.SIGKILL)
+        workers = _until(lambda: len(w := _children(proc.pid)) == 2 and victim not in w and w)
+        assert _healthy(port)
+
+        # SIGHUP replaces every worker
+        proc.send_signal(signal.SIGHUP)
+        _until(lambda: len(w := _children(proc.pid)) == 2 and not (w & workers))
+        assert _healthy(port)
+
+        proc.send_signal(signal.SIGTERM)
+        assert proc.wait(timeout=15) == 0
+    finally:
+        if proc.poll() is None:
+            proc.kill()
+            proc.wait()
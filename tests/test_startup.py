@@ -0,0 +1,31 @@
+import os
+
+from app import startup
+from app.main import app
+
+
+def test_each_router_is_included_once():
+    routers = [r.original_router for r in app.routes if hasattr(r, "original_router")]
+    assert len(routers) == len(set(map(id, routers))) == 4
+
+
+def test_items_only_worker_skips_the_ml_stack():
+    env = {**os.environ, "ENABLED_ROUTERS": '["items"]'}
+    report = startup.profile("/items", env=env)
+    assert report["status"] == 200
+    assert "app.routers.items" in report["modules_ms"]
+    assert not {"numpy", "sklearn", "joblib"} & set(report["packages_ms"])
+    assert "app.routers.ml" not in report["modules_ms"]
+
+    assert startup.check(report, {"import_ms": 60_000}, ["sklearn"]) == []
+    problems = startup.check(report, {"import_ms": 0.001}, ["sqlalchemy"])
+    assert len(problems) == 2 and "import_ms" in problems[0]
+
+
+def test_parse_importtime():
+    stderr = (
+        "import time: self [us] | cumulative | imported package\n"
+        "import time:       120 |        120 |   app.utils\n"
+        "import time:       880 |       1000 | app\n"
+    )
+    assert startup.parse_importtime(stderr) == [("app.utils", 120, 120), ("app", 880, 1000)]
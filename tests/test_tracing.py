@@ -0,0 +1,51 @@
+from fastapi import FastAPI
+from fastapi.testclient import TestClient
+
+from app.config import settings
+from app.main import app
+from app.metrics import Histogram, render_prometheus
+from app.routers import items
+from app.tracing import TimingMiddleware, _spans, span
+
+
+def test_server_timing_header_breaks_down_the_request():
+    traced = FastAPI()
+    traced.include_router(items.router)
+    traced.add_middleware(TimingMiddleware, server_timing=True)
+    r = TestClient(traced).get("/items")
+    assert r.status_code == 200
+    names = [part.split(";")[0] for part in r.headers["Server-Timing"].split(", ")]
+    assert "sql" in names
+    assert names[-1] == "total"
+
+
+def test_metrics_endpoint_exports_route_and_span_histograms():
+    c = TestClient(app)
+    c.get("/items")
+    body = c.get("/metrics").text
+    assert "# TYPE http_request_duration_seconds histogram" in body
+    assert 'http_request_duration_seconds_count{method="GET",route="/items"}' in body
+    assert 'span_seconds_bucket{span="sql",le="+Inf"}' in body
+    assert "db_pool_checkout_wait_seconds_sum" in body
+    # unmatched paths must not create a series per URL
+    c.get("/no/such/path/123")
+    assert "/no/such/path/123" not in c.get("/metrics").text
+
+
+def test_render_prometheus_groups_labelled_series():
+    a = Histogram("t_seconds", "help text", buckets=(0.1, 1.0), labels={"k": 'a"b'})
+    b = Histogram("t_seconds", "help text", buckets=(0.1, 1.0), labels={"k": "c"})
+    a.observe(0.05)
+    b.observe(5.0)
+    lines = render_prometheus([a, b]).splitlines()
+    assert lines[:2] == ["# HELP t_seconds help text", "# TYPE t_seconds histogram"]
+    assert 't_seconds_bucket{k="a\\"b",le="0.1"} 1' in lines
+    assert 't_seconds_bucket{k="c",le="1.0"} 0' in lines
+    assert 't_seconds_count{k="c"} 1' in lines
+
+
+def test_spans_are_noops_when_disabled(monkeypatch):
+    monkeypatch.setattr(settings, "tracing_enabled", False)
+    with span("disabled-span"):
+        pass
+    assert "disabled-span" not in _spans